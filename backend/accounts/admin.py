@@ -1,13 +1,43 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from core.admin import LargeTableAdminMixin
+from core.search import USER_SEARCH_FIELDS
+from .models import User, AccountPurge
+
+
+class ProfileCompletionFilter(admin.SimpleListFilter):
+    title = 'profile completion'
+    parameter_name = 'completion'
+
+    BUCKETS = {
+        'low': (0, 39),
+        'medium': (40, 79),
+        'high': (80, 99),
+        'complete': (100, 100),
+    }
+
+    def lookups(self, request, model_admin):
+        return (
+            ('low', 'Under 40%'),
+            ('medium', '40% - 79%'),
+            ('high', '80% - 99%'),
+            ('complete', '100%'),
+        )
+
+    def queryset(self, request, queryset):
+        bucket = self.BUCKETS.get(self.value())
+        if bucket is None:
+            return queryset
+        return queryset.filter(profile_completion_score__range=bucket)
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
-    list_display = ('username', 'email', 'first_name', 'last_name', 'institution', 'student_id', 'is_active', 'date_joined')
-    list_filter = ('is_active', 'is_staff', 'is_verified', 'is_premium', 'institution', 'gender', 'date_joined')
-    search_fields = ('username', 'email', 'first_name', 'last_name', 'phone', 'student_id', 'institution')
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
+    list_display = ('username', 'email', 'first_name', 'last_name', 'institution', 'student_id', 'profile_completion_score', 'is_active', 'date_joined')
+    list_filter = ('is_active', 'is_staff', 'is_verified', 'is_premium', ProfileCompletionFilter, 'institution', 'gender', 'date_joined')
+    readonly_fields = ('profile_completion_score',)
+    search_fields = USER_SEARCH_FIELDS
+    fulltext_fields = USER_SEARCH_FIELDS
     
     fieldsets = UserAdmin.fieldsets + (
         ('Profile Information', {
@@ -34,9 +64,26 @@ class CustomUserAdmin(UserAdmin):
                 'email_verified',
                 'phone_verified',
                 'profile_completed',
+                'profile_completion_score',
                 'is_premium',
                 'premium_expires_at',
                 'uuid'
             )
         }),
     )
+
+
+@admin.register(AccountPurge)
+class AccountPurgeAdmin(admin.ModelAdmin):
+    list_display = ('user', 'status', 'progress_percentage', 'current_step', 'attempts', 'created_at', 'completed_at')
+    list_filter = ('status',)
+    list_select_related = ('user',)
+    readonly_fields = (
+        'user', 'status', 'current_step', 'steps_completed', 'rows_processed', 'attempts',
+        'last_error', 'leased_until', 'created_at', 'updated_at', 'completed_at',
+    )
+
+    @admin.display(description='Progress')
+    def progress_percentage(self, obj):
+        from .purge import progress
+        return f"{progress(obj)}%"
@@ -2,18 +2,19 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
-from google.auth.transport import requests
-from google.oauth2 import id_token
 from django.conf import settings
 import requests as http_requests
 import json
+from .availability import email_taken
+from .google_auth import verify_google_id_token
 from .models import User as CustomUser
 from .serializers import UserSerializer
+from .throttles import LOGIN_THROTTLES, GoogleAuthThrottle, RegisterThrottle
 
 
 def get_tokens_for_user(user):
@@ -27,6 +28,7 @@ def get_tokens_for_user(user):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([GoogleAuthThrottle])
 def google_oauth_login(request):
     """
     Handle Google OAuth login for Vercel deployment
@@ -42,11 +44,7 @@ def google_oauth_login(request):
         
         # Verify Google token
         try:
-            idinfo = id_token.verify_oauth2_token(
-                credential, 
-                requests.Request(), 
-                settings.GOOGLE_OAUTH2_CLIENT_ID
-            )
+            idinfo = verify_google_id_token(credential, settings.GOOGLE_OAUTH2_CLIENT_ID)
             
             # Check if token is valid
             if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
@@ -76,7 +74,7 @@ def google_oauth_login(request):
         
         # Check if user exists
         try:
-            user = CustomUser.objects.get(email=email)
+            user = CustomUser.objects.with_email(email).get()
             # Update user info if needed
             if not user.first_name:
                 user.first_name = first_name
@@ -133,6 +131,7 @@ def google_oauth_login(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([GoogleAuthThrottle])
 def google_oauth_register(request):
     """
     Handle Google OAuth registration
@@ -143,6 +142,7 @@ def google_oauth_register(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def custom_login(request):
     """
     Custom login with email/password
@@ -160,7 +160,7 @@ def custom_login(request):
         
         # Authenticate user
         try:
-            user = CustomUser.objects.get(email=email)
+            user = CustomUser.objects.with_email(email).get()
             if user.check_password(password):
                 if not user.is_active:
                     return Response(
@@ -197,6 +197,7 @@ def custom_login(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterThrottle])
 def custom_register(request):
     """
     Custom registration with email/password
@@ -215,7 +216,7 @@ def custom_register(request):
             )
         
         # Check if user already exists
-        if CustomUser.objects.filter(email=email).exists():
+        if email_taken(email):
             return Response(
                 {'error': 'User with this email already exists'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,76 @@
+"""
+Authentication classes that load the request user through a short-lived cache
+
+Every authenticated API request used to SELECT the full ``users`` row. The
+user is now cached for ``AUTH_USER_CACHE_TTL`` seconds and dropped on
+``User.save()``/delete (see ``accounts.signals``), so fields that matter for
+permissions (``is_active``, ``is_staff``, premium state) are never more than
+one TTL out of date, even for writes made by other workers or ``update()``.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from oauth2_provider.models import AccessToken
+from oauth2_provider.oauth2_validators import OAuth2Validator
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+
+def user_cache_key(user_id):
+    return f'accounts:auth-user:{user_id}'
+
+
+def load_user(user_id):
+    """Return the user with ``user_id`` from cache, falling back to the database"""
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.get(pk=user_id)
+        cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TTL', 30))
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that resolves the token's user via ``load_user``"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = load_user(user_id)
+        except (User.DoesNotExist, ValueError, TypeError):
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class CachedUserOAuth2Validator(OAuth2Validator):
+    """Loads the access token without joining the wide users row"""
+
+    def _load_access_token(self, token):
+        access_token = AccessToken.objects.select_related("application").filter(token=token).first()
+        if access_token is not None and access_token.user_id is not None:
+            try:
+                access_token.user = load_user(access_token.user_id)
+            except User.DoesNotExist:
+                return None
+        return access_token
@@ -0,0 +1,38 @@
+"""
+Username and email availability checks
+
+Usernames and emails are unique case-insensitively (the ``LOWER(...)`` unique
+indexes on ``users``), so each check is one index lookup on the lower-cased
+value. The constraints remain the source of truth when an account is actually
+created.
+"""
+
+from django.db.models.functions import Lower
+
+from .models import User
+
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+
+def username_taken(username, exclude_pk=None):
+    queryset = User.objects.alias(username_lower=Lower('username')).filter(username_lower=normalize(username))
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.exists()
+
+
+def email_taken(email, exclude_pk=None):
+    queryset = User.objects.with_email(email)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.exists()
+
+
+def is_username_available(username):
+    return not username_taken(username)
+
+
+def is_email_available(email):
+    return not email_taken(email)
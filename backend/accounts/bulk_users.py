@@ -0,0 +1,321 @@
+"""
+Streaming bulk import/export of users (CSV or JSON Lines)
+
+Used by the ``import_users`` and ``export_users`` management commands to
+onboard a whole institution at once. Rows are read lazily and written in
+chunks: each chunk is one case-insensitive lookup of the existing emails, one
+``bulk_create`` for new users and one ``bulk_update`` for known ones (whose
+profile completion is then recomputed from the merged row), so memory stays
+bounded by the chunk size whatever the file size.
+
+Usernames are checked per row before a chunk is written, against the
+case-insensitive unique index and the rest of the chunk. A username derived
+from the email (no ``username`` column) is truncated to the field's length and
+given a random suffix if it is taken; a row whose own username is too long or
+taken is left out and reported in ``UserImporter.rejected``, so one bad row
+never fails its chunk.
+
+Plain-text passwords are hashed in a process pool while the previous chunk is
+being written. With Django's default PBKDF2 cost that is still the dominant
+expense, so for very large imports prefer a ``password_hash`` column (already
+hashed, e.g. from an export) or no password at all (unusable password; the
+user signs in with Google or resets it).
+"""
+
+import csv
+import json
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from django.contrib.auth.hashers import identify_hasher
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.search import normalize_terms
+
+from .models import User
+from .password_pool import hash_passwords, init_worker
+
+EXPORT_FIELDS = [
+    'email', 'username', 'first_name', 'last_name', 'phone', 'bio', 'date_of_birth', 'gender',
+    'student_id', 'institution', 'department', 'year_of_study', 'location', 'timezone',
+    'language_preference', 'skills', 'interests', 'is_active', 'date_joined',
+]
+ARRAY_FIELDS = {'skills', 'interests'}
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+CSV_ARRAY_SEPARATOR = ';'
+
+
+def detect_format(path, default='csv'):
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        return 'jsonl'
+    if path.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_rows(stream, fmt):
+    """Yield one dict per input row without loading the file"""
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: invalid JSON ({e})")
+    else:
+        yield from csv.DictReader(stream)
+
+
+def _clean(field, value):
+    """Convert a raw CSV/JSON value to what the model field expects"""
+    if field in ARRAY_FIELDS:
+        # Normalized as User.save() would (bulk writes bypass it)
+        if isinstance(value, list):
+            return normalize_terms(value)
+        return normalize_terms((value or '').split(CSV_ARRAY_SEPARATOR))
+    if value in ('', None):
+        return None
+    if field == 'date_of_birth':
+        return value if isinstance(value, date) else parse_date(value)
+    if field == 'date_joined':
+        return value if isinstance(value, datetime) else parse_datetime(value)
+    if field == 'year_of_study':
+        return int(value)
+    if field == 'is_active':
+        return value if isinstance(value, bool) else str(value).strip().lower() in ('1', 'true', 'yes')
+    return str(value).strip()
+
+
+def build_user(row):
+    """Return ``(user, plain_password, provided_fields)`` for one input row"""
+    email = (row.get('email') or '').strip().lower()
+    if not email:
+        raise ValueError(f"Row without email: {row}")
+
+    values = {}
+    for field in EXPORT_FIELDS:
+        if field in row and field != 'email':
+            cleaned = _clean(field, row[field])
+            if cleaned is not None:
+                values[field] = cleaned
+    # The score depends on columns a partial row doesn't carry; for existing
+    # users it is recomputed from the merged row after the update
+    provided = set(values) | {'updated_at'}
+
+    user = User(email=email, **{'username': email[:USERNAME_MAX_LENGTH], **values})
+    password_hash = (row.get('password_hash') or '').strip()
+    if password_hash:
+        identify_hasher(password_hash)  # raises ValueError for unknown formats
+        user.password = password_hash
+    elif not row.get('password'):
+        user.set_unusable_password()
+    user.profile_completion_score = user.compute_profile_completion()
+
+    if password_hash or row.get('password'):
+        provided.add('password')
+    return user, row.get('password') or None, provided
+
+
+class UserImporter:
+    """Chunked upsert of users keyed on case-insensitive email"""
+
+    def __init__(self, chunk_size=1000, workers=None, update_existing=True):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.update_existing = update_existing
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.rejected = []  # (email, reason) for rows left out
+        self.chunks = 0  # chunks written so far
+        self.current_chunk = None  # (first email, last email) of the chunk being written
+
+    def _submit_hashing(self, pool, chunk):
+        """Start hashing a chunk's plain-text passwords; returns futures per slice"""
+        indexes = [i for i, (_, password, _) in enumerate(chunk) if password]
+        if not indexes:
+            return indexes, []
+        step = max(1, len(indexes) // (self.workers or 4) + 1)
+        futures = [
+            pool.submit(hash_passwords, [chunk[i][1] for i in indexes[start:start + step]])
+            for start in range(0, len(indexes), step)
+        ]
+        return indexes, futures
+
+    def _write(self, chunk, indexes, futures):
+        hashes = [hashed for future in futures for hashed in future.result()]
+        for i, hashed in zip(indexes, hashes):
+            chunk[i][0].password = hashed
+
+        users = {}
+        for user, _, provided in chunk:
+            users[user.email] = (user, provided)  # last row wins for duplicate emails
+        self.current_chunk = (chunk[0][0].email, chunk[-1][0].email)
+        existing = dict(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=list(users))
+            .values_list('email_lower', 'pk')
+        )
+
+        creates, updates = [], []
+        for email, (user, provided) in users.items():
+            pk = existing.get(email)
+            if pk is None:
+                creates.append((user, provided))
+                continue
+            if not self.update_existing:
+                self.skipped += 1
+                continue
+            user.pk = user.id = pk
+            user.updated_at = timezone.now()
+            updates.append((user, provided))
+        creates, updates = self._check_usernames(creates, updates)
+
+        to_create = [user for user, _ in creates]
+        to_update = {}
+        for user, provided in updates:
+            # Only overwrite the columns this row actually supplied
+            to_update.setdefault(frozenset(provided), []).append(user)
+
+        with transaction.atomic():
+            if to_create:
+                User.objects.bulk_create(to_create, batch_size=self.chunk_size)
+            for fields, group in to_update.items():
+                User.objects.bulk_update(group, sorted(fields), batch_size=self.chunk_size)
+            self._rescore([user.pk for group in to_update.values() for user in group])
+        self.chunks += 1
+        self.created += len(to_create)
+        self.updated += sum(len(group) for group in to_update.values())
+
+    def _reject(self, user, reason):
+        self.rejected.append((user.email, reason))
+
+    def _check_usernames(self, creates, updates):
+        """Drop rows whose given username can't be used; make derived ones unique"""
+        claimed = set()  # usernames taken by earlier rows of this chunk
+
+        renames = [(user, provided) for user, provided in updates if 'username' in provided]
+        taken = _taken_usernames(user.username for user, _ in renames)
+        rejected = set()
+        for user, _ in renames:
+            name = user.username.lower()
+            if len(user.username) > USERNAME_MAX_LENGTH:
+                reason = f"username is longer than {USERNAME_MAX_LENGTH} characters"
+            elif taken.get(name, user.pk) != user.pk or name in claimed:
+                reason = f"username {user.username!r} is already taken"
+            else:
+                claimed.add(name)
+                continue
+            self._reject(user, reason)
+            rejected.add(user.pk)
+        updates = [(user, provided) for user, provided in updates if user.pk not in rejected]
+
+        accepted = []
+        pending = creates
+        while pending:
+            taken = _taken_usernames(user.username for user, _ in pending)
+            retry = []
+            for user, provided in pending:
+                name = user.username.lower()
+                if 'username' in provided and len(user.username) > USERNAME_MAX_LENGTH:
+                    self._reject(user, f"username is longer than {USERNAME_MAX_LENGTH} characters")
+                elif name not in taken and name not in claimed:
+                    claimed.add(name)
+                    accepted.append((user, provided))
+                elif 'username' in provided:
+                    self._reject(user, f"username {user.username!r} is already taken")
+                else:
+                    suffix = '-' + uuid.uuid4().hex[:8]
+                    user.username = user.email[:USERNAME_MAX_LENGTH - len(suffix)] + suffix
+                    retry.append((user, provided))
+            pending = retry
+        return accepted, updates
+
+    def _rescore(self, pks):
+        """Recompute profile completion for updated users from their stored columns"""
+        if not pks:
+            return
+        changed = []
+        for user in User.objects.filter(pk__in=pks).only('id', 'profile_completion_score', *User.PROFILE_COMPLETION_FIELDS):
+            score = user.compute_profile_completion()
+            if score != user.profile_completion_score:
+                user.profile_completion_score = score
+                changed.append(user)
+        User.objects.bulk_update(changed, ['profile_completion_score'], batch_size=self.chunk_size)
+
+    def run(self, rows):
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+            pending = None
+            chunk = []
+            for row in rows:
+                chunk.append(build_user(row))
+                if len(chunk) == self.chunk_size:
+                    # Hash this chunk while the previous one is written
+                    submitted = (chunk, *self._submit_hashing(pool, chunk))
+                    if pending:
+                        self._write(*pending)
+                    pending, chunk = submitted, []
+            if chunk:
+                submitted = (chunk, *self._submit_hashing(pool, chunk))
+                if pending:
+                    self._write(*pending)
+                pending = submitted
+            if pending:
+                self._write(*pending)
+        return self
+
+
+def _taken_usernames(usernames):
+    """``{lower(username): pk}`` for existing users holding any of ``usernames``, case-insensitively"""
+    names = {name.lower() for name in usernames}
+    if not names:
+        return {}
+    return dict(
+        User.objects.annotate(username_lower=Lower('username'))
+        .filter(username_lower__in=names)
+        .values_list('username_lower', 'pk')
+    )
+
+
+def _export_value(field, value):
+    if value is None:
+        return ''
+    if field in ARRAY_FIELDS:
+        return CSV_ARRAY_SEPARATOR.join(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def export_users(stream, fmt='csv', queryset=None, chunk_size=2000, include_password_hashes=False):
+    """
+    Write users to ``stream``. ``iterator()`` reads through a server-side
+    cursor on Postgres, so only ``chunk_size`` rows are held at a time.
+    """
+    fields = EXPORT_FIELDS + (['password_hash'] if include_password_hashes else [])
+    columns = EXPORT_FIELDS + (['password'] if include_password_hashes else [])
+    queryset = (queryset if queryset is not None else User.objects.all()).order_by('pk')
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+
+    count = 0
+    if fmt == 'jsonl':
+        for values in rows:
+            record = {
+                field: value.isoformat() if isinstance(value, (date, datetime)) else value
+                for field, value in zip(fields, values)
+            }
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    else:
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        for values in rows:
+            writer.writerow([_export_value(field, value) for field, value in zip(fields, values)])
+            count += 1
+    return count
@@ -0,0 +1,140 @@
+"""
+Dashboard statistics
+
+All counters for a user's dashboard come from one ``SELECT`` on ``users``
+with a scalar subquery per statistic, so the cost is one round trip no matter
+how many widgets the dashboard shows. The result, with the user's latest
+posts and payments, is cached per user in the ``shared`` cache and dropped by
+the signals in ``accounts.signals`` whenever one of the underlying rows is
+written, so every worker sees the invalidation. ``DASHBOARD_CACHE_TTL`` bounds
+staleness after writes that bypass the signals (``QuerySet.update``).
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from mentorship.models import Review, UserConnection
+from payments.models import Payment, UserSubscription
+from study_sessions.models import JoinRequest, Post
+
+from .models import User
+
+
+def _cache():
+    return caches['shared']
+
+
+def dashboard_cache_key(user_id):
+    return f'dashboard:stats:{user_id}'
+
+
+def invalidate_dashboard(*user_ids):
+    _cache().delete_many([dashboard_cache_key(user_id) for user_id in user_ids if user_id])
+
+
+def _scalar(queryset, user_field, **aggregate):
+    """Correlated ``(SELECT agg FROM ... WHERE user_field = users.id)``"""
+    (name, expression), = aggregate.items()
+    return Subquery(
+        queryset.filter(**{user_field: OuterRef('pk')})
+        .order_by()
+        .values(user_field)
+        .annotate(**{name: expression})
+        .values(name)
+    )
+
+
+def _count(queryset, user_field):
+    return Coalesce(_scalar(queryset, user_field, n=Count('*')), 0, output_field=IntegerField())
+
+
+def _latest_subscription(field):
+    return Subquery(
+        UserSubscription.objects.filter(user=OuterRef('pk'), status='active')
+        .order_by('-expires_at')
+        .values(field)[:1]
+    )
+
+
+def _load_stats(user_id):
+    active_connections = UserConnection.objects.filter(connection_status='active')
+    completed_payments = Payment.objects.filter(payment_status='completed')
+
+    row = User.objects.filter(pk=user_id).values('id').annotate(
+        posts=_count(Post.objects.all(), 'user'),
+        active_posts=_count(Post.objects.filter(is_active=True), 'user'),
+        join_requests_sent=_count(JoinRequest.objects.all(), 'requester_user'),
+        join_requests_accepted=_count(JoinRequest.objects.filter(status='accepted'), 'requester_user'),
+        join_requests_received=_count(JoinRequest.objects.all(), 'post__user'),
+        pending_join_requests=_count(JoinRequest.objects.filter(status='pending'), 'post__user'),
+        connections_as_mentor=_count(active_connections, 'mentor_user'),
+        connections_as_student=_count(active_connections, 'student_user'),
+        reviews_given=_count(Review.objects.all(), 'reviewer'),
+        reviews_received=_count(Review.objects.all(), 'reviewee'),
+        average_rating=_scalar(Review.objects.all(), 'reviewee', avg=Avg('rating')),
+        completed_payments=_count(completed_payments, 'user'),
+        total_paid=_scalar(completed_payments, 'user', total=Sum('amount')),
+        subscription_plan=_latest_subscription('plan__name'),
+        subscription_expires_at=_latest_subscription('expires_at'),
+    ).first() or {}
+    if row:
+        row['recent_posts'] = list(
+            Post.objects.filter(user_id=user_id).order_by('-created_at')
+            .values('id', 'title', 'post_type', 'subject_area', 'is_active', 'created_at')[:5]
+        )
+        row['recent_payments'] = list(
+            Payment.objects.filter(user_id=user_id).order_by('-created_at')
+            .values('id', 'amount', 'currency', 'payment_method', 'payment_status', 'created_at')[:3]
+        )
+    return row
+
+
+def get_dashboard_stats(user):
+    """Return the cached stats row for ``user``, loading it on a miss"""
+    key = dashboard_cache_key(user.pk)
+    row = _cache().get(key)
+    if row is None:
+        row = _load_stats(user.pk)
+        _cache().set(key, row, getattr(settings, 'DASHBOARD_CACHE_TTL', 60))
+    return row
+
+
+def build_dashboard(user):
+    """Statistics, subscription and recent activity; the views map these onto their response shapes"""
+    row = get_dashboard_stats(user)
+    now = timezone.now()
+    expires_at = row.get('subscription_expires_at')
+    average_rating = row.get('average_rating')
+
+    return {
+        'stats': {
+            'posts': row.get('posts', 0),
+            'active_posts': row.get('active_posts', 0),
+            'join_requests_sent': row.get('join_requests_sent', 0),
+            'join_requests_accepted': row.get('join_requests_accepted', 0),
+            'join_requests_received': row.get('join_requests_received', 0),
+            'pending_join_requests': row.get('pending_join_requests', 0),
+            'connections': row.get('connections_as_mentor', 0) + row.get('connections_as_student', 0),
+            'connections_as_mentor': row.get('connections_as_mentor', 0),
+            'connections_as_student': row.get('connections_as_student', 0),
+            'reviews_given': row.get('reviews_given', 0),
+            'reviews_received': row.get('reviews_received', 0),
+            'average_rating': round(float(average_rating), 2) if average_rating is not None else None,
+            'completed_payments': row.get('completed_payments', 0),
+            'total_paid': str(row.get('total_paid') or 0),
+            'profile_completion_percentage': user.profile_completion_score,
+        },
+        'subscription': {
+            'plan': row.get('subscription_plan'),
+            'expires_at': expires_at,
+            'is_active': bool(expires_at and expires_at > now),
+            'is_premium': user.is_premium_active,
+        },
+        'recent_activity': {
+            'recent_sessions': row.get('recent_posts', []),
+            'recent_payments': row.get('recent_payments', []),
+        },
+    }
@@ -15,18 +15,23 @@ from django.db import transaction, IntegrityError
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 import json
 import logging
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from django.conf import settings
+from django.core.files.storage import default_storage
 
+from .availability import is_email_available, is_username_available
+from .dashboard import build_dashboard
+from .google_auth import verify_google_id_token
+from .profile_pictures import InvalidImage, schedule_thumbnails, store_profile_picture, thumbnail_urls
+from .purge import start_purge_after_commit
 from .models import User
 from .serializers import UserSerializer
+from .throttles import AvailabilityRateThrottle, GoogleAuthThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +71,7 @@ class UserRegistrationView(CreateView):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([GoogleAuthThrottle])
 @csrf_exempt
 def google_oauth_signup(request):
     """Handle Google OAuth signup with automatic profile creation"""
@@ -80,11 +86,7 @@ def google_oauth_signup(request):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Verify Google token
-        idinfo = id_token.verify_oauth2_token(
-            credential, 
-            requests.Request(), 
-            settings.GOOGLE_OAUTH2_CLIENT_ID
-        )
+        idinfo = verify_google_id_token(credential, settings.GOOGLE_OAUTH2_CLIENT_ID)
         
         if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
             return Response({
@@ -111,9 +113,10 @@ def google_oauth_signup(request):
             last_name = name_parts[1] if len(name_parts) > 1 else last_name
         
         with transaction.atomic():
-            # Check if user exists
+            # Check if user exists (emails match case-insensitively)
+            existing_email = User.objects.with_email(email).values_list('email', flat=True).first()
             user, created = User.objects.get_or_create(
-                email=email,
+                email=existing_email or email,
                 defaults={
                     'username': email.split('@')[0],
                     'first_name': first_name,
@@ -179,6 +182,7 @@ def google_oauth_signup(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([GoogleAuthThrottle])
 @csrf_exempt
 def google_oauth_login(request):
     """Handle Google OAuth login for existing users only"""
@@ -198,11 +202,7 @@ def google_oauth_login(request):
         try:
             logger.info(f"Verifying Google token with client ID: {settings.GOOGLE_OAUTH2_CLIENT_ID}")
             # For JWT tokens from Google Sign-In, we only need the client ID for audience verification
-            idinfo = id_token.verify_oauth2_token(
-                credential, 
-                requests.Request(), 
-                settings.GOOGLE_OAUTH2_CLIENT_ID
-            )
+            idinfo = verify_google_id_token(credential, settings.GOOGLE_OAUTH2_CLIENT_ID)
             logger.info(f"Token verification successful for: {idinfo.get('email', 'unknown')}")
         except Exception as e:
             logger.error(f"Google token verification failed: {str(e)}")
@@ -223,7 +223,7 @@ def google_oauth_login(request):
         
         try:
             # Check if user exists (LOGIN ONLY - no new account creation)
-            user = User.objects.get(email=email)
+            user = User.objects.with_email(email).get()
             
             # Generate tokens
             refresh = RefreshToken.for_user(user)
@@ -290,7 +290,7 @@ def user_profile_management(request):
         """Get user profile data"""
         return Response({
             'user': UserSerializer(request.user).data,
-            'completion_percentage': request.user.completion_percentage
+            'completion_percentage': request.user.profile_completion_score
         })
     
     elif request.method in ['PUT', 'PATCH']:
@@ -317,7 +317,7 @@ def user_profile_management(request):
                     'success': True,
                     'message': 'Profile updated successfully!',
                     'user': UserSerializer(request.user).data,
-                    'completion_percentage': request.user.completion_percentage
+                    'completion_percentage': request.user.profile_completion_score
                 })
                 
         except ValidationError as e:
@@ -335,7 +335,7 @@ def user_profile_management(request):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_user_account(request):
-    """Handle account deletion with CASCADE effects"""
+    """Anonymize the account now and purge its data in the background"""
     
     try:
         # Confirm deletion with exact confirmation text
@@ -352,34 +352,16 @@ def delete_user_account(request):
         # Log deletion attempt
         logger.info(f"Account deletion initiated for user {user_email} (ID: {user_id})")
         
-        # Get counts before deletion for logging (outside transaction to avoid conflicts)
-        try:
-            from study_sessions.models import Post
-            from mentorship.models import UserConnection, Review
-            from django.db.models import Q
-            
-            posts_count = Post.objects.filter(user=user).count()
-            connections_count = UserConnection.objects.filter(
-                Q(mentor_user=user) | Q(student_user=user)
-            ).count()
-            reviews_count = Review.objects.filter(
-                Q(reviewer=user) | Q(reviewee=user)
-            ).count()
-            
-            logger.info(f"User {user_email} data to be affected: "
-                       f"{posts_count} posts, {connections_count} connections, {reviews_count} reviews")
-        except Exception as e:
-            logger.warning(f"Could not count user data before deletion: {e}")
-        
         # Perform the account deletion
         try:
             success = user.delete_account()
             if success:
                 logger.info(f"Account successfully deleted for user {user_email} (ID: {user_id})")
+                start_purge_after_commit(user_id)
                 
                 return Response({
                     'success': True,
-                    'message': 'Your account has been successfully deleted. All your data has been removed from our system.'
+                    'message': 'Your account has been deleted. Your posts, messages and other data are being removed in the background.'
                 }, status=status.HTTP_200_OK)
             else:
                 logger.error(f"delete_account returned False for user {user_id}")
@@ -407,35 +389,31 @@ def delete_user_account(request):
 def upload_profile_picture(request):
     """Handle profile picture upload"""
     try:
-        profile = request.user.profile
-        
         if 'profile_picture' not in request.FILES:
             return Response({
                 'error': 'No file uploaded'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        file = request.FILES['profile_picture']
-        
-        # Validate file type and size
-        if file.size > 5 * 1024 * 1024:  # 5MB limit
-            return Response({
-                'error': 'File too large. Maximum size is 5MB.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not file.content_type.startswith('image/'):
+        try:
+            name = store_profile_picture(request.FILES['profile_picture'])
+        except InvalidImage as e:
             return Response({
-                'error': 'Invalid file type. Please upload an image.'
+                'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Save file (implement your file storage logic here)
-        # For now, we'll just save the filename
-        profile.profile_picture = f"profile_pictures/{request.user.id}_{file.name}"
-        profile.save()
+        user = request.user
+        user.profile_picture = name
+        user.save(update_fields=['profile_picture', 'updated_at'])
+        schedule_thumbnails(name)
         
         return Response({
             'success': True,
             'message': 'Profile picture updated successfully!',
-            'profile_picture_url': profile.profile_picture
+            'profile_picture': name,
+            'profile_picture_url': request.build_absolute_uri(default_storage.url(name)),
+            'thumbnails': {
+                size: request.build_absolute_uri(url) for size, url in thumbnail_urls(name).items()
+            },
         })
         
     except Exception as e:
@@ -452,22 +430,18 @@ def user_dashboard_data(request):
     try:
         user = request.user
         
-        # Get related data counts
-        from study_sessions.models import StudySession
-        from payments.models import Payment
-        
+        dashboard = build_dashboard(user)
         dashboard_data = {
             'user': UserSerializer(user).data,
             'stats': {
-                'sessions_hosted': StudySession.objects.filter(host=user).count(),
-                'sessions_joined': user.session_participants.count(),
-                'total_payments': Payment.objects.filter(user=user, status='completed').count(),
-                'profile_completion': user.completion_percentage,
+                'sessions_hosted': dashboard['stats']['posts'],
+                'sessions_joined': dashboard['stats']['join_requests_accepted'],
+                'total_payments': dashboard['stats']['completed_payments'],
+                'profile_completion': user.profile_completion_score,
+                **dashboard['stats'],
             },
-            'recent_activity': {
-                'recent_sessions': StudySession.objects.filter(host=user).order_by('-created_at')[:5],
-                'recent_payments': Payment.objects.filter(user=user).order_by('-created_at')[:3],
-            }
+            'subscription': dashboard['subscription'],
+            'recent_activity': dashboard['recent_activity'],
         }
         
         return Response(dashboard_data)
@@ -497,22 +471,22 @@ def verify_phone(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AvailabilityRateThrottle])
 def check_username_availability(request):
     """Check if username is available"""
     username = request.data.get('username')
     if not username:
         return Response({'error': 'Username is required'}, status=400)
     
-    is_available = not User.objects.filter(username=username).exists()
-    return Response({'available': is_available})
+    return Response({'available': is_username_available(username)})
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AvailabilityRateThrottle])
 def check_email_availability(request):
     """Check if email is available"""
     email = request.data.get('email')
     if not email:
         return Response({'error': 'Email is required'}, status=400)
     
-    is_available = not User.objects.filter(email=email).exists()
-    return Response({'available': is_available})
+    return Response({'available': is_email_available(email)})
@@ -0,0 +1,137 @@
+"""
+Google ID token verification with an in-process JWKS cache
+
+``google.oauth2.id_token.verify_oauth2_token`` downloads Google's signing
+certificates on every call. ``verify_google_id_token`` keeps the key set in
+memory for as long as Google's ``Cache-Control: max-age`` allows, refreshes it
+once (single-flight) when a token arrives with an unknown ``kid`` and checks
+the RS256 signature locally.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+from jwt.algorithms import RSAAlgorithm
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+DEFAULT_CERTS_URL = 'https://www.googleapis.com/oauth2/v3/certs'
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class GoogleKeySet:
+    """Thread-safe cache of Google's JSON Web Key Set"""
+
+    def __init__(self, certs_url, default_ttl=3600, min_refresh_interval=30, timeout=5):
+        self.certs_url = certs_url
+        self.default_ttl = default_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        response = requests.get(self.certs_url, timeout=self.timeout)
+        response.raise_for_status()
+
+        keys = {}
+        for jwk in response.json().get('keys', []):
+            if jwk.get('kty') == 'RSA' and jwk.get('kid'):
+                keys[jwk['kid']] = RSAAlgorithm.from_jwk(json.dumps(jwk))
+
+        match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        ttl = int(match.group(1)) if match else self.default_ttl
+
+        now = time.monotonic()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + ttl
+        logger.info(f"Loaded {len(keys)} Google signing keys, cached for {ttl}s")
+
+    def _refresh(self, kid=None):
+        """Refresh once even when many threads ask at the same time"""
+        fetched_before = self._fetched_at
+        with self._lock:
+            if self._fetched_at != fetched_before:
+                return  # another thread refreshed while we waited
+            if kid is not None and time.monotonic() - self._fetched_at < self.min_refresh_interval:
+                return  # don't let tokens with made-up kids hammer Google
+            try:
+                self._fetch()
+            except requests.RequestException as e:
+                if not self._keys:
+                    raise
+                # Keep serving the last known keys and retry shortly
+                logger.warning(f"Google signing key refresh failed, using cached keys: {e}")
+                self._fetched_at = time.monotonic()
+                self._expires_at = self._fetched_at + self.min_refresh_interval
+
+    def get_key(self, kid):
+        if time.monotonic() >= self._expires_at:
+            self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            self._refresh(kid)
+            key = self._keys.get(kid)
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._expires_at = 0.0
+            self._fetched_at = 0.0
+
+
+_key_set = None
+_key_set_lock = threading.Lock()
+
+
+def get_google_key_set():
+    global _key_set
+    if _key_set is None:
+        with _key_set_lock:
+            if _key_set is None:
+                _key_set = GoogleKeySet(getattr(settings, 'GOOGLE_OAUTH2_CERTS_URL', DEFAULT_CERTS_URL))
+    return _key_set
+
+
+def verify_google_id_token(token, audience=None, key_set=None, leeway=10):
+    """
+    Verify a Google ID token and return its claims.
+
+    Raises ``ValueError`` on any failure, like ``id_token.verify_oauth2_token``,
+    so callers can keep their existing error handling.
+    """
+    audience = audience or settings.GOOGLE_OAUTH2_CLIENT_ID
+    key_set = key_set or get_google_key_set()
+
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        raise ValueError(f"Malformed token: {e}")
+
+    try:
+        key = key_set.get_key(header.get('kid'))
+    except requests.RequestException as e:
+        raise ValueError(f"Could not fetch Google signing keys: {e}")
+    if key is None:
+        raise ValueError(f"Unknown signing key: {header.get('kid')}")
+
+    try:
+        claims = jwt.decode(token, key=key, algorithms=['RS256'], audience=audience, leeway=leeway)
+    except jwt.PyJWTError as e:
+        raise ValueError(f"Token verification failed: {e}")
+
+    if claims.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+    return claims
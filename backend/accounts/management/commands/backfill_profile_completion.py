@@ -0,0 +1,41 @@
+"""
+Recompute the stored profile completion score for existing users.
+
+``User.save()`` keeps ``profile_completion_score`` current, but rows written
+before the column existed (or through ``QuerySet.update()``) need a backfill:
+
+    python manage.py backfill_profile_completion --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Recompute profile_completion_score for all users in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        users = User.objects.only('id', 'profile_completion_score', *User.PROFILE_COMPLETION_FIELDS).order_by('pk')
+
+        scanned = updated = 0
+        changed = []
+        for user in users.iterator(chunk_size=batch_size):
+            scanned += 1
+            score = user.compute_profile_completion()
+            if score != user.profile_completion_score:
+                user.profile_completion_score = score
+                changed.append(user)
+            if len(changed) >= batch_size:
+                User.objects.bulk_update(changed, ['profile_completion_score'])
+                updated += len(changed)
+                changed = []
+        if changed:
+            User.objects.bulk_update(changed, ['profile_completion_score'])
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} users, updated {updated} scores.'))
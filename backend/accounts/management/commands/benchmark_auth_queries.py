@@ -0,0 +1,83 @@
+"""
+Count database queries per request on busy endpoints with and without the
+cached authentication user.
+
+Runs inside a transaction that is rolled back, so it is safe against a
+development database:
+
+    python manage.py benchmark_auth_queries
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import user_cache_key
+from accounts.models import User
+
+ENDPOINTS = [
+    '/api/auth/profile/',
+    '/api/study-sessions/posts/',
+    '/api/study-sessions/my-posts/',
+    '/api/study-sessions/messages/',
+    '/api/study-sessions/join-requests/',
+    '/api/mentorship/connections/',
+    '/api/payments/history/',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Report queries saved per request by the cached authentication user loader'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10, help='Requests per endpoint')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+                self.run(options['requests'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, repeat):
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            username=f'bench_{tag}', email=f'bench_{tag}@bench.local', password='bench-password'
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        total_cold = total_warm = 0
+        self.stdout.write(f"{'endpoint':<40}{'uncached':>10}{'cached':>10}{'saved':>8}")
+        for path in ENDPOINTS:
+            cold = self.count_queries(client, path, repeat, warm=False, user=user)
+            warm = self.count_queries(client, path, repeat, warm=True, user=user)
+            total_cold += cold
+            total_warm += warm
+            self.stdout.write(f"{path:<40}{cold:>10.1f}{warm:>10.1f}{cold - warm:>8.1f}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Average queries per request: {total_cold / len(ENDPOINTS):.1f} uncached, "
+            f"{total_warm / len(ENDPOINTS):.1f} cached"
+        ))
+
+    def count_queries(self, client, path, repeat, warm, user):
+        client.get(path)  # prime the cache (or not) and any lazy imports
+        total = 0
+        for _ in range(repeat):
+            if not warm:
+                cache.delete(user_cache_key(user.pk))
+            with CaptureQueriesContext(connection) as queries:
+                client.get(path)
+            total += len(queries)
+        return total / repeat
@@ -0,0 +1,51 @@
+"""
+Stream users out as CSV or JSON Lines.
+
+    python manage.py export_users --output users.csv
+    python manage.py export_users --format jsonl --active-only > users.jsonl
+
+The output can be fed back to ``import_users``. ``--include-password-hashes``
+adds a password_hash column so accounts can be moved between databases.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from accounts.bulk_users import detect_format, export_users
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Export users to CSV or JSONL using a server-side cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help="Output file, or '-' for stdout")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--active-only', action='store_true')
+        parser.add_argument('--institution', default=None)
+        parser.add_argument('--include-password-hashes', action='store_true')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or detect_format(output)
+
+        queryset = User.objects.all()
+        if options['active_only']:
+            queryset = queryset.filter(is_active=True)
+        if options['institution']:
+            queryset = queryset.filter(institution=options['institution'])
+
+        stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+        try:
+            count = export_users(
+                stream, fmt, queryset,
+                chunk_size=options['chunk_size'],
+                include_password_hashes=options['include_password_hashes'],
+            )
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        self.stderr.write(f"Exported {count} users")
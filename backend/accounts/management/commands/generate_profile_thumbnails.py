@@ -0,0 +1,37 @@
+"""
+Create missing profile picture thumbnails.
+
+Thumbnails are normally made by the in-process worker pool right after an
+upload; this recovers jobs lost to a restart and backfills older pictures:
+
+    python manage.py generate_profile_thumbnails
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from accounts.profile_pictures import UPLOAD_DIR, generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails for stored profile pictures'
+
+    def handle(self, *args, **options):
+        names = (
+            User.objects.filter(profile_picture__startswith=f'{UPLOAD_DIR}/')
+            .values_list('profile_picture', flat=True)
+            .distinct()
+            .iterator(chunk_size=2000)
+        )
+        pictures = written = failed = 0
+        for name in names:
+            pictures += 1
+            try:
+                written += generate_thumbnails(name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{name}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {pictures} pictures, wrote {written} thumbnails, {failed} failed.'
+        ))
@@ -0,0 +1,68 @@
+"""
+Bulk import users from CSV or JSON Lines.
+
+    python manage.py import_users students.csv --workers 8
+    python manage.py import_users - --format jsonl < users.jsonl
+
+Columns: email (required), username, first_name, last_name, phone, bio,
+date_of_birth, gender, student_id, institution, department, year_of_study,
+location, timezone, language_preference, skills, interests (';'-separated in
+CSV, arrays in JSONL), is_active, date_joined, and either password (plain
+text, hashed in a process pool) or password_hash (already hashed). Existing
+users are matched on email, case-insensitively, and updated. Rows whose
+username is too long or already taken are skipped and listed at the end.
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from accounts.bulk_users import UserImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream users from a CSV or JSONL file into the database in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes')
+        parser.add_argument('--no-update', action='store_true', help='Skip users that already exist')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        importer = UserImporter(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            update_existing=not options['no_update'],
+        )
+
+        start = time.monotonic()
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        try:
+            importer.run(read_rows(stream, fmt))
+        except (ValueError, OSError) as e:
+            raise CommandError(
+                f"Import stopped after {importer.created} created / {importer.updated} updated: {e}"
+            )
+        except DatabaseError as e:
+            # The failing chunk was rolled back; earlier chunks are committed
+            first, last = importer.current_chunk or ('?', '?')
+            raise CommandError(
+                f"Chunk {importer.chunks + 1} ({first} .. {last}) was not written: {e}. "
+                f"Earlier chunks are committed ({importer.created} created / {importer.updated} updated)."
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for email, reason in importer.rejected:
+            self.stderr.write(f"Rejected {email}: {reason}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {importer.created}, updated {importer.updated}, skipped {importer.skipped}, "
+            f"rejected {len(importer.rejected)} users in {time.monotonic() - start:.1f}s"
+        ))
@@ -0,0 +1,147 @@
+"""
+Load test the login throttles during a simulated credential-stuffing attack.
+
+Legitimate users log in at a human pace from their own IPs while attacker
+threads hammer the same endpoint with wrong passwords, half of them against
+one victim account. The victim keeps logging in from their own IP, which
+must not be locked out. The run is repeated with throttling disabled and
+enabled, and reports legitimate login latency, the victim's logins and how
+many attacker requests reached password hashing:
+
+    python manage.py loadtest_auth_throttle --duration 15 --attackers 8
+
+Creates a handful of throwaway users and deletes them at the end.
+"""
+
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.throttles import reset_bucket_store
+
+
+class Command(BaseCommand):
+    help = 'Measure login latency for legitimate users during a credential-stuffing burst'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds per scenario')
+        parser.add_argument('--attackers', type=int, default=8, help='Attacker threads')
+        parser.add_argument('--attacker-ips', type=int, default=4, help='Distinct attacker IPs')
+        parser.add_argument('--legit-users', type=int, default=4)
+        parser.add_argument('--legit-interval', type=float, default=3.0, help='Seconds between logins per user')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        password = f'Load-{tag}-pass'
+        users = [
+            User.objects.create_user(
+                username=f'loadtest_{tag}_{i}', email=f'loadtest_{tag}_{i}@loadtest.local', password=password
+            )
+            for i in range(options['legit_users'] + 1)
+        ]
+        victim, legit = users[0], users[1:]
+        url = reverse('auth-login')
+
+        try:
+            # Client() talks to 'testserver' over plain HTTP
+            with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+                no_throttle = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+                with override_settings(REST_FRAMEWORK=no_throttle):
+                    self.report('throttling off', self.run_scenario(url, victim, legit, password, options))
+                self.report('throttling on', self.run_scenario(url, victim, legit, password, options))
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run_scenario(self, url, victim, legit, password, options):
+        reset_bucket_store()
+        stop = threading.Event()
+        results = {'legit': [], 'legit_failed': 0, 'victim_ok': 0, 'victim_failed': 0, 'attack': 0, 'attack_throttled': 0}
+        lock = threading.Lock()
+
+        def legit_user(index, user):
+            client = Client()
+            ip = f'10.1.0.{index + 1}'
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    response = client.post(
+                        url, {'email': user.email, 'password': password},
+                        content_type='application/json', REMOTE_ADDR=ip,
+                    )
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        if response.status_code == 200:
+                            results['legit'].append(elapsed)
+                        else:
+                            results['legit_failed'] += 1
+                    stop.wait(options['legit_interval'])
+            finally:
+                connection.close()
+
+        def victim_user():
+            client = Client()
+            try:
+                while not stop.is_set():
+                    response = client.post(
+                        url, {'email': victim.email, 'password': password},
+                        content_type='application/json', REMOTE_ADDR='10.2.0.1',
+                    )
+                    with lock:
+                        results['victim_ok' if response.status_code == 200 else 'victim_failed'] += 1
+                    stop.wait(options['legit_interval'])
+            finally:
+                connection.close()
+
+        def attacker(index):
+            client = Client()
+            ip = f'203.0.113.{index % options["attacker_ips"] + 1}'
+            attempt = 0
+            try:
+                while not stop.is_set():
+                    attempt += 1
+                    target = victim.email if attempt % 2 else f'guess{attempt}@loadtest.local'
+                    response = client.post(
+                        url, {'email': target, 'password': f'wrong-{attempt}'},
+                        content_type='application/json', REMOTE_ADDR=ip,
+                    )
+                    with lock:
+                        results['attack'] += 1
+                        if response.status_code == 429:
+                            results['attack_throttled'] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=legit_user, args=(i, user)) for i, user in enumerate(legit)]
+        threads.append(threading.Thread(target=victim_user))
+        threads += [threading.Thread(target=attacker, args=(i,)) for i in range(options['attackers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def report(self, label, results):
+        latencies = sorted(results['legit'])
+        if latencies:
+            p50 = statistics.median(latencies)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            legit = f'{len(latencies)} ok, p50 {p50:.0f} ms, p95 {p95:.0f} ms'
+        else:
+            legit = 'no successful logins'
+        reached = results['attack'] - results['attack_throttled']
+        self.stdout.write(
+            f"{label:>15}: legit {legit}, {results['legit_failed']} failed | "
+            f"victim {results['victim_ok']} ok, {results['victim_failed']} failed | "
+            f"attack {results['attack']} requests, {results['attack_throttled']} throttled, "
+            f"{reached} reached the password check"
+        )
@@ -0,0 +1,51 @@
+"""
+Purge the data of deleted accounts in bounded batches.
+
+Run from cron or as a long-lived worker:
+
+    python manage.py purge_deleted_accounts
+    python manage.py purge_deleted_accounts --loop --sleep 30
+    python manage.py purge_deleted_accounts --status
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import AccountPurge
+from accounts.purge import process_pending_purges, progress
+
+
+class Command(BaseCommand):
+    help = 'Run queued account purges (resumes interrupted ones)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many purges')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new purges')
+        parser.add_argument('--sleep', type=int, default=30, help='Seconds between polls with --loop')
+        parser.add_argument('--status', action='store_true', help='Show unfinished purges and exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.show_status()
+            return
+
+        while True:
+            processed = process_pending_purges(limit=options['limit'], batch_size=options['batch_size'])
+            if processed:
+                self.stdout.write(f'Processed {processed} account purge(s).')
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+    def show_status(self):
+        purges = AccountPurge.objects.exclude(status='completed').order_by('created_at')
+        for purge in purges:
+            self.stdout.write(
+                f"user {purge.user_id}: {purge.status}, {progress(purge)}% "
+                f"(step {purge.current_step or '-'}, {sum(purge.rows_processed.values())} rows, "
+                f"{purge.attempts} attempts){' - ' + purge.last_error if purge.last_error else ''}"
+            )
+        if not purges:
+            self.stdout.write('No unfinished account purges.')
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_remove_student_user_remove_userprofile_user_user_bio_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('username', 'email', 'first_name', 'last_name', 'phone', 'student_id', 'institution', config='simple'), name='users_search_gin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_search_gin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_completion_score',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:28
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import Lower
+import django.db.models.functions.text
+
+logger = logging.getLogger(__name__)
+
+
+def _case_duplicates(User, field):
+    """Lists of users sharing ``field`` up to case, the one to keep first"""
+    lowered = (
+        User.objects.annotate(value_lower=Lower(field))
+        .order_by()
+        .values('value_lower')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('value_lower', flat=True)
+    )
+    for value in lowered:
+        # Keep the most recently used account
+        yield list(
+            User.objects.annotate(value_lower=Lower(field))
+            .filter(value_lower=value)
+            .order_by(F('last_login').desc(nulls_last=True), 'id')
+        )
+
+
+def resolve_case_duplicates(apps, schema_editor):
+    """
+    Make existing rows satisfy the constraints below. Of the accounts whose
+    emails differ only in case, the most recently used one is kept; the
+    others are deactivated and their email prefixed with ``duplicate-<id>.``
+    so an admin can merge them. Usernames that differ only in case get a
+    ``-<id>`` suffix, except on the account kept.
+    """
+    User = apps.get_model('accounts', 'User')
+    username_length = User._meta.get_field('username').max_length
+    email_length = User._meta.get_field('email').max_length
+
+    for users in _case_duplicates(User, 'email'):
+        for user in users[1:]:
+            logger.warning(f"Deactivating user {user.pk}: email {user.email} duplicates user {users[0].pk}")
+            user.email = f'duplicate-{user.pk}.{user.email}'[:email_length]
+            user.is_active = False
+            user.save(update_fields=['email', 'is_active'])
+
+    for users in _case_duplicates(User, 'username'):
+        for user in users[1:]:
+            suffix = f'-{user.pk}'
+            user.username = user.username[:username_length - len(suffix)] + suffix
+            user.save(update_fields=['username'])
+
+
+class Migration(migrations.Migration):
+
+    # The data fix commits before the indexes are built
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0005_user_profile_completion_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='users_email_lower_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='users_username_lower_unique'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_case_insensitive_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('current_step', models.CharField(blank=True, default='', max_length=50)),
+                ('steps_completed', models.PositiveSmallIntegerField(default=0)),
+                ('rows_processed', models.JSONField(blank=True, default=dict)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('leased_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='account_purge', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'account_purges',
+                'indexes': [models.Index(fields=['status', 'leased_until'], name='account_pur_status_88882d_idx')],
+            },
+        ),
+    ]
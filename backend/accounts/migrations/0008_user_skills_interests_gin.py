@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:34
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_accountpurge'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skills'], name='users_skills_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['interests'], name='users_interests_gin'),
+        ),
+    ]
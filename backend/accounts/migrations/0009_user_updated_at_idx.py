@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_user_skills_interests_gin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['updated_at'], name='users_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def _normalize_terms(values):
+    # Frozen copy of core.search.normalize_terms
+    terms = []
+    for value in values or ():
+        term = ' '.join(str(value).replace('_', ' ').split()).lower()
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def normalize_skills_interests(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = User.objects.exclude(skills=[], interests=[]).only('id', 'skills', 'interests').order_by('id')
+    changed = []
+    for user in users.iterator(chunk_size=2000):
+        skills, interests = _normalize_terms(user.skills), _normalize_terms(user.interests)
+        if skills != user.skills or interests != user.interests:
+            user.skills, user.interests = skills, interests
+            changed.append(user)
+        if len(changed) >= 1000:
+            User.objects.bulk_update(changed, ['skills', 'interests'])
+            changed = []
+    if changed:
+        User.objects.bulk_update(changed, ['skills', 'interests'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_user_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_skills_interests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:15
+
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_normalize_skills_interests'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', accounts.models.UserManager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_updated_at_idx',
+        ),
+    ]
@@ -1,11 +1,24 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 from django.core.validators import RegexValidator, MinLengthValidator
 from django.utils import timezone
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models.functions import Lower
+from core.search import normalize_terms, user_search_vector
 import uuid
 
 
+class UserManager(BaseUserManager):
+    """Emails are unique case-insensitively (``users_email_lower_unique``), so look them up that way"""
+
+    def with_email(self, email):
+        return self.alias(email_lower=Lower('email')).filter(email_lower=(email or '').strip().lower())
+
+    def get_by_natural_key(self, username):
+        return self.with_email(username).get()
+
+
 class User(AbstractUser):
     """Enhanced User model with all profile information included - Single Table Design"""
     
@@ -53,15 +66,37 @@ class User(AbstractUser):
     is_premium = models.BooleanField(default=False)
     premium_expires_at = models.DateTimeField(blank=True, null=True)
     
+    # Denormalized from PROFILE_COMPLETION_FIELDS on every save
+    profile_completion_score = models.PositiveSmallIntegerField(default=0, db_index=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Fields that count towards profile completion
+    PROFILE_COMPLETION_FIELDS = (
+        'first_name', 'last_name', 'phone', 'profile_picture', 'bio', 'date_of_birth',
+        'gender', 'student_id', 'institution', 'department', 'year_of_study',
+        'location', 'skills', 'interests',
+    )
+    
+    objects = UserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            GinIndex(user_search_vector(), name='users_search_gin'),
+            GinIndex(fields=['skills'], name='users_skills_gin'),
+            GinIndex(fields=['interests'], name='users_interests_gin'),
+        ]
+        constraints = [
+            # Foo@x.com and foo@x.com are the same account
+            models.UniqueConstraint(Lower('email'), name='users_email_lower_unique'),
+            models.UniqueConstraint(Lower('username'), name='users_username_lower_unique'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
@@ -80,13 +115,23 @@ class User(AbstractUser):
 
     @property
     def profile_completion_percentage(self):
-        """Calculate profile completion percentage"""
-        fields = [
-            self.bio, self.institution, self.department, self.year_of_study,
-            self.location, self.date_of_birth, self.gender, self.student_id
-        ]
-        completed = sum(1 for field in fields if field)
-        return int((completed / len(fields)) * 100)
+        """Stored profile completion percentage (kept for API compatibility)"""
+        return self.profile_completion_score
+
+    def compute_profile_completion(self):
+        """Calculate profile completion percentage from PROFILE_COMPLETION_FIELDS"""
+        completed = sum(1 for field in self.PROFILE_COMPLETION_FIELDS if getattr(self, field))
+        return int((completed / len(self.PROFILE_COMPLETION_FIELDS)) * 100)
+
+    def save(self, *args, **kwargs):
+        # Stored normalized so array lookups (people search, mentor digests) match regardless of casing
+        self.skills = normalize_terms(self.skills)
+        self.interests = normalize_terms(self.interests)
+        self.profile_completion_score = self.compute_profile_completion()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.PROFILE_COMPLETION_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | {'profile_completion_score'}
+        super().save(*args, **kwargs)
 
     def can_use_premium_features(self):
         """Check if user can access premium features"""
@@ -135,8 +180,43 @@ class User(AbstractUser):
                 self.save()
                 logger.info(f"User {user_id} marked as deleted and anonymized")
                 
+                # Posts, messages, reviews etc. are removed in the background
+                AccountPurge.objects.get_or_create(user=self)
+                
                 return True
                 
         except Exception as e:
             logger.error(f"Error during account deletion for user {self.id}: {e}")
             raise e
+
+
+class AccountPurge(models.Model):
+    """Background removal of a deleted account's dependent rows (see accounts.purge)"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='account_purge')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    current_step = models.CharField(max_length=50, blank=True, default='')
+    steps_completed = models.PositiveSmallIntegerField(default=0)
+    rows_processed = models.JSONField(default=dict, blank=True)  # step name -> rows deleted/anonymized
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    leased_until = models.DateTimeField(blank=True, null=True)  # worker holding the purge, or retry time after a failure
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'account_purges'
+        indexes = [
+            models.Index(fields=['status', 'leased_until']),
+        ]
+    
+    def __str__(self):
+        return f"Purge of user {self.user_id} ({self.status})"
@@ -0,0 +1,21 @@
+"""
+Password hashing for process pools
+
+Kept free of model imports: with the ``spawn`` start method (macOS, Windows)
+worker processes unpickle these functions by importing this module before
+Django is set up.
+"""
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords):
+    from django.contrib.auth.hashers import make_password
+
+    return [make_password(password) for password in passwords]
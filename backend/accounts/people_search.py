@@ -0,0 +1,65 @@
+"""
+People search by skills and interests
+
+``skills`` and ``interests`` are matched with array operators (``&&`` for
+any, ``@>`` for all) that are served by the GIN indexes on those columns.
+Both are stored normalized (``User.save``, ``core.search.normalize_terms``)
+and requested terms are normalized the same way, so "Machine_Learning" finds
+"machine learning". Results are ranked by how many requested terms a user
+has.
+"""
+
+from django.db.models import F, IntegerField, Q
+from django.db.models.expressions import RawSQL
+
+from core.search import normalize_terms
+
+from .models import User
+
+_MATCH_COUNT_SQL = "(SELECT count(*) FROM unnest(\"users\".\"{column}\") AS t(term) WHERE t.term = ANY(%s))"
+
+
+def parse_terms(raw):
+    """``'Python, machine_learning'`` -> ``['python', 'machine learning']``"""
+    return normalize_terms((raw or '').split(','))
+
+
+def array_filter(column, terms, mode):
+    """Q for users having any (or all) of ``terms`` in ``column``"""
+    if not terms:
+        return Q()
+    if mode == 'all':
+        return Q(**{f'{column}__contains': list(terms)})
+    return Q(**{f'{column}__overlap': list(terms)})
+
+
+def match_count(column, terms):
+    if not terms:
+        return RawSQL('0', [], output_field=IntegerField())
+    return RawSQL(_MATCH_COUNT_SQL.format(column=column), [terms], output_field=IntegerField())
+
+
+def search_people(skills=(), interests=(), skills_mode='any', interests_mode='any',
+                  institution=None, department=None, exclude_user=None):
+    """
+    Active users matching the filters, annotated with ``match_score`` (the
+    number of requested skills and interests they have). Unordered; the
+    caller paginates by ``('-match_score', 'id')``.
+    """
+    queryset = User.objects.filter(is_active=True).filter(
+        array_filter('skills', skills, skills_mode),
+        array_filter('interests', interests, interests_mode),
+    )
+    if institution:
+        queryset = queryset.filter(institution__iexact=institution)
+    if department:
+        queryset = queryset.filter(department__iexact=department)
+    if exclude_user is not None:
+        queryset = queryset.exclude(pk=exclude_user.pk)
+
+    return queryset.annotate(
+        skill_matches=match_count('skills', list(skills)),
+        interest_matches=match_count('interests', list(interests)),
+    ).annotate(
+        match_score=F('skill_matches') + F('interest_matches'),
+    )
@@ -0,0 +1,169 @@
+"""
+Profile picture storage and thumbnails
+
+Uploads are streamed in chunks (never read into memory whole), checked for
+size and for an image signature, and saved to Django's default storage under
+a content-hashed name, ``profile_pictures/ab/<sha256>.<ext>``. Because a name
+always refers to the same bytes, the files can be served with a one-year
+``immutable`` cache header and identical uploads are stored once. In
+development ``serve_profile_picture`` serves them with that header; in
+production the web server or storage backend serves ``MEDIA_URL``.
+
+Thumbnails are produced off the request path by a small thread pool once the
+upload has committed; Pillow releases the GIL while resizing. Lost jobs (e.g.
+a restart) are recovered by ``manage.py generate_profile_thumbnails``.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.views.static import serve
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are skipped without Pillow
+    Image = None
+
+UPLOAD_DIR = 'profile_pictures'
+THUMBNAIL_SIZES = (64, 128, 256)
+FAR_FUTURE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Leading bytes of the formats we accept -> file extension
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def sniff_extension(header):
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def picture_name(digest, extension):
+    return f'{UPLOAD_DIR}/{digest[:2]}/{digest}.{extension}'
+
+
+def thumbnail_name(name, size):
+    base = name.rsplit('.', 1)[0]
+    return f'{base}_{size}.webp'
+
+
+def thumbnail_urls(name, storage=None):
+    storage = storage or default_storage
+    return {str(size): storage.url(thumbnail_name(name, size)) for size in THUMBNAIL_SIZES}
+
+
+def store_profile_picture(uploaded_file, storage=None):
+    """
+    Validate and save an upload, returning its storage name.
+
+    Raises ``InvalidImage`` for files that are too large or not an image.
+    """
+    storage = storage or default_storage
+    max_bytes = getattr(settings, 'PROFILE_PICTURE_MAX_BYTES', 5 * 1024 * 1024)
+    if uploaded_file.size and uploaded_file.size > max_bytes:
+        raise InvalidImage(f'File too large. Maximum size is {max_bytes // (1024 * 1024)}MB.')
+
+    sha256 = hashlib.sha256()
+    extension = None
+    size = 0
+    for chunk in uploaded_file.chunks():
+        if extension is None:
+            extension = sniff_extension(chunk[:16])
+            if extension is None:
+                raise InvalidImage('Invalid file type. Please upload a JPEG, PNG, GIF or WebP image.')
+        size += len(chunk)
+        if size > max_bytes:
+            raise InvalidImage(f'File too large. Maximum size is {max_bytes // (1024 * 1024)}MB.')
+        sha256.update(chunk)
+    if extension is None:
+        raise InvalidImage('Empty file.')
+
+    name = picture_name(sha256.hexdigest(), extension)
+    if not storage.exists(name):
+        uploaded_file.seek(0)
+        saved = storage.save(name, uploaded_file)
+        if saved != name:
+            # Lost a race with an identical upload; keep the canonical copy
+            storage.delete(saved)
+    return name
+
+
+def generate_thumbnails(name, storage=None):
+    """Write the missing thumbnails for a stored picture; returns how many were written"""
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping profile picture thumbnails")
+        return 0
+    storage = storage or default_storage
+    missing = [size for size in THUMBNAIL_SIZES if not storage.exists(thumbnail_name(name, size))]
+    if not missing:
+        return 0
+
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    for size in missing:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, 'WEBP', quality=85)
+        storage.save(thumbnail_name(name, size), ContentFile(buffer.getvalue()))
+    return len(missing)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PROFILE_THUMBNAIL_WORKERS', 2),
+                    thread_name_prefix='thumbnails',
+                )
+    return _executor
+
+
+def _thumbnail_job(name):
+    try:
+        generate_thumbnails(name)
+    except Exception as e:
+        logger.error(f"Thumbnail generation failed for {name}: {e}")
+
+
+def schedule_thumbnails(name):
+    """Queue thumbnail generation to run after the current transaction commits"""
+    transaction.on_commit(lambda: _get_executor().submit(_thumbnail_job, name))
+
+
+def serve_profile_picture(request, path):
+    """Serve a locally stored picture with far-future cache headers (DEBUG only, see ``studysync.urls``)"""
+    response = serve(request, f'{UPLOAD_DIR}/{path}', document_root=settings.MEDIA_ROOT)
+    response['Cache-Control'] = FAR_FUTURE_CACHE_CONTROL
+    return response
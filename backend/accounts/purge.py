@@ -0,0 +1,215 @@
+"""
+Deleted-account purge pipeline
+
+``User.delete_account`` only anonymizes the user row and queues an
+``AccountPurge``. The purge then removes (or anonymizes) everything the user
+left behind, one step per table, ``ACCOUNT_PURGE_BATCH_SIZE`` rows per
+transaction, so no statement touches more than a bounded number of rows.
+
+Progress is committed together with each batch. A purge interrupted by a crash
+or a killed worker therefore resumes at the step and batch where it stopped
+once its lease expires. Purges are picked up by the
+``purge_deleted_accounts`` command (cron/worker) and, when
+``ACCOUNT_PURGE_IN_PROCESS`` is on, by a thread started after the deletion
+request commits.
+
+Each batch first locks the purge row and checks that the lease is still the
+one this worker set; a worker whose lease expired and was taken over stops
+instead of racing the new holder. A failed purge is not retried before
+``ACCOUNT_PURGE_RETRY_BACKOFF`` seconds, doubling with every attempt
+(``leased_until`` holds the retry time), up to ``ACCOUNT_PURGE_MAX_ATTEMPTS``.
+
+Payments and subscriptions are kept: they are financial records.
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AccountPurge
+
+logger = logging.getLogger(__name__)
+
+PurgeStep = namedtuple('PurgeStep', ['name', 'queryset', 'anonymize'])
+
+
+class PurgeLeaseLost(Exception):
+    """Another worker took over the purge after this worker's lease expired"""
+
+
+def purge_steps():
+    """Ordered steps; ``anonymize`` is None for deletes, else the update values"""
+    from mentorship.models import MentorDigest, MentorshipRequest, Review, UserConnection
+    from payments.models import AdImpression, UserPaymentMethod
+    from study_sessions.models import JoinRequest, Message, Post
+
+    return [
+        PurgeStep('sent_messages', lambda uid: Message.objects.filter(sender_id=uid), None),
+        PurgeStep('received_messages', lambda uid: Message.objects.filter(receiver_id=uid), None),
+        PurgeStep('join_requests_sent', lambda uid: JoinRequest.objects.filter(requester_user_id=uid), None),
+        # Empty the user's posts first so deleting a post never cascades unbounded
+        PurgeStep('join_requests_received', lambda uid: JoinRequest.objects.filter(post__user_id=uid), None),
+        PurgeStep(
+            'join_request_responses',
+            lambda uid: JoinRequest.objects.filter(responded_by_id=uid),
+            {'responded_by': None},
+        ),
+        PurgeStep('posts', lambda uid: Post.objects.filter(user_id=uid), None),
+        PurgeStep(
+            'reviews',
+            lambda uid: Review.objects.filter(Q(reviewer_id=uid) | Q(reviewee_id=uid)),
+            None,
+        ),
+        PurgeStep('mentor_connections', lambda uid: UserConnection.objects.filter(mentor_user_id=uid), None),
+        PurgeStep('student_connections', lambda uid: UserConnection.objects.filter(student_user_id=uid), None),
+        PurgeStep('mentorship_requests', lambda uid: MentorshipRequest.objects.filter(author_id=uid), None),
+        PurgeStep('mentor_digests', lambda uid: MentorDigest.objects.filter(mentor_id=uid), None),
+        PurgeStep(
+            'ad_impressions',
+            lambda uid: AdImpression.objects.filter(user_id=uid),
+            {'user': None, 'ip_address': None, 'user_agent': None},
+        ),
+        PurgeStep('payment_methods', lambda uid: UserPaymentMethod.objects.filter(user_id=uid), None),
+    ]
+
+
+def progress(purge):
+    """Share of steps finished, 0-100"""
+    total = len(purge_steps())
+    return 100 if purge.status == 'completed' else int(purge.steps_completed * 100 / total)
+
+
+def _lease_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'ACCOUNT_PURGE_LEASE_SECONDS', 300))
+
+
+def _retry_after(attempts):
+    backoff = getattr(settings, 'ACCOUNT_PURGE_RETRY_BACKOFF', 60)
+    return timezone.now() + timedelta(seconds=backoff * 2 ** max(0, attempts - 1))
+
+
+def _claim(queryset):
+    """Lease one runnable purge from ``queryset``; returns None if there is none"""
+    now = timezone.now()
+    max_attempts = getattr(settings, 'ACCOUNT_PURGE_MAX_ATTEMPTS', 5)
+    with transaction.atomic():
+        purge = queryset.select_for_update(skip_locked=True).filter(
+            Q(status__in=['pending', 'running']) | Q(status='failed', attempts__lt=max_attempts),
+            Q(leased_until__isnull=True) | Q(leased_until__lt=now),
+        ).order_by('created_at').first()
+        if purge is None:
+            return None
+        purge.status = 'running'
+        purge.attempts += 1
+        purge.leased_until = _lease_expiry()
+        purge.save(update_fields=['status', 'attempts', 'leased_until', 'updated_at'])
+    return purge
+
+
+def claim_next_purge():
+    return _claim(AccountPurge.objects.all())
+
+
+def _run_batch(purge, step, batch_size):
+    """Process one batch of ``step``; returns the number of rows handled"""
+    queryset = step.queryset(purge.user_id)
+    with transaction.atomic():
+        held = AccountPurge.objects.select_for_update().filter(pk=purge.pk, leased_until=purge.leased_until)
+        if not held.exists():
+            raise PurgeLeaseLost(f"Lease on the purge of user {purge.user_id} was taken over")
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if pks:
+            batch = queryset.model.objects.filter(pk__in=pks)
+            if step.anonymize is None:
+                batch.delete()
+            else:
+                batch.update(**step.anonymize)
+
+        purge.rows_processed[step.name] = purge.rows_processed.get(step.name, 0) + len(pks)
+        purge.current_step = step.name
+        if len(pks) < batch_size:
+            purge.steps_completed += 1
+        purge.leased_until = _lease_expiry()
+        purge.save(update_fields=[
+            'rows_processed', 'current_step', 'steps_completed', 'leased_until', 'updated_at'
+        ])
+    return len(pks)
+
+
+def run_purge(purge, batch_size=None):
+    """Run a leased purge to completion, resuming after its last finished batch"""
+    batch_size = batch_size or getattr(settings, 'ACCOUNT_PURGE_BATCH_SIZE', 500)
+    steps = purge_steps()
+    try:
+        while purge.steps_completed < len(steps):
+            step = steps[purge.steps_completed]
+            _run_batch(purge, step, batch_size)
+    except PurgeLeaseLost as e:
+        logger.warning(str(e))
+        raise
+    except Exception as e:
+        logger.error(f"Account purge for user {purge.user_id} failed at {purge.current_step}: {e}")
+        AccountPurge.objects.filter(pk=purge.pk, leased_until=purge.leased_until).update(
+            status='failed', last_error=str(e), leased_until=_retry_after(purge.attempts),
+            updated_at=timezone.now(),
+        )
+        raise
+
+    purge.status = 'completed'
+    purge.current_step = ''
+    purge.completed_at = timezone.now()
+    finished = AccountPurge.objects.filter(pk=purge.pk, leased_until=purge.leased_until).update(
+        status='completed', current_step='', leased_until=None, completed_at=purge.completed_at,
+        updated_at=purge.completed_at,
+    )
+    purge.leased_until = None
+    if not finished:
+        raise PurgeLeaseLost(f"Lease on the purge of user {purge.user_id} was taken over")
+    logger.info(
+        f"Account purge for user {purge.user_id} completed: "
+        f"{sum(purge.rows_processed.values())} rows in {len(steps)} steps"
+    )
+    return purge
+
+
+def process_pending_purges(limit=None, batch_size=None):
+    """Claim and run purges until none are left (or ``limit`` is reached)"""
+    processed = 0
+    failed = []
+    while limit is None or processed < limit:
+        purge = _claim(AccountPurge.objects.exclude(pk__in=failed))
+        if purge is None:
+            break
+        try:
+            run_purge(purge, batch_size)
+        except Exception:
+            # Recorded on the purge; retried by a later run once its backoff passes
+            failed.append(purge.pk)
+        processed += 1
+    return processed
+
+
+def _run_in_thread(user_id):
+    try:
+        purge = _claim(AccountPurge.objects.filter(user_id=user_id))
+        if purge is not None:
+            run_purge(purge)
+    except Exception as e:
+        logger.warning(f"In-process account purge for user {user_id} stopped, worker will resume it: {e}")
+    finally:
+        connection.close()
+
+
+def start_purge_after_commit(user_id):
+    """Kick off the purge in a background thread once the deletion commits"""
+    if not getattr(settings, 'ACCOUNT_PURGE_IN_PROCESS', True):
+        return
+    transaction.on_commit(
+        lambda: threading.Thread(target=_run_in_thread, args=(user_id,), daemon=True).start()
+    )
@@ -5,6 +5,7 @@ Enhanced serializers for simplified single-table user management
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from .availability import email_taken, username_taken
 from .models import User
 
 
@@ -34,13 +35,13 @@ class UserSerializer(serializers.ModelSerializer):
 
     def validate_email(self, value):
         """Validate email uniqueness"""
-        if User.objects.filter(email=value).exclude(pk=self.instance.pk if self.instance else None).exists():
+        if email_taken(value, exclude_pk=self.instance.pk if self.instance else None):
             raise serializers.ValidationError("A user with this email already exists.")
         return value
 
     def validate_username(self, value):
         """Validate username uniqueness"""
-        if User.objects.filter(username=value).exclude(pk=self.instance.pk if self.instance else None).exists():
+        if username_taken(value, exclude_pk=self.instance.pk if self.instance else None):
             raise serializers.ValidationError("A user with this username already exists.")
         return value
 
@@ -51,6 +52,24 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
 
+class PeopleSearchResultSerializer(serializers.ModelSerializer):
+    """Public profile fields returned by people search"""
+    
+    full_name = serializers.ReadOnlyField()
+    match_score = serializers.IntegerField(read_only=True)
+    skill_matches = serializers.IntegerField(read_only=True)
+    interest_matches = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'full_name', 'profile_picture', 'bio', 'institution',
+            'department', 'year_of_study', 'skills', 'interests',
+            'match_score', 'skill_matches', 'interest_matches',
+        ]
+        read_only_fields = fields
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Simplified registration serializer"""
     
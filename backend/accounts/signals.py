@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .dashboard import invalidate_dashboard
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    """Forget the cached auth user now and again once the write is committed"""
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+
+def _drop_dashboards(*user_ids):
+    invalidate_dashboard(*user_ids)
+    transaction.on_commit(lambda: invalidate_dashboard(*user_ids))
+
+
+@receiver(post_save, sender='study_sessions.Post')
+@receiver(post_delete, sender='study_sessions.Post')
+@receiver(post_save, sender='payments.Payment')
+@receiver(post_delete, sender='payments.Payment')
+@receiver(post_save, sender='payments.UserSubscription')
+@receiver(post_delete, sender='payments.UserSubscription')
+def drop_owner_dashboard(sender, instance, **kwargs):
+    _drop_dashboards(instance.user_id)
+
+
+@receiver(post_save, sender='study_sessions.JoinRequest')
+@receiver(post_delete, sender='study_sessions.JoinRequest')
+def drop_join_request_dashboards(sender, instance, **kwargs):
+    from study_sessions.models import Post
+
+    post_owner_id = Post.objects.filter(pk=instance.post_id).values_list('user_id', flat=True).first()
+    _drop_dashboards(instance.requester_user_id, post_owner_id)
+
+
+@receiver(post_save, sender='mentorship.UserConnection')
+@receiver(post_delete, sender='mentorship.UserConnection')
+def drop_connection_dashboards(sender, instance, **kwargs):
+    _drop_dashboards(instance.mentor_user_id, instance.student_user_id)
+
+
+@receiver(post_save, sender='mentorship.Review')
+@receiver(post_delete, sender='mentorship.Review')
+def drop_review_dashboards(sender, instance, **kwargs):
+    _drop_dashboards(instance.reviewer_id, instance.reviewee_id)
@@ -0,0 +1,196 @@
+import json
+import time
+from unittest import mock
+
+import jwt
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase
+from jwt.algorithms import RSAAlgorithm
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .google_auth import GoogleKeySet, verify_google_id_token
+from .throttles import CacheBucketStore, LocalBucketStore, LoginAccountThrottle, parse_rate, reset_bucket_store
+
+CLIENT_ID = 'test-client.apps.googleusercontent.com'
+
+
+def _rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _jwks_response(keys, max_age=3600):
+    """A fake ``requests`` response serving ``{kid: private_key}`` as a JWKS"""
+    jwks = []
+    for kid, private_key in keys.items():
+        jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+        jwk.update(kid=kid, alg='RS256', use='sig')
+        jwks.append(jwk)
+    response = mock.Mock()
+    response.json.return_value = {'keys': jwks}
+    response.headers = {'Cache-Control': f'public, max-age={max_age}'}
+    response.raise_for_status.return_value = None
+    return response
+
+
+def _id_token(private_key, kid, **claims):
+    now = int(time.time())
+    payload = {
+        'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'sub': '1234567890',
+        'email': 'user@example.com', 'iat': now, 'exp': now + 300, **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+@mock.patch('accounts.google_auth.requests.get')
+class GoogleKeySetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.old_key = _rsa_key()
+        cls.new_key = _rsa_key()
+
+    def verify(self, token, key_set):
+        return verify_google_id_token(token, audience=CLIENT_ID, key_set=key_set)
+
+    def test_keys_are_fetched_once_while_fresh(self, get):
+        get.return_value = _jwks_response({'old': self.old_key})
+        key_set = GoogleKeySet('https://certs.test')
+
+        for _ in range(3):
+            self.assertEqual(self.verify(_id_token(self.old_key, 'old'), key_set)['sub'], '1234567890')
+        self.assertEqual(get.call_count, 1)
+
+    def test_unknown_kid_triggers_one_refresh_after_rotation(self, get):
+        get.return_value = _jwks_response({'old': self.old_key})
+        key_set = GoogleKeySet('https://certs.test', min_refresh_interval=0)
+        self.verify(_id_token(self.old_key, 'old'), key_set)
+
+        # Google rotates: the new kid is only in the next JWKS
+        get.return_value = _jwks_response({'old': self.old_key, 'new': self.new_key})
+        claims = self.verify(_id_token(self.new_key, 'new'), key_set)
+
+        self.assertEqual(claims['email'], 'user@example.com')
+        self.assertEqual(get.call_count, 2)
+
+    def test_unknown_kid_refreshes_at_most_once_per_interval(self, get):
+        get.return_value = _jwks_response({'old': self.old_key})
+        key_set = GoogleKeySet('https://certs.test', min_refresh_interval=30)
+        self.verify(_id_token(self.old_key, 'old'), key_set)
+
+        for _ in range(3):
+            with self.assertRaisesMessage(ValueError, 'Unknown signing key'):
+                self.verify(_id_token(self.new_key, 'made-up'), key_set)
+        self.assertEqual(get.call_count, 1)
+
+    def test_expired_key_set_is_refetched(self, get):
+        get.return_value = _jwks_response({'old': self.old_key}, max_age=0)
+        key_set = GoogleKeySet('https://certs.test')
+
+        self.verify(_id_token(self.old_key, 'old'), key_set)
+        self.verify(_id_token(self.old_key, 'old'), key_set)
+        self.assertEqual(get.call_count, 2)
+
+    def test_failed_refresh_keeps_serving_cached_keys(self, get):
+        get.return_value = _jwks_response({'old': self.old_key}, max_age=0)
+        key_set = GoogleKeySet('https://certs.test')
+        self.verify(_id_token(self.old_key, 'old'), key_set)
+
+        get.side_effect = requests.ConnectionError('certs unavailable')
+        self.assertEqual(self.verify(_id_token(self.old_key, 'old'), key_set)['sub'], '1234567890')
+
+    def test_first_fetch_failure_is_a_verification_error(self, get):
+        get.side_effect = requests.ConnectionError('certs unavailable')
+        with self.assertRaisesMessage(ValueError, 'Could not fetch Google signing keys'):
+            self.verify(_id_token(self.old_key, 'old'), GoogleKeySet('https://certs.test'))
+
+    def test_token_signed_by_another_key_is_rejected(self, get):
+        get.return_value = _jwks_response({'old': self.old_key})
+        with self.assertRaisesMessage(ValueError, 'Token verification failed'):
+            self.verify(_id_token(self.new_key, 'old'), GoogleKeySet('https://certs.test'))
+
+    def test_wrong_audience_is_rejected(self, get):
+        get.return_value = _jwks_response({'old': self.old_key})
+        with self.assertRaisesMessage(ValueError, 'Token verification failed'):
+            self.verify(_id_token(self.old_key, 'old', aud='someone-else'), GoogleKeySet('https://certs.test'))
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/min'), (10, 10 / 60))
+        self.assertEqual(parse_rate('5/hour'), (5, 5 / 3600))
+
+    def test_burst_then_reject_with_wait(self):
+        store = LocalBucketStore()
+        capacity, refill_rate = parse_rate('3/min')
+
+        results = [store.take('k', capacity, refill_rate, now=100.0) for _ in range(4)]
+
+        self.assertEqual([allowed for allowed, _ in results], [True, True, True, False])
+        self.assertAlmostEqual(results[-1][1], 20.0)  # one token every 20s
+
+    def test_tokens_refill_over_time_up_to_capacity(self):
+        store = LocalBucketStore()
+        capacity, refill_rate = parse_rate('3/min')
+        for _ in range(3):
+            store.take('k', capacity, refill_rate, now=100.0)
+
+        self.assertFalse(store.take('k', capacity, refill_rate, now=110.0)[0])
+        self.assertTrue(store.take('k', capacity, refill_rate, now=121.0)[0])
+        self.assertFalse(store.take('k', capacity, refill_rate, now=121.0)[0])
+
+        # A long pause refills the burst, but no further
+        allowed = [store.take('k', capacity, refill_rate, now=1000.0)[0] for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def test_buckets_are_independent_per_key(self):
+        store = LocalBucketStore()
+        self.assertTrue(store.take('a', 1, 1 / 60, now=0.0)[0])
+        self.assertFalse(store.take('a', 1, 1 / 60, now=0.0)[0])
+        self.assertTrue(store.take('b', 1, 1 / 60, now=0.0)[0])
+
+    def test_local_store_evicts_least_recently_used(self):
+        store = LocalBucketStore(max_keys=2)
+        store.take('a', 1, 1 / 60, now=0.0)
+        store.take('b', 1, 1 / 60, now=0.0)
+        store.take('c', 1, 1 / 60, now=0.0)
+        # 'a' was evicted, so it starts with a full bucket again
+        self.assertTrue(store.take('a', 1, 1 / 60, now=0.0)[0])
+
+    def test_cache_store_refills_like_local_store(self):
+        store = CacheBucketStore('default')
+        store.cache.clear()
+        capacity, refill_rate = parse_rate('2/min')
+
+        allowed = [store.take('k', capacity, refill_rate, now=100.0)[0] for _ in range(3)]
+        self.assertEqual(allowed, [True, True, False])
+        self.assertTrue(store.take('k', capacity, refill_rate, now=131.0)[0])
+
+
+@mock.patch.object(LoginAccountThrottle, 'get_rate', return_value=parse_rate('3/min'))
+class LoginAccountThrottleTests(SimpleTestCase):
+    def setUp(self):
+        reset_bucket_store()
+        self.addCleanup(reset_bucket_store)
+
+    def attempt(self, email, ip):
+        django_request = APIRequestFactory().post(
+            '/api/auth/login/', {'email': email, 'password': 'wrong'}, format='json', REMOTE_ADDR=ip,
+        )
+        return LoginAccountThrottle().allow_request(Request(django_request, parsers=[JSONParser()]), None)
+
+    def test_attacker_cannot_lock_the_account_out_of_other_ips(self, get_rate):
+        attacker = [self.attempt('victim@example.com', '203.0.113.9') for _ in range(4)]
+        self.assertEqual(attacker, [True, True, True, False])
+
+        self.assertTrue(self.attempt('victim@example.com', '198.51.100.7'))
+
+    def test_account_is_matched_case_insensitively(self, get_rate):
+        for _ in range(3):
+            self.attempt('victim@example.com', '203.0.113.9')
+        self.assertFalse(self.attempt(' Victim@Example.com ', '203.0.113.9'))
+
+    def test_requests_without_an_account_are_not_limited_here(self, get_rate):
+        self.assertTrue(all(self.attempt('', '203.0.113.9') for _ in range(5)))
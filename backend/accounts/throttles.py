@@ -0,0 +1,179 @@
+"""
+Token-bucket throttles for authentication endpoints
+
+Each client key (an IP, or an account and IP in a login attempt) owns a
+bucket holding up to N tokens that refills at N per period, using the same
+``"N/period"`` strings as DRF's ``DEFAULT_THROTTLE_RATES``. A request takes
+one token and is rejected with 429 and ``Retry-After`` when the bucket is
+empty. Legitimate users rarely come near the burst size, while a
+credential-stuffing client is cut off after N attempts without any password
+hashing being done for it.
+
+Buckets live in process memory by default (``THROTTLE_BUCKET_STORE =
+'local'``), which is per worker. Set it to ``'cache'`` to keep them in the
+Django cache named by ``THROTTLE_CACHE_ALIAS`` and share them across workers;
+updates there are read-modify-write, so concurrent requests may occasionally
+both get the last token.
+
+Client IPs come from DRF's ``get_ident``, so ``REST_FRAMEWORK['NUM_PROXIES']``
+must match the proxies in front of the app; otherwise a client could pick a
+fresh bucket per request by rotating ``X-Forwarded-For``.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> ``(capacity=10, refill_per_second=10 / 60)``"""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def _refill(state, capacity, refill_rate, now):
+    tokens, updated_at = state if state else (capacity, now)
+    return min(capacity, tokens + (now - updated_at) * refill_rate)
+
+
+def _take(tokens, refill_rate):
+    """Returns ``(allowed, tokens_left, wait_seconds)``"""
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / refill_rate
+
+
+class LocalBucketStore:
+    """Buckets in a bounded per-process LRU dict"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens = _refill(self._buckets.pop(key, None), capacity, refill_rate, now)
+            allowed, tokens, wait = _take(tokens, refill_rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in a (shared) Django cache"""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        tokens = _refill(self.cache.get(key), capacity, refill_rate, now)
+        allowed, tokens, wait = _take(tokens, refill_rate)
+        # A bucket left alone until full is the same as no bucket at all
+        self.cache.set(key, (tokens, now), math.ceil(capacity / refill_rate) + 1)
+        return allowed, wait
+
+    def clear(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if getattr(settings, 'THROTTLE_BUCKET_STORE', 'local') == 'cache':
+                    _store = CacheBucketStore(getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default'))
+                else:
+                    _store = LocalBucketStore()
+    return _store
+
+
+def reset_bucket_store():
+    global _store
+    with _store_lock:
+        _store = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle backed by a token bucket; subclasses set ``scope`` and ``get_ident_key``"""
+
+    scope = None
+
+    def get_rate(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        return parse_rate(rate) if rate else None
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        ident = self.get_ident_key(request, view)
+        if rate is None or ident is None:
+            return True
+        capacity, refill_rate = rate
+        allowed, self._wait = get_bucket_store().take(f'throttle:{self.scope}:{ident}', capacity, refill_rate)
+        return allowed
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login'
+
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    """
+    Limits attempts against one account from one IP. Keying on the account
+    alone would let anyone lock a user out by spending the account's bucket
+    on bad passwords; with the IP in the key, the real user keeps their own.
+    """
+
+    scope = 'login_account'
+
+    def get_ident_key(self, request, view):
+        identifier = request.data.get('email') or request.data.get('username')
+        if not isinstance(identifier, str) or not identifier.strip():
+            return None
+        key = f'{identifier.strip().lower()}|{self.get_ident(request)}'
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+class RegisterThrottle(TokenBucketThrottle):
+    scope = 'register'
+
+
+class GoogleAuthThrottle(TokenBucketThrottle):
+    scope = 'google_auth'
+
+
+class AvailabilityRateThrottle(TokenBucketThrottle):
+    """Per-IP limit on the username/email availability endpoints"""
+
+    scope = 'availability'
+
+
+LOGIN_THROTTLES = [LoginIPThrottle, LoginAccountThrottle]
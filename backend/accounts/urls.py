@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from . import views, auth_views, dynamic_views
+from .throttles import LOGIN_THROTTLES
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet)
@@ -20,6 +21,7 @@ urlpatterns = [
     path('profile/upload-picture/', dynamic_views.upload_profile_picture, name='upload-profile-picture'),
     path('account/delete/', dynamic_views.delete_user_account, name='delete-account'),
     path('dashboard/data/', dynamic_views.user_dashboard_data, name='dashboard-data'),
+    path('people/search/', views.PeopleSearchView.as_view(), name='people-search'),
     
     # Utility endpoints
     path('check/username/', dynamic_views.check_username_availability, name='check-username'),
@@ -33,7 +35,7 @@ urlpatterns = [
     path('auth/refresh/', auth_views.refresh_token, name='auth-refresh'),
     
     # JWT Token endpoints
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/', TokenObtainPairView.as_view(throttle_classes=LOGIN_THROTTLES), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
     # Traditional authentication (compatible with existing views)
@@ -5,8 +5,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
-from rest_framework import status, viewsets, permissions
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework import generics, status, viewsets, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -16,8 +17,13 @@ from social_django.utils import psa
 import json
 import logging
 
+from core.pagination import KeysetCursorPagination
+
+from .dashboard import build_dashboard
 from .models import User
-from .serializers import UserSerializer, UserRegistrationSerializer
+from .people_search import parse_terms, search_people
+from .serializers import PeopleSearchResultSerializer, UserSerializer, UserRegistrationSerializer
+from .throttles import LOGIN_THROTTLES, RegisterThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +39,50 @@ class UserViewSet(viewsets.ModelViewSet):
         return User.objects.filter(id=self.request.user.id)
 
 
+class PeopleSearchView(generics.ListAPIView):
+    """
+    Find study partners and mentors.
+    
+    GET ?skills=python,django&skills_mode=all&interests=ai&interests_mode=any
+        &institution=BUET&department=CSE&cursor=...
+    
+    Results are ranked by the number of matching skills and interests.
+    """
+    serializer_class = PeopleSearchResultSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    keyset_ordering = ('-match_score', 'id')
+    filter_backends = []
+    
+    def get_queryset(self):
+        params = self.request.query_params
+        skills = parse_terms(params.get('skills'))
+        interests = parse_terms(params.get('interests'))
+        institution = params.get('institution', '').strip()
+        department = params.get('department', '').strip()
+        
+        modes = {}
+        for name in ('skills_mode', 'interests_mode'):
+            modes[name] = params.get(name, 'any')
+            if modes[name] not in ('any', 'all'):
+                raise ValidationError({name: "Must be 'any' or 'all'."})
+        
+        if not (skills or interests or institution or department):
+            raise ValidationError({'error': 'Provide at least one of skills, interests, institution or department.'})
+        
+        return search_people(
+            skills=skills,
+            interests=interests,
+            institution=institution,
+            department=department,
+            exclude_user=self.request.user,
+            **modes,
+        )
+
+
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterThrottle]
     
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -71,7 +119,7 @@ class ProfileView(APIView):
             
             return Response({
                 'user': user_data,
-                'completion_percentage': request.user.completion_percentage
+                'completion_percentage': request.user.profile_completion_score
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -100,7 +148,7 @@ class ProfileView(APIView):
             return Response({
                 'message': 'Profile updated successfully',
                 'user': user_data,
-                'completion_percentage': request.user.completion_percentage
+                'completion_percentage': request.user.profile_completion_score
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -127,16 +175,18 @@ def user_dashboard(request):
     try:
         user = request.user
         
-        # Calculate basic stats
+        dashboard = build_dashboard(user)
         dashboard_data = {
             'user': UserSerializer(user).data,
             'stats': {
-                'total_study_sessions': 0,  # Will be populated from actual study sessions
+                'total_study_sessions': dashboard['stats']['posts'],
                 'total_study_hours': 0,
                 'current_streak': 0,
-                'profile_completion_percentage': calculate_profile_completion(user),
-                'weekly_goal_progress': 0
+                'profile_completion_percentage': user.profile_completion_score,
+                'weekly_goal_progress': 0,
+                **dashboard['stats'],
             },
+            'subscription': dashboard['subscription'],
             'recent_activities': [],  # Will be populated from actual activities
             'upcoming_sessions': []   # Will be populated from actual sessions
         }
@@ -150,41 +200,10 @@ def user_dashboard(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def calculate_profile_completion(user):
-    """Calculate profile completion percentage"""
-    total_fields = 10
-    completed_fields = 0
-    
-    # Check user fields
-    if user.first_name:
-        completed_fields += 1
-    if user.last_name:
-        completed_fields += 1
-    if user.email:
-        completed_fields += 1
-    if user.phone:
-        completed_fields += 1
-    if user.bio:
-        completed_fields += 1
-    
-    # Check profile fields (now part of User model)
-    if user.institution:
-        completed_fields += 1
-    if user.student_id:
-        completed_fields += 1
-    if user.skills:
-        completed_fields += 1
-    if user.interests:
-        completed_fields += 1
-        if user.profile_picture:
-            completed_fields += 1
-    
-    return int((completed_fields / total_fields) * 100)
-
-
 # Backward compatibility endpoints (to be deprecated)
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def login_view(request):
     """Legacy login endpoint"""
     email = request.data.get('email')
@@ -4,9 +4,14 @@
 echo "Installing dependencies..."
 pip3 install -r requirements.txt
 
-# Run database migrations
+# Run database migrations (--fake-initial adopts tables that --run-syncdb
+# created before an app had migrations, e.g. payments)
 echo "Running database migrations..."
-python3 manage.py migrate --noinput
+python3 manage.py migrate --noinput --fake-initial
+
+# Table for the shared cache when REDIS_URL is not set
+echo "Creating cache table..."
+python3 manage.py createcachetable
 
 # Create database indexes
 echo "Creating database indexes..."
@@ -0,0 +1,51 @@
+"""
+Shared ModelAdmin building blocks for large tables
+"""
+
+from django.db.models import Q
+
+from .pagination import EstimatedCountPaginator
+from .search import prefix_search_query, search_vector, user_search_vector
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist defaults for tables too big for exact counts and ``icontains``.
+
+    ``fulltext_fields`` are matched through the model's own tsvector index and
+    ``fulltext_user_fields`` names foreign keys to ``accounts.User``; up to
+    ``fulltext_user_limit`` users are matched through the users table's
+    tsvector index and the rows pointing at them are returned.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    fulltext_fields = ()
+    fulltext_user_fields = ()
+    fulltext_user_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not (self.fulltext_fields or self.fulltext_user_fields):
+            return super().get_search_results(request, queryset, search_term)
+
+        query = prefix_search_query(search_term)
+        if query is None:
+            return queryset, False
+
+        condition = Q()
+        if self.fulltext_fields:
+            queryset = queryset.alias(admin_search=search_vector(*self.fulltext_fields))
+            condition |= Q(admin_search=query)
+
+        if self.fulltext_user_fields:
+            from accounts.models import User
+
+            # Resolve users first so the outer query is a plain IN list that
+            # can use the foreign key indexes instead of a hashed subplan.
+            matching_users = list(User.objects.alias(
+                admin_search=user_search_vector()
+            ).filter(admin_search=query).values_list('pk', flat=True)[:self.fulltext_user_limit])
+            for field in self.fulltext_user_fields:
+                condition |= Q(**{f'{field}__in': matching_users})
+
+        return queryset.filter(condition), False
@@ -0,0 +1,156 @@
+"""
+Paginators that avoid exact COUNT(*) and deep OFFSETs on large tables
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset``, or ``None`` when the
+    database can't provide one. Unfiltered querysets read ``pg_class.reltuples``;
+    filtered ones use the top-level row estimate from ``EXPLAIN``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct and not query.combinator:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return int(row[0])
+            return None
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the planner estimate once it is above
+    ``exact_count_threshold`` and only runs an exact COUNT(*) below it.
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            try:
+                estimate = estimate_count(self.object_list)
+            except Exception:
+                estimate = None
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        return super().count
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Forward-only cursor pagination over a multi-column ordering.
+
+    DRF's ``CursorPagination`` keys on a single field and falls back to an
+    offset for ties, which degrades when many rows share a value (e.g. a
+    match score). This encodes the full ordering tuple of the last row and
+    continues with ``(a, b) > (last_a, last_b)`` style filters instead. The
+    view sets ``keyset_ordering``; the last field must be unique (e.g. ``id``).
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = [self.value(rows[-1], field) for field in self.ordering] if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def value(row, field):
+        return getattr(row, field.lstrip('-'))
+
+    def after(self, position):
+        """Rows strictly after ``position`` in ``self.ordering``"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = f'{name}__lt' if field.startswith('-') else f'{name}__gt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (ValueError, binascii.Error, UnicodeEncodeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return position
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position, cls=DjangoJSONEncoder).encode()).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,138 @@
+"""
+Shared queryset helpers
+"""
+
+from django.db.models import Q
+
+
+class UnionAllQuerySet:
+    """
+    Lazy replacement for ``queryset.filter(Q(a=x) | Q(b=x))``.
+
+    Postgres tends to plan an OR across two foreign keys as a sequential scan.
+    This rewrites it as ``UNION ALL`` of one branch per condition, so each
+    branch can use its own index. Later branches exclude rows already matched
+    by earlier ones, so no row is returned twice.
+
+    Slicing (what DRF pagination does) pushes ``ORDER BY ... LIMIT`` into every
+    branch, unions only the primary keys, then loads the page through the base
+    queryset so ``select_related`` still applies.
+
+    It is not a ``QuerySet``: use it only for list views with pagination and
+    ``filter_backends = []``. Filter/search/ordering backends and object
+    lookups (``get_object_or_404``) need a real queryset with the plain OR.
+    """
+
+    def __init__(self, queryset, *conditions, ordering=None):
+        if not conditions:
+            raise ValueError("UnionAllQuerySet needs at least one condition")
+        self.queryset = queryset
+        self.conditions = [c if isinstance(c, Q) else Q(**c) for c in conditions]
+        self.ordering = tuple(ordering or queryset.query.order_by or queryset.model._meta.ordering or ('-pk',))
+        self.ordered = True
+        self._result_cache = None
+
+    def _clone(self, queryset):
+        return UnionAllQuerySet(queryset, *self.conditions, ordering=self.ordering)
+
+    def _branches(self):
+        branches = []
+        for index, condition in enumerate(self.conditions):
+            branch = self.queryset.filter(condition)
+            for previous in self.conditions[:index]:
+                branch = branch.exclude(previous)
+            branches.append(branch)
+        return branches
+
+    def _order_fields(self):
+        fields = [field.lstrip('-') for field in self.ordering]
+        return [field for field in fields if field != 'pk']
+
+    def _page_pks(self, start, stop):
+        order_fields = self._order_fields()
+        branches = []
+        for branch in self._branches():
+            branch = branch.order_by(*self.ordering).values_list('pk', *order_fields)
+            if stop is not None:
+                branch = branch[:stop]
+            branches.append(branch)
+
+        combined = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        # Ordering the combined query has to reference its output columns by
+        # name, so map e.g. '-created_at' onto the aliased select list.
+        combined = combined.order_by(*self.ordering)
+        rows = combined[start:stop] if stop is not None else combined[start:]
+        return [row[0] for row in rows]
+
+    def _fetch(self, start=0, stop=None):
+        pks = self._page_pks(start, stop)
+        objects = self.queryset.order_by().in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+    def filter(self, *args, **kwargs):
+        return self._clone(self.queryset.filter(*args, **kwargs))
+
+    def select_related(self, *fields):
+        return self._clone(self.queryset.select_related(*fields))
+
+    def prefetch_related(self, *lookups):
+        return self._clone(self.queryset.prefetch_related(*lookups))
+
+    def order_by(self, *fields):
+        return UnionAllQuerySet(self.queryset, *self.conditions, ordering=fields)
+
+    def all(self):
+        return self._clone(self.queryset)
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return sum(branch.order_by().count() for branch in self._branches())
+
+    def exists(self):
+        return any(branch.exists() for branch in self._branches())
+
+    def get(self, *args, **kwargs):
+        # Point lookups (e.g. by pk) are index-backed already; the OR only has
+        # to be checked on the single candidate row.
+        condition = self.conditions[0]
+        for other in self.conditions[1:]:
+            condition |= other
+        return self.queryset.filter(*args, **kwargs).filter(condition).get()
+
+    @property
+    def model(self):
+        return self.queryset.model
+
+    def __getitem__(self, key):
+        if self._result_cache is not None:
+            return self._result_cache[key]
+        if isinstance(key, slice):
+            if key.step is not None:
+                raise ValueError("UnionAllQuerySet does not support slice steps")
+            start = key.start or 0
+            return self._fetch(start, key.stop)
+        if key < 0:
+            raise ValueError("Negative indexing is not supported.")
+        results = self._fetch(key, key + 1)
+        if not results:
+            raise IndexError("UnionAllQuerySet index out of range")
+        return results[0]
+
+    def __iter__(self):
+        if self._result_cache is None:
+            self._result_cache = self._fetch()
+        return iter(self._result_cache)
+
+    def __len__(self):
+        if self._result_cache is None:
+            self._result_cache = self._fetch()
+        return len(self._result_cache)
+
+    def __bool__(self):
+        return self.exists() if self._result_cache is None else bool(self._result_cache)
+
+
+def union_all(queryset, *conditions, ordering=None):
+    """Rewrite an OR across foreign keys into index-backed UNION ALL branches"""
+    return UnionAllQuerySet(queryset, *conditions, ordering=ordering)
@@ -0,0 +1,47 @@
+"""
+Full-text search expressions shared by models (for GIN indexes) and queries
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+
+SEARCH_CONFIG = 'simple'
+
+USER_SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name', 'phone', 'student_id', 'institution')
+
+
+def search_vector(*fields):
+    """
+    The tsvector expression searched by the admin. GIN indexes are declared
+    with the same call so the planner can match the indexed expression.
+    """
+    return SearchVector(*fields, config=SEARCH_CONFIG)
+
+
+def prefix_search_query(search_term):
+    """Turn free text into an AND-ed prefix tsquery, e.g. ``'jo':* & 'smi':*``"""
+    words = re.findall(r"[\w@.+-]+", search_term)
+    if not words:
+        return None
+    lexemes = ["'{}':*".format(word.lower().replace("'", "''")) for word in words]
+    return SearchQuery(' & '.join(lexemes), search_type='raw', config=SEARCH_CONFIG)
+
+
+def user_search_vector():
+    return search_vector(*USER_SEARCH_FIELDS)
+
+
+def normalize_term(value):
+    """Canonical form of a skill/interest: lower case, single spaces, no underscores"""
+    return ' '.join(value.replace('_', ' ').split()).lower()
+
+
+def normalize_terms(values):
+    """Normalized, de-duplicated terms in their original order; how User skills/interests are stored"""
+    terms = []
+    for value in values or ():
+        term = normalize_term(str(value))
+        if term and term not in terms:
+            terms.append(term)
+    return terms
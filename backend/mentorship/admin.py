@@ -1,13 +1,16 @@
 from django.contrib import admin
-from .models import MentorshipRequest, UserConnection, Review
+from core.admin import LargeTableAdminMixin
+from .models import MentorshipRequest, UserConnection, Review, MentorDigest, MENTORSHIP_REQUEST_SEARCH_FIELDS
 
 
 @admin.register(MentorshipRequest)
-class MentorshipRequestAdmin(admin.ModelAdmin):
+class MentorshipRequestAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'title', 'author', 'field', 'budget', 'experience_level', 
         'status', 'created_at'
     ]
+    list_select_related = ['author']
+    fulltext_fields = MENTORSHIP_REQUEST_SEARCH_FIELDS
     list_filter = [
         'field', 'budget', 'experience_level', 'status', 
         'preferred_time', 'session_frequency'
@@ -36,11 +39,13 @@ class MentorshipRequestAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserConnection)
-class UserConnectionAdmin(admin.ModelAdmin):
+class UserConnectionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'mentor_user', 'student_user', 'connection_status', 
         'initiated_by', 'created_at'
     ]
+    list_select_related = ['mentor_user', 'student_user', 'initiated_by']
+    fulltext_user_fields = ['mentor_user', 'student_user']
     list_filter = ['connection_status', 'created_at']
     search_fields = [
         'mentor_user__email', 'student_user__email', 
@@ -51,10 +56,14 @@ class UserConnectionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'reviewer', 'reviewee', 'rating', 'connection', 'created_at'
     ]
+    list_select_related = [
+        'reviewer', 'reviewee', 'connection__mentor_user', 'connection__student_user'
+    ]
+    fulltext_user_fields = ['reviewer', 'reviewee']
     list_filter = ['rating', 'created_at']
     search_fields = [
         'reviewer__email', 'reviewee__email', 
@@ -62,3 +71,13 @@ class ReviewAdmin(admin.ModelAdmin):
         'reviewee__first_name', 'reviewee__last_name'
     ]
     readonly_fields = ['id', 'created_at']
+
+
+@admin.register(MentorDigest)
+class MentorDigestAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['mentor', 'request_count', 'window_start', 'window_end', 'sent_at']
+    list_select_related = ['mentor']
+    fulltext_user_fields = ['mentor']
+    list_filter = ['sent_at', 'window_start']
+    search_fields = ['mentor__email']
+    readonly_fields = ['id', 'requests', 'created_at']
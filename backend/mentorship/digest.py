@@ -0,0 +1,208 @@
+"""
+Mentor digest pipeline
+
+Collects mentorship requests created since the previous run, matches them
+against mentors' skills and interests in batches and writes one
+``MentorDigest`` per matching mentor per window. Mentors are found with an
+array overlap query on the batch's terms, so the work done is proportional to
+the mentors who actually match rather than to every mentor on the platform.
+
+A window is built once: its ``DigestRun`` (unique on ``window_start``) is
+inserted in the same transaction as its digests, so a concurrent or repeated
+run of the same window writes nothing. Delivery then claims the window's
+undelivered digests (``sent_at`` still null) in a short transaction, sends
+them outside it, and clears the claim on whatever the backend did not
+deliver, e.g. mentors without an email address. Re-running a window only
+sends what has not been sent yet.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from accounts.models import User
+from core.search import normalize_term
+from .models import MentorshipRequest, MentorDigest, DigestRun
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BATCH_SIZE = 500
+
+
+def request_terms(mentorship_request):
+    terms = {normalize_term(mentorship_request.field)}
+    terms.update(normalize_term(topic) for topic in mentorship_request.topics.split(',') if topic.strip())
+    return terms
+
+
+class EmailNotificationBackend:
+    """Send digests by email over a single mail connection"""
+
+    def send(self, digests):
+        """Returns the digests that were delivered"""
+        messages = []
+        delivered = []
+        for digest in digests:
+            if not digest.mentor.email:
+                continue
+            delivered.append(digest)
+            lines = [f"- {item['title']} ({item['field']})" for item in digest.requests]
+            messages.append(EmailMessage(
+                subject=f"{digest.request_count} new mentorship request(s) match your skills",
+                body="New requests on StudySync:\n\n" + "\n".join(lines),
+                to=[digest.mentor.email],
+            ))
+        if messages:
+            get_connection().send_messages(messages)
+        return delivered
+
+
+class InMemoryNotificationBackend:
+    """Collects digests in ``outbox`` instead of delivering them"""
+
+    outbox = []
+
+    def send(self, digests):
+        self.outbox.extend(digests)
+        return list(digests)
+
+
+def get_notification_backend():
+    path = getattr(
+        settings, 'MENTOR_DIGEST_NOTIFICATION_BACKEND', 'mentorship.digest.EmailNotificationBackend'
+    )
+    return import_string(path)()
+
+
+def match_mentors(requests):
+    """
+    Return ``{mentor_id: (mentor, [request, ...])}`` for a batch of requests.
+    """
+    requests_by_term = defaultdict(list)
+    for mentorship_request in requests:
+        for term in request_terms(mentorship_request):
+            requests_by_term[term].append(mentorship_request)
+    if not requests_by_term:
+        return {}
+
+    # Skills and interests are stored normalized (User.save), like request terms
+    terms = sorted(requests_by_term)
+    candidates = User.objects.filter(
+        Q(skills__overlap=terms) | Q(interests__overlap=terms),
+        is_active=True,
+    ).only('id', 'email', 'first_name', 'skills', 'interests')
+
+    matches = {}
+    for mentor in candidates:
+        mentor_terms = set(mentor.skills or []) | set(mentor.interests or [])
+        matched = {}
+        for term in mentor_terms & requests_by_term.keys():
+            for mentorship_request in requests_by_term[term]:
+                if mentorship_request.author_id != mentor.id:
+                    matched[mentorship_request.pk] = mentorship_request
+        if matched:
+            matches[mentor.id] = (mentor, list(matched.values()))
+    return matches
+
+
+def build_digests(window_start=None, window_end=None, backend=None):
+    """
+    Run one digest window and deliver it. Returns the ``DigestRun``.
+    """
+    window_end = window_end or timezone.now()
+    if window_start is None:
+        last_run = DigestRun.objects.order_by('-window_end').first()
+        interval = timedelta(minutes=getattr(settings, 'MENTOR_DIGEST_INTERVAL_MINUTES', 60))
+        window_start = last_run.window_end if last_run else window_end - interval
+
+    new_requests = MentorshipRequest.objects.filter(
+        status='active', created_at__gte=window_start, created_at__lt=window_end
+    ).only('id', 'author_id', 'title', 'field', 'topics', 'created_at').order_by('created_at')
+
+    per_mentor = {}
+    scanned = 0
+    batch = []
+    for mentorship_request in new_requests.iterator(chunk_size=REQUEST_BATCH_SIZE):
+        batch.append(mentorship_request)
+        if len(batch) == REQUEST_BATCH_SIZE:
+            scanned += _merge_matches(per_mentor, batch)
+            batch = []
+    if batch:
+        scanned += _merge_matches(per_mentor, batch)
+
+    digests = []
+    for mentor, requests in per_mentor.values():
+        requests.sort(key=lambda r: r.created_at)
+        digests.append(MentorDigest(
+            mentor=mentor,
+            window_start=window_start,
+            window_end=window_end,
+            request_count=len(requests),
+            requests=[
+                {'id': str(r.pk), 'title': r.title, 'field': r.field, 'created_at': r.created_at.isoformat()}
+                for r in requests
+            ],
+        ))
+
+    try:
+        with transaction.atomic():
+            run = DigestRun.objects.create(
+                window_start=window_start,
+                window_end=window_end,
+                requests_scanned=scanned,
+                digests_written=len(digests),
+            )
+            MentorDigest.objects.bulk_create(digests, batch_size=1000, ignore_conflicts=True)
+    except IntegrityError:
+        # Another run already built this window; only deliver what it has not
+        run = DigestRun.objects.get(window_start=window_start)
+        logger.info(f"Mentor digest window {window_start:%Y-%m-%d %H:%M} was already built")
+
+    sent = deliver_digests(window_start, backend or get_notification_backend())
+
+    logger.info(
+        f"Mentor digest {window_start:%Y-%m-%d %H:%M} - {run.window_end:%H:%M}: "
+        f"{run.requests_scanned} requests, {run.digests_written} digests, {sent} delivered"
+    )
+    return run
+
+
+def deliver_digests(window_start, backend):
+    """Send the window's undelivered digests; returns how many were delivered"""
+    with transaction.atomic():
+        digests = list(
+            MentorDigest.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('mentor')
+            .filter(window_start=window_start, sent_at__isnull=True)
+        )
+        # Claimed: a concurrent delivery skips these
+        MentorDigest.objects.filter(pk__in=[d.pk for d in digests]).update(sent_at=timezone.now())
+    if not digests:
+        return 0
+
+    try:
+        delivered = backend.send(digests)
+    except Exception as e:
+        logger.error(f"Mentor digest delivery failed for {len(digests)} digest(s): {e}")
+        delivered = []
+    delivered_ids = {digest.pk for digest in delivered}
+    MentorDigest.objects.filter(
+        pk__in=[d.pk for d in digests if d.pk not in delivered_ids]
+    ).update(sent_at=None)
+    return len(delivered_ids)
+
+
+def _merge_matches(per_mentor, batch):
+    for mentor_id, (mentor, requests) in match_mentors(batch).items():
+        if mentor_id in per_mentor:
+            per_mentor[mentor_id][1].extend(requests)
+        else:
+            per_mentor[mentor_id] = (mentor, requests)
+    return len(batch)
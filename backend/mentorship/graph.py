@@ -0,0 +1,269 @@
+"""
+In-memory mentor/student connection graph
+
+Keeps active ``UserConnection`` rows as sorted integer arrays per user so
+mutual-connection and second-degree queries are answered without self-joins.
+The index is built once per process by a background thread started on first
+use, kept current by the ``UserConnection`` signals in ``mentorship.signals``
+(after commit) and fully rebuilt after ``CONNECTION_GRAPH_MAX_AGE`` seconds to
+pick up writes made by other workers. Requests never wait for a build: they
+keep using the previous graph, and until the first build finishes
+``connection_graph_for`` loads just the connections within a hop or two of the
+users asked about.
+"""
+
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+EMPTY = array('i')
+
+
+def _insert(adjacency, key, value):
+    values = adjacency.get(key)
+    if values is None:
+        adjacency[key] = array('i', [value])
+        return
+    index = bisect_left(values, value)
+    if index == len(values) or values[index] != value:
+        values.insert(index, value)
+
+
+def _remove(adjacency, key, value):
+    values = adjacency.get(key)
+    if values is None:
+        return
+    index = bisect_left(values, value)
+    if index < len(values) and values[index] == value:
+        del values[index]
+        if not values:
+            del adjacency[key]
+
+
+def _intersect(left, right):
+    """Merge-intersect two sorted arrays"""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            result.append(left[i])
+            i += 1
+            j += 1
+        elif left[i] < right[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class ConnectionGraph:
+    """Adjacency index of active mentor -> student connections"""
+
+    def __init__(self):
+        self.students = {}  # mentor id -> sorted student ids
+        self.mentors = {}   # student id -> sorted mentor ids
+        self.edge_count = 0
+        self.built_at = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Build from ``(mentor_id, student_id)`` pairs"""
+        graph = cls()
+        students, mentors = {}, {}
+        for mentor_id, student_id in edges:
+            students.setdefault(mentor_id, []).append(student_id)
+            mentors.setdefault(student_id, []).append(mentor_id)
+        graph.students = {key: array('i', sorted(set(ids))) for key, ids in students.items()}
+        graph.mentors = {key: array('i', sorted(set(ids))) for key, ids in mentors.items()}
+        graph.edge_count = sum(len(ids) for ids in graph.students.values())
+        graph.built_at = time.monotonic()
+        return graph
+
+    @classmethod
+    def from_database(cls):
+        from .models import UserConnection
+
+        edges = UserConnection.objects.filter(
+            connection_status='active'
+        ).values_list('mentor_user_id', 'student_user_id').iterator(chunk_size=10000)
+        return cls.from_edges(edges)
+
+    @classmethod
+    def around(cls, user_ids, depth):
+        """The active connections within ``depth`` hops of ``user_ids``, one query per hop"""
+        from .models import UserConnection
+
+        edges = set()
+        seen = set()
+        frontier = set(user_ids)
+        for _ in range(depth):
+            frontier -= seen
+            if not frontier:
+                break
+            seen |= frontier
+            rows = UserConnection.objects.filter(connection_status='active').filter(
+                Q(mentor_user_id__in=frontier) | Q(student_user_id__in=frontier)
+            ).values_list('mentor_user_id', 'student_user_id')
+            frontier = set()
+            for mentor_id, student_id in rows:
+                edges.add((mentor_id, student_id))
+                frontier.update((mentor_id, student_id))
+        return cls.from_edges(edges)
+
+    def add_edge(self, mentor_id, student_id):
+        with self._lock:
+            before = len(self.students.get(mentor_id, EMPTY))
+            _insert(self.students, mentor_id, student_id)
+            _insert(self.mentors, student_id, mentor_id)
+            self.edge_count += len(self.students.get(mentor_id, EMPTY)) - before
+
+    def remove_edge(self, mentor_id, student_id):
+        with self._lock:
+            before = len(self.students.get(mentor_id, EMPTY))
+            _remove(self.students, mentor_id, student_id)
+            _remove(self.mentors, student_id, mentor_id)
+            self.edge_count -= before - len(self.students.get(mentor_id, EMPTY))
+
+    def students_of(self, user_id):
+        return self.students.get(user_id, EMPTY)
+
+    def mentors_of(self, user_id):
+        return self.mentors.get(user_id, EMPTY)
+
+    def neighbours(self, user_id):
+        """All users connected to ``user_id`` in either direction, sorted"""
+        students = self.students_of(user_id)
+        mentors = self.mentors_of(user_id)
+        if not mentors:
+            return list(students)
+        if not students:
+            return list(mentors)
+        return sorted(set(students).union(mentors))
+
+    def degree(self, user_id):
+        return len(self.students_of(user_id)) + len(self.mentors_of(user_id))
+
+    def mutual_connections(self, user_id, other_id):
+        with self._lock:
+            return _intersect(self.neighbours(user_id), self.neighbours(other_id))
+
+    def students_of_mentors(self, user_id):
+        """Fellow students who share at least one mentor with ``user_id``"""
+        with self._lock:
+            peers = set()
+            for mentor_id in self.mentors_of(user_id):
+                peers.update(self.students_of(mentor_id))
+            peers.discard(user_id)
+            return sorted(peers)
+
+    def suggestions(self, user_id, limit=20):
+        """
+        Second-degree connections ranked by number of mutual connections.
+        Returns ``[(user_id, mutual_count), ...]``.
+        """
+        with self._lock:
+            direct = self.neighbours(user_id)
+            counts = Counter()
+            for neighbour in direct:
+                counts.update(self.neighbours(neighbour))
+            counts.pop(user_id, None)
+            for neighbour in direct:
+                counts.pop(neighbour, None)
+            return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def memory_bytes(self):
+        """Approximate memory held by the adjacency arrays and dict slots"""
+        import sys
+
+        total = sys.getsizeof(self.students) + sys.getsizeof(self.mentors)
+        for adjacency in (self.students, self.mentors):
+            for key, values in adjacency.items():
+                total += sys.getsizeof(key) + sys.getsizeof(values)
+        return total
+
+
+_graph = None
+_graph_lock = threading.Lock()
+_rebuilding = False
+_edits_during_rebuild = []  # applied to the new graph once it is swapped in
+
+
+def _rebuild_in_background():
+    global _graph, _rebuilding
+    try:
+        graph = ConnectionGraph.from_database()
+        with _graph_lock:
+            for mentor_id, student_id, is_active in _edits_during_rebuild:
+                _apply(graph, mentor_id, student_id, is_active)
+            _edits_during_rebuild.clear()
+            _graph = graph
+    except Exception as e:
+        logger.warning(f"Connection graph rebuild failed, keeping the current one: {e}")
+    finally:
+        with _graph_lock:
+            _rebuilding = False
+            _edits_during_rebuild.clear()
+        connection.close()
+
+
+def get_connection_graph():
+    """
+    Return the process-wide graph, or None until its first build has finished.
+    Builds and rebuilds run in one background thread; a stale graph keeps
+    being served meanwhile.
+    """
+    global _rebuilding
+
+    max_age = getattr(settings, 'CONNECTION_GRAPH_MAX_AGE', 300)
+    graph = _graph
+    if graph is not None and time.monotonic() - graph.built_at < max_age:
+        return graph
+
+    with _graph_lock:
+        graph = _graph
+        if not _rebuilding and (graph is None or time.monotonic() - graph.built_at >= max_age):
+            _rebuilding = True
+            threading.Thread(target=_rebuild_in_background, name='connection-graph-rebuild', daemon=True).start()
+    return graph
+
+
+def connection_graph_for(user_ids, depth):
+    """
+    A graph that answers correctly for ``user_ids`` up to ``depth`` hops:
+    the process-wide one, or while that is first being built, the
+    neighbourhood loaded from the database.
+    """
+    return get_connection_graph() or ConnectionGraph.around(user_ids, depth)
+
+
+def reset_connection_graph():
+    global _graph
+    with _graph_lock:
+        _graph = None
+
+
+def _apply(graph, mentor_id, student_id, is_active):
+    if is_active:
+        graph.add_edge(mentor_id, student_id)
+    else:
+        graph.remove_edge(mentor_id, student_id)
+
+
+def record_connection(mentor_id, student_id, is_active):
+    """Apply a committed connection status change to the graph if it has been built"""
+    with _graph_lock:
+        graph = _graph
+        if _rebuilding:
+            _edits_during_rebuild.append((mentor_id, student_id, is_active))
+    if graph is not None:
+        _apply(graph, mentor_id, student_id, is_active)
@@ -0,0 +1,69 @@
+"""
+Measure memory and query latency of the in-memory connection graph.
+
+Builds a synthetic graph without touching the database:
+
+    python manage.py benchmark_connection_graph --edges 1000000
+"""
+
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from mentorship.graph import ConnectionGraph
+
+
+class Command(BaseCommand):
+    help = 'Report memory usage and query latency of ConnectionGraph for a synthetic graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edges', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=200000)
+        parser.add_argument('--mentor-ratio', type=float, default=0.1)
+        parser.add_argument('--samples', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users = options['users']
+        mentor_count = max(1, int(users * options['mentor_ratio']))
+
+        def edges():
+            for _ in range(options['edges']):
+                yield rng.randint(1, mentor_count), rng.randint(mentor_count + 1, users)
+
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        graph = ConnectionGraph.from_edges(edges())
+        build_seconds = time.perf_counter() - started
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(f"Edges: {graph.edge_count:,} across {users:,} users")
+        self.stdout.write(f"Build time: {build_seconds:.2f} s")
+        self.stdout.write(f"Retained memory: {retained / 1024 / 1024:.1f} MiB (peak during build {peak / 1024 / 1024:.1f} MiB)")
+        self.stdout.write(f"Estimated graph size: {graph.memory_bytes() / 1024 / 1024:.1f} MiB "
+                          f"({retained / max(graph.edge_count, 1):.1f} bytes/edge)")
+
+        sample_users = [rng.randint(mentor_count + 1, users) for _ in range(options['samples'])]
+        for label, func in (
+            ('mutual_connections', lambda u: graph.mutual_connections(u, rng.randint(mentor_count + 1, users))),
+            ('students_of_mentors', graph.students_of_mentors),
+            ('suggestions', graph.suggestions),
+        ):
+            timings = []
+            for user_id in sample_users:
+                start = time.perf_counter()
+                func(user_id)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label:>20}: median {statistics.median(timings):.3f} ms, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms"
+            )
@@ -0,0 +1,31 @@
+"""
+Build and deliver mentor digests for requests created since the last run.
+
+Meant to be scheduled (cron, Render/Vercel cron job) every
+MENTOR_DIGEST_INTERVAL_MINUTES:
+
+    python manage.py send_mentor_digests
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from mentorship.digest import build_digests
+
+
+class Command(BaseCommand):
+    help = 'Match new mentorship requests against mentors and send one digest per mentor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='ISO datetime to start the window from (defaults to the last run)')
+        parser.add_argument('--until', help='ISO datetime to end the window at (defaults to now)')
+
+    def handle(self, *args, **options):
+        window_start = parse_datetime(options['since']) if options['since'] else None
+        window_end = parse_datetime(options['until']) if options['until'] else None
+
+        run = build_digests(window_start=window_start, window_end=window_end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {run.requests_scanned} request(s), wrote {run.digests_written} digest(s) "
+            f"for {run.window_start:%Y-%m-%d %H:%M} - {run.window_end:%Y-%m-%d %H:%M}"
+        ))
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mentorship', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField()),
+                ('window_end', models.DateTimeField(db_index=True)),
+                ('requests_scanned', models.IntegerField(default=0)),
+                ('digests_written', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'mentor_digest_runs',
+                'ordering': ['-window_end'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MentorDigest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('window_start', models.DateTimeField()),
+                ('window_end', models.DateTimeField()),
+                ('request_count', models.IntegerField(default=0)),
+                ('requests', models.JSONField(blank=True, default=list)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentor_digests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'mentor_digests',
+                'ordering': ['-window_start'],
+                'unique_together': {('mentor', 'window_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0002_mentordigest_digestrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentorshiprequest',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'description', 'topics', 'target_role', config='simple'), name='mentorship_requests_search_gin'),
+        ),
+    ]
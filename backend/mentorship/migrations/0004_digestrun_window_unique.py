@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0003_mentorshiprequest_search_gin'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='digestrun',
+            constraint=models.UniqueConstraint(fields=('window_start',), name='mentor_digest_runs_window_unique'),
+        ),
+    ]
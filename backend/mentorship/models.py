@@ -1,7 +1,11 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MinValueValidator, MaxValueValidator
+from core.search import search_vector
 import uuid
 
+MENTORSHIP_REQUEST_SEARCH_FIELDS = ('title', 'description', 'topics', 'target_role')
+
 
 class MentorshipRequest(models.Model):
     """Model for students requesting mentorship"""
@@ -99,6 +103,7 @@ class MentorshipRequest(models.Model):
             models.Index(fields=['experience_level']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            GinIndex(search_vector(*MENTORSHIP_REQUEST_SEARCH_FIELDS), name='mentorship_requests_search_gin'),
         ]
 
     def __str__(self):
@@ -146,3 +151,43 @@ class Review(models.Model):
 
     def __str__(self):
         return f"Review by {self.reviewer.email} for {self.reviewee.email} - {self.rating}/5"
+
+
+class MentorDigest(models.Model):
+    """One batched notification per mentor per digest window"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    mentor = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='mentor_digests')
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    request_count = models.IntegerField(default=0)
+    requests = models.JSONField(default=list, blank=True)  # [{id, title, field, created_at}, ...]
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'mentor_digests'
+        ordering = ['-window_start']
+        unique_together = [['mentor', 'window_start']]
+
+    def __str__(self):
+        return f"Digest for {self.mentor.email}: {self.request_count} request(s)"
+
+
+class DigestRun(models.Model):
+    """Bookkeeping for each digest window that has been processed"""
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField(db_index=True)
+    requests_scanned = models.IntegerField(default=0)
+    digests_written = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'mentor_digest_runs'
+        ordering = ['-window_end']
+        constraints = [
+            # Each window is built by exactly one run
+            models.UniqueConstraint(fields=['window_start'], name='mentor_digest_runs_window_unique'),
+        ]
+
+    def __str__(self):
+        return f"Digest run {self.window_start} - {self.window_end}"
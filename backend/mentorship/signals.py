@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .graph import record_connection
+from .models import UserConnection
+
+
+@receiver(pre_save, sender=UserConnection)
+def remember_previous_edge(sender, instance, **kwargs):
+    instance._previous_edge = None if instance._state.adding else (
+        UserConnection.objects.filter(pk=instance.pk).values_list('mentor_user_id', 'student_user_id').first()
+    )
+
+
+@receiver(post_save, sender=UserConnection)
+def connection_saved(sender, instance, **kwargs):
+    """Keep the in-memory connection graph in step with status changes (once committed)"""
+    mentor_id, student_id = instance.mentor_user_id, instance.student_user_id
+    is_active = instance.connection_status == 'active'
+    previous = getattr(instance, '_previous_edge', None)
+
+    def apply():
+        if previous is not None and previous != (mentor_id, student_id):
+            # The connection moved to other users; its old edge is gone
+            record_connection(*previous, False)
+        record_connection(mentor_id, student_id, is_active)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender=UserConnection)
+def connection_deleted(sender, instance, **kwargs):
+    mentor_id, student_id = instance.mentor_user_id, instance.student_user_id
+    transaction.on_commit(lambda: record_connection(mentor_id, student_id, False))
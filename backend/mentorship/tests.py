@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+
+from .digest import build_digests
+from .models import DigestRun, MentorDigest, MentorshipRequest
+
+
+class RecordingBackend:
+    """Notification backend that delivers everything except mentors in ``undeliverable``"""
+
+    def __init__(self, undeliverable=(), fail=False):
+        self.undeliverable = set(undeliverable)
+        self.fail = fail
+        self.sent = []
+
+    def send(self, digests):
+        if self.fail:
+            raise ConnectionError('mail server unavailable')
+        delivered = [digest for digest in digests if digest.mentor_id not in self.undeliverable]
+        self.sent.extend(delivered)
+        return delivered
+
+
+class DigestRunTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            username='student', email='student@example.com', password='pass', first_name='S', last_name='T',
+        )
+        self.mentor = User.objects.create_user(
+            username='mentor', email='mentor@example.com', password='pass', first_name='M', last_name='T',
+            skills=['Django', 'Web_Development'],
+        )
+        MentorshipRequest.objects.create(
+            author=self.student, title='Help with Django', description='ORM questions', target_role='Backend',
+            field='web_development', topics='django, postgres', experience_level='student', budget='free',
+        )
+        self.window_end = timezone.now() + timedelta(minutes=1)
+        self.window_start = self.window_end - timedelta(hours=1)
+
+    def build(self, backend):
+        return build_digests(self.window_start, self.window_end, backend=backend)
+
+    def test_window_builds_one_digest_per_matching_mentor(self):
+        backend = RecordingBackend()
+        run = self.build(backend)
+
+        self.assertEqual(run.digests_written, 1)
+        self.assertEqual([digest.mentor_id for digest in backend.sent], [self.mentor.pk])
+        self.assertIsNotNone(MentorDigest.objects.get(mentor=self.mentor).sent_at)
+
+    def test_rerunning_a_window_writes_and_sends_nothing_new(self):
+        first = self.build(RecordingBackend())
+        backend = RecordingBackend()
+        second = self.build(backend)
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(DigestRun.objects.count(), 1)
+        self.assertEqual(MentorDigest.objects.count(), 1)
+        self.assertEqual(backend.sent, [])
+
+    def test_undelivered_digests_are_sent_on_the_next_run(self):
+        self.build(RecordingBackend(undeliverable={self.mentor.pk}))
+        self.assertIsNone(MentorDigest.objects.get(mentor=self.mentor).sent_at)
+
+        backend = RecordingBackend()
+        self.build(backend)
+        self.assertEqual(len(backend.sent), 1)
+        self.assertIsNotNone(MentorDigest.objects.get(mentor=self.mentor).sent_at)
+
+    def test_failed_delivery_releases_the_claim(self):
+        self.build(RecordingBackend(fail=True))
+        self.assertIsNone(MentorDigest.objects.get(mentor=self.mentor).sent_at)
+
+    def test_requests_do_not_match_their_own_author(self):
+        User.objects.filter(pk=self.student.pk).update(skills=['django'])
+        self.build(RecordingBackend())
+        self.assertFalse(MentorDigest.objects.filter(mentor=self.student).exists())
@@ -12,6 +12,8 @@ urlpatterns = [
     path('connections/', views.UserConnectionListCreateView.as_view(), name='user-connections'),
     path('connections/<uuid:pk>/', views.UserConnectionDetailView.as_view(), name='user-connection-detail'),
     path('connections/<uuid:connection_id>/accept/', views.accept_connection_request, name='accept-connection'),
+    path('connections/mutual/<int:user_id>/', views.mutual_connections, name='mutual-connections'),
+    path('connections/suggestions/', views.connection_suggestions, name='connection-suggestions'),
     
     # Reviews
     path('reviews/', views.ReviewListCreateView.as_view(), name='reviews'),
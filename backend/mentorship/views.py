@@ -3,8 +3,10 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from core.querysets import union_all
 from .models import MentorshipRequest, UserConnection, Review
-from .serializers import MentorshipRequestSerializer, UserConnectionSerializer, ReviewSerializer
+from .graph import connection_graph_for
+from .serializers import MentorshipRequestSerializer, UserConnectionSerializer, ReviewSerializer, UserBasicSerializer
 from accounts.models import User
 
 
@@ -87,12 +89,16 @@ class UserConnectionListCreateView(generics.ListCreateAPIView):
     """
     serializer_class = UserConnectionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = []  # union_all is not a QuerySet
 
     def get_queryset(self):
         user = self.request.user
-        return UserConnection.objects.filter(
-            Q(mentor_user=user) | Q(student_user=user)
-        ).select_related('mentor_user', 'student_user', 'initiated_by')
+        return union_all(
+            UserConnection.objects.select_related('mentor_user', 'student_user', 'initiated_by'),
+            Q(mentor_user=user),
+            Q(student_user=user),
+            ordering=['-created_at'],
+        )
 
     def perform_create(self, serializer):
         serializer.save(initiated_by=self.request.user)
@@ -106,10 +112,11 @@ class UserConnectionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        # A lookup by pk is index-backed; the OR only filters that one row
         user = self.request.user
-        return UserConnection.objects.filter(
+        return UserConnection.objects.select_related('mentor_user', 'student_user', 'initiated_by').filter(
             Q(mentor_user=user) | Q(student_user=user)
-        ).select_related('mentor_user', 'student_user', 'initiated_by')
+        )
 
 
 class ReviewListCreateView(generics.ListCreateAPIView):
@@ -224,3 +231,50 @@ class MentorshipListView(generics.ListAPIView):
 
     def get_queryset(self):
         return MentorshipRequest.objects.filter(status='active').select_related('author')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def mutual_connections(request, user_id):
+    """
+    List users connected to both the authenticated user and ``user_id``
+    """
+    graph = connection_graph_for([request.user.id, user_id], depth=1)
+    mutual_ids = graph.mutual_connections(request.user.id, user_id)
+    users = User.objects.in_bulk(mutual_ids)
+
+    return Response({
+        'user_id': user_id,
+        'count': len(mutual_ids),
+        'results': UserBasicSerializer([users[i] for i in mutual_ids if i in users], many=True).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def connection_suggestions(request):
+    """
+    Suggest second-degree connections ranked by number of mutual connections
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 100)
+    except ValueError:
+        return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Suggestions need the neighbours' own connections
+    graph = connection_graph_for([request.user.id], depth=2)
+    ranked = graph.suggestions(request.user.id, limit=limit)
+    users = User.objects.filter(is_active=True).in_bulk([user_id for user_id, _ in ranked])
+
+    results = []
+    for user_id, mutual_count in ranked:
+        if user_id in users:
+            data = UserBasicSerializer(users[user_id]).data
+            data['mutual_connections'] = mutual_count
+            results.append(data)
+
+    return Response({
+        'degree': graph.degree(request.user.id),
+        'students_of_my_mentors': len(graph.students_of_mentors(request.user.id)),
+        'results': results,
+    })
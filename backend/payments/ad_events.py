@@ -0,0 +1,212 @@
+"""
+Buffered ad impression and click ingestion
+
+``track_ad_impression`` and ``track_ad_click`` used to look the ad up,
+insert an ``AdImpression`` and read-modify-write the ad's counters on every
+request, losing increments under concurrency. They now validate the ad
+against the in-process ad snapshot and append the event to a per-process
+``AdEventBuffer``; nothing touches the database on the request path.
+
+The buffer is flushed by a background thread every
+``ADS_EVENT_FLUSH_INTERVAL`` seconds, or as soon as it holds
+``ADS_EVENT_FLUSH_SIZE`` events, and once more at exit. A flush writes the
+impressions with one ``bulk_create``, marks clicked impressions, and applies
+the counter deltas per ad with ``F()`` expressions. A crashed worker loses at
+most one interval of events.
+
+The buffer holds at most ``ADS_EVENT_BUFFER_MAX`` events. When it is full,
+the request that finds it full flushes it inline; if it is still full (the
+database is behind or down) the event is refused and the view answers 503
+with ``Retry-After``, so clients back off instead of growing memory.
+
+With ``ADS_EVENT_BUFFERING`` off, every event is written before the request
+returns.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Subquery
+
+logger = logging.getLogger(__name__)
+
+IMPRESSION = 'impression'
+CLICK = 'click'
+
+
+@dataclass
+class AdEvent:
+    kind: str
+    ad_id: str
+    user_id: Optional[int]
+    ip_address: Optional[str] = None
+    user_agent: str = ''
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def write_events(events):
+    """Persist a batch of events; returns the number written"""
+    from accounts.models import User
+    from .models import AdImpression, Advertisement
+
+    # Ads or users deleted since the events were recorded would break the foreign keys
+    ad_ids = set(Advertisement.objects.filter(pk__in={e.ad_id for e in events}).values_list('pk', flat=True))
+    ad_ids = {str(ad_id) for ad_id in ad_ids}
+    user_ids = set(User.objects.filter(pk__in={e.user_id for e in events if e.user_id}).values_list('pk', flat=True))
+    events = [e for e in events if e.ad_id in ad_ids]
+
+    impressions = []
+    latest = {}  # (ad, user) -> newest impression in this batch
+    clicks = Counter()
+    unmatched_clicks = set()
+    for event in events:
+        user_id = event.user_id if event.user_id in user_ids else None
+        if event.kind == IMPRESSION:
+            impression = AdImpression(
+                ad_id=event.ad_id, user_id=user_id, ip_address=event.ip_address,
+                user_agent=event.user_agent,
+            )
+            impressions.append(impression)
+            latest[(event.ad_id, user_id)] = impression
+        else:
+            clicks[event.ad_id] += 1
+            impression = latest.get((event.ad_id, user_id))
+            if impression is not None and not impression.clicked:
+                impression.clicked = True
+            elif user_id is not None:
+                unmatched_clicks.add((event.ad_id, user_id))
+    shown = Counter(impression.ad_id for impression in impressions)
+
+    with transaction.atomic():
+        AdImpression.objects.bulk_create(impressions, batch_size=1000)
+        for ad_id, user_id in unmatched_clicks:
+            # Clicks on impressions written by an earlier flush
+            newest_unclicked = AdImpression.objects.filter(
+                ad_id=ad_id, user_id=user_id, clicked=False,
+            ).order_by('-created_at').values('pk')[:1]
+            AdImpression.objects.filter(pk=Subquery(newest_unclicked)).update(clicked=True)
+        for ad_id in shown.keys() | clicks.keys():
+            Advertisement.objects.filter(pk=ad_id).update(
+                impressions_count=F('impressions_count') + shown[ad_id],
+                clicks_count=F('clicks_count') + clicks[ad_id],
+            )
+    return len(events)
+
+
+class AdEventBuffer:
+    def __init__(self, max_events=None, flush_size=None, flush_interval=None):
+        self.max_events = max_events or _setting('ADS_EVENT_BUFFER_MAX', 10000)
+        self.flush_size = flush_size or _setting('ADS_EVENT_FLUSH_SIZE', 500)
+        self.flush_interval = flush_interval or _setting('ADS_EVENT_FLUSH_INTERVAL', 5)
+        self.events = deque()
+        self.flushed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._retry_at = 0.0  # no inline flushes before this after a failed one
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, event):
+        """Queue an event; False if the buffer is full and could not be drained"""
+        if len(self.events) >= self.max_events and time.monotonic() >= self._retry_at:
+            self.flush()
+        with self._lock:
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return False
+            self.events.append(event)
+            size = len(self.events)
+        self._ensure_flusher()
+        if size >= self.flush_size:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """Write out everything buffered so far; returns the number of events written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self.events)
+                self.events.clear()
+            if not batch:
+                return 0
+            try:
+                written = write_events(batch)
+            except Exception as e:
+                self._requeue(batch, e)
+                return 0
+            self.flushed += written
+            return written
+
+    def _requeue(self, batch, error):
+        with self._lock:
+            room = max(0, self.max_events - len(self.events))
+            kept = batch[-room:] if room else []
+            self.events.extendleft(reversed(kept))
+            self.dropped += len(batch) - len(kept)
+            self._retry_at = time.monotonic() + self.flush_interval
+        logger.warning(
+            f"Ad event flush failed, {len(kept)} event(s) kept for retry, "
+            f"{len(batch) - len(kept)} dropped: {error}"
+        )
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ad-event-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+
+def get_event_buffer():
+    """The process-wide buffer, created on first use"""
+    global _buffer, _buffer_pid
+    with _buffer_lock:
+        if _buffer_pid != os.getpid():
+            # The parent's flusher thread does not survive a fork
+            _buffer = AdEventBuffer()
+            _buffer_pid = os.getpid()
+        return _buffer
+
+
+def record_ad_event(event):
+    if not _setting('ADS_EVENT_BUFFERING', True):
+        write_events([event])
+        return True
+    return get_event_buffer().record(event)
+
+
+@atexit.register
+def _flush_at_exit():
+    buffer = _buffer
+    if buffer is not None and _buffer_pid == os.getpid() and len(buffer):
+        buffer.flush()
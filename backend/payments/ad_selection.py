@@ -0,0 +1,117 @@
+"""
+Ad selection for free users
+
+Active ads are held in a per-process ``AdSnapshot`` of serialized ads, so
+picking the ads for a page costs no database queries (the old
+``ORDER BY priority DESC, random()`` sorted every active ad on each page
+view). The snapshot is built on first use, dropped by the ``Advertisement``
+signals in ``payments.signals`` and rebuilt after ``ADS_SNAPSHOT_MAX_AGE``
+seconds to pick up changes made through other workers. Start and end dates
+are checked at selection time, so scheduled ads go live without a rebuild.
+
+``select_ads`` samples ads without replacement, weighted by priority
+(Efraimidis-Spirakis: the ads with the largest ``random() ** (1 / priority)``
+win). An ad is shown to a user at most ``ADS_FREQUENCY_CAP`` times per
+``ADS_FREQUENCY_WINDOW`` seconds; the counts live in the cache.
+"""
+
+import heapq
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+ADS_PER_PAGE = 3
+
+
+class AdSnapshot:
+    """Active ads as ``(ad_id, priority, start_date, end_date, data)`` tuples"""
+
+    def __init__(self, ads):
+        self.ads = ads
+        self.by_id = {ad[0]: ad for ad in ads}
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_database(cls):
+        from .models import Advertisement
+        from .serializers import AdvertisementSerializer
+
+        queryset = Advertisement.objects.filter(
+            is_active=True,
+            start_date__isnull=False,
+            end_date__gte=timezone.now(),
+        )
+        return cls([
+            (str(ad.id), max(1, ad.priority), ad.start_date, ad.end_date, dict(AdvertisementSerializer(ad).data))
+            for ad in queryset
+        ])
+
+    def live(self, now):
+        return [ad for ad in self.ads if ad[2] <= now <= ad[3]]
+
+    def get_live(self, ad_id, now):
+        """The serialized ad if it is currently being shown, else None"""
+        ad = self.by_id.get(str(ad_id))
+        return ad[4] if ad is not None and ad[2] <= now <= ad[3] else None
+
+
+def weighted_sample(ads, k, rng=random):
+    """Up to ``k`` ads drawn without replacement with probability proportional to priority"""
+    return [ad for _, ad in heapq.nlargest(k, ((rng.random() ** (1.0 / ad[1]), ad) for ad in ads),
+                                          key=lambda item: item[0])]
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_ad_snapshot():
+    """Return the process-wide snapshot, building or refreshing it when stale"""
+    global _snapshot
+
+    max_age = getattr(settings, 'ADS_SNAPSHOT_MAX_AGE', 60)
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.built_at < max_age:
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is None or time.monotonic() - snapshot.built_at >= max_age:
+            _snapshot = snapshot = AdSnapshot.from_database()
+    return snapshot
+
+
+def reset_ad_snapshot():
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def _frequency_key(user_id):
+    return f'ads:frequency:{user_id}'
+
+
+def select_ads(user_id, k=ADS_PER_PAGE, now=None):
+    """Serialized ads to show ``user_id`` on one page, counted against the frequency cap"""
+    now = now or timezone.now()
+    ads = get_ad_snapshot().live(now)
+    cap = getattr(settings, 'ADS_FREQUENCY_CAP', 0)
+    if not ads or cap <= 0:
+        return [ad[4] for ad in weighted_sample(ads, k)]
+
+    key = _frequency_key(user_id)
+    window = cache.get(key)
+    if window is None or window['until'] <= time.time():
+        # Fixed window starting at the user's first capped page view
+        window = {'until': time.time() + getattr(settings, 'ADS_FREQUENCY_WINDOW', 3600), 'counts': {}}
+    counts = window['counts']
+    chosen = weighted_sample([ad for ad in ads if counts.get(ad[0], 0) < cap], k)
+    if chosen:
+        for ad in chosen:
+            counts[ad[0]] = counts.get(ad[0], 0) + 1
+        cache.set(key, window, max(1, int(window['until'] - time.time())))
+    return [ad[4] for ad in chosen]
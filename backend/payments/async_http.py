@@ -0,0 +1,154 @@
+"""
+Non-blocking HTTP clients for payment gateways
+
+The async counterpart of ``payments.http``: one ``httpx.AsyncClient`` per
+gateway per event loop, with the same timeouts, retry policy and latency
+recording. While a call waits on the gateway the event loop keeps serving
+other requests, so a single ASGI worker can have many slow gateway calls in
+flight.
+
+Sync code (WSGI views, management commands) uses the same async services
+through ``run_sync``, which runs coroutines on one long-lived background loop
+per process. Its clients, and their kept-alive connections, therefore outlive
+the call, which would not be the case with a fresh loop per call.
+
+Async views await gateway calls through ``on_gateway_loop``. Under WSGI
+Django runs each async view on a new event loop; a client cached on that loop
+would never be reused and its open connections would leak with it, so the
+call is handed to the background loop instead. ``studysync.asgi`` calls
+``enable_request_loop_clients`` because an ASGI server's loop lives as long as
+the worker, and there the call is awaited directly.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+
+from .http import IDEMPOTENT_METHODS, RETRY_STATUSES, latency
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGatewayHTTPClient:
+    """``GatewayHTTPClient`` for asyncio"""
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self.max_retries = getattr(settings, 'PAYMENT_HTTP_MAX_RETRIES', 2)
+        self.backoff = getattr(settings, 'PAYMENT_HTTP_RETRY_BACKOFF', 0.25)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                getattr(settings, 'PAYMENT_HTTP_READ_TIMEOUT', 20),
+                connect=getattr(settings, 'PAYMENT_HTTP_CONNECT_TIMEOUT', 3.05),
+            ),
+            limits=httpx.Limits(
+                max_connections=getattr(settings, 'PAYMENT_ASYNC_HTTP_MAX_CONNECTIONS', 100),
+                max_keepalive_connections=getattr(settings, 'PAYMENT_HTTP_POOL_SIZE', 10),
+            ),
+        )
+
+    async def request(self, method, url, operation='request', idempotent=None, **kwargs):
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (self.max_retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                elapsed = time.perf_counter() - start
+                latency.record(self.gateway, operation, elapsed, ok=False)
+                logger.warning(
+                    f"{self.gateway} {operation} failed after {elapsed * 1000:.0f} ms "
+                    f"(attempt {attempt + 1}/{attempts}): {e!r}"
+                )
+                if last_attempt:
+                    raise
+                await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+                continue
+
+            elapsed = time.perf_counter() - start
+            ok = response.status_code < 500
+            latency.record(self.gateway, operation, elapsed, ok=ok)
+            log = logger.debug if ok else logger.warning
+            log(f"{self.gateway} {operation} {response.status_code} in {elapsed * 1000:.0f} ms")
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+                continue
+            return response
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# Connections belong to the loop that opened them, so clients are per loop
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client(gateway):
+    """The client for ``gateway`` on the running event loop"""
+    loop = asyncio.get_running_loop()
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(gateway)
+    if client is None:
+        client = clients[gateway] = AsyncGatewayHTTPClient(gateway)
+    return client
+
+
+_request_loop_clients = False
+
+
+def enable_request_loop_clients():
+    """Let async views use clients on their own loop (long-lived ASGI server loops only)"""
+    global _request_loop_clients
+    _request_loop_clients = True
+
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name='payments-async', daemon=True).start()
+        return _loop
+
+
+def run_sync(coroutine):
+    """Run ``coroutine`` on the background loop and wait for its result"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coroutine.close()
+        raise RuntimeError("run_sync() called from a running event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
+
+
+async def on_gateway_loop(coroutine):
+    """Await ``coroutine`` on a loop whose HTTP clients outlive the request"""
+    if _request_loop_clients:
+        return await coroutine
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, _background_loop()))
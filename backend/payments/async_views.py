@@ -0,0 +1,84 @@
+"""
+Async payment views
+
+Served by the ASGI application (``studysync.asgi``), these await the gateway
+through the non-blocking services in ``payments.services`` instead of holding
+a worker thread for the length of the call. DRF views are sync-only, so the
+JWT is checked with ``CachedJWTAuthentication`` via ``sync_to_async`` and the
+responses are plain ``JsonResponse``s in the API's usual shape.
+
+Gateway calls go through ``payments.async_http.on_gateway_loop``, so pooled
+connections are reused whether the view runs under ASGI or, as deployed
+today, under WSGI with a new event loop per request.
+"""
+
+import functools
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .async_http import on_gateway_loop
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+# payment_method -> (service class, status method); imported on first use
+GATEWAY_STATUS_METHODS = {
+    'bkash': ('payments.services.bkash_service.BkashService', 'query_payment'),
+    'nagad': ('payments.services.nagad_service.NagadService', 'verify_payment'),
+    'rocket': ('payments.services.rocket_service.RocketService', 'check_status'),
+}
+
+
+async def authenticate(request):
+    try:
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+def jwt_required(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@jwt_required
+async def gateway_payment_status(request, payment_id):
+    """Ask the payment's gateway for its current status"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        payment = await Payment.objects.aget(pk=payment_id, user=request.user)
+    except Payment.DoesNotExist:
+        return JsonResponse({'error': 'Payment not found'}, status=404)
+
+    entry = GATEWAY_STATUS_METHODS.get(payment.payment_method)
+    if entry is None or not payment.transaction_id:
+        return JsonResponse({'error': 'This payment has no gateway transaction to check'}, status=400)
+
+    service_path, method = entry
+    try:
+        service = import_string(service_path)()
+        result = await on_gateway_loop(getattr(service, method)(payment.transaction_id))
+    except Exception as e:
+        logger.error(f"Gateway status check failed for payment {payment.id}: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=502)
+
+    return JsonResponse({
+        'payment_id': str(payment.id),
+        'payment_status': payment.payment_status,
+        'gateway': result,
+    }, status=200 if result.get('success') else 502)
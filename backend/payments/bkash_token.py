@@ -0,0 +1,136 @@
+"""
+Shared bKash access-token cache
+
+bKash grant tokens are valid for an hour, but the gateway code used to ask
+for a new one before every call. ``BkashTokenCache`` keeps the grant in the
+Django cache named by ``BKASH_TOKEN_CACHE_ALIAS`` (the ``shared`` alias: Redis
+or the database cache) until ``BKASH_TOKEN_REFRESH_MARGIN`` seconds before it
+expires, so one grant serves every worker.
+
+Refreshes are single-flight. Threads in a worker queue on a local lock, and
+workers race for a short-lived lock key added with ``cache.add``; the winner
+calls the grant endpoint while the rest poll the cache for its result. A
+worker that gives up waiting (the refresher died or hung) fetches a token
+itself. Callers that get a 401 pass the rejected token to ``invalidate`` so
+the next call refreshes. ``aget``/``ainvalidate`` do the same for async
+callers without blocking the event loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05
+
+
+class BkashTokenCache:
+    def __init__(self, namespace, alias=None):
+        self.cache = caches[alias or getattr(settings, 'BKASH_TOKEN_CACHE_ALIAS', 'shared')]
+        self.key = f'bkash:token:{namespace}'
+        self.lock_key = f'bkash:token-lock:{namespace}'
+        self.margin = getattr(settings, 'BKASH_TOKEN_REFRESH_MARGIN', 300)
+        self.lock_timeout = getattr(settings, 'BKASH_TOKEN_LOCK_TIMEOUT', 30)
+        self._local_lock = threading.Lock()
+        self._async_locks = weakref.WeakKeyDictionary()
+
+    def get(self, fetch):
+        """
+        The cached token, or a fresh one from ``fetch()``, which must return
+        ``(token, expires_in_seconds)``.
+        """
+        token = self.cache.get(self.key)
+        if token:
+            return token
+        with self._local_lock:
+            token = self.cache.get(self.key)
+            if token:
+                return token
+            return self._refresh(fetch)
+
+    def _store(self, fetch):
+        token, expires_in = fetch()
+        self.cache.set(self.key, token, max(1, int(expires_in) - self.margin))
+        return token
+
+    def _refresh(self, fetch):
+        deadline = time.monotonic() + self.lock_timeout
+        owner = uuid.uuid4().hex
+        while time.monotonic() < deadline:
+            if self.cache.add(self.lock_key, owner, self.lock_timeout):
+                try:
+                    return self._store(fetch)
+                finally:
+                    if self.cache.get(self.lock_key) == owner:
+                        self.cache.delete(self.lock_key)
+            time.sleep(POLL_INTERVAL)
+            token = self.cache.get(self.key)
+            if token:
+                return token
+        logger.warning("Timed out waiting for another worker to refresh the bKash token")
+        return self._store(fetch)
+
+    def invalidate(self, token):
+        """Forget ``token`` after the gateway rejected it (unless it was already replaced)"""
+        if self.cache.get(self.key) == token:
+            self.cache.delete(self.key)
+
+    async def aget(self, fetch):
+        """``get`` for coroutines; ``fetch`` is awaited"""
+        token = await self.cache.aget(self.key)
+        if token:
+            return token
+        lock = self._async_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+        async with lock:
+            token = await self.cache.aget(self.key)
+            if token:
+                return token
+            return await self._arefresh(fetch)
+
+    async def _astore(self, fetch):
+        token, expires_in = await fetch()
+        await self.cache.aset(self.key, token, max(1, int(expires_in) - self.margin))
+        return token
+
+    async def _arefresh(self, fetch):
+        deadline = time.monotonic() + self.lock_timeout
+        owner = uuid.uuid4().hex
+        while time.monotonic() < deadline:
+            if await self.cache.aadd(self.lock_key, owner, self.lock_timeout):
+                try:
+                    return await self._astore(fetch)
+                finally:
+                    if await self.cache.aget(self.lock_key) == owner:
+                        await self.cache.adelete(self.lock_key)
+            await asyncio.sleep(POLL_INTERVAL)
+            token = await self.cache.aget(self.key)
+            if token:
+                return token
+        logger.warning("Timed out waiting for another worker to refresh the bKash token")
+        return await self._astore(fetch)
+
+    async def ainvalidate(self, token):
+        if await self.cache.aget(self.key) == token:
+            await self.cache.adelete(self.key)
+
+
+_token_caches = {}
+_token_caches_lock = threading.Lock()
+
+
+def get_token_cache(grant_url, app_key):
+    """The token cache for one set of bKash credentials and grant endpoint"""
+    namespace = hashlib.sha256(f'{grant_url}|{app_key}'.encode('utf-8')).hexdigest()[:16]
+    with _token_caches_lock:
+        token_cache = _token_caches.get(namespace)
+        if token_cache is None:
+            token_cache = _token_caches[namespace] = BkashTokenCache(namespace)
+        return token_cache
@@ -0,0 +1,37 @@
+"""
+Payment gateway callback endpoint (see ``payments.callbacks``)
+
+A plain Django view rather than a DRF one: gateways authenticate with a
+signature instead of a user token, and the raw body is needed to check it.
+"""
+
+import logging
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .callbacks import CALLBACK_PARSERS, check_signature, ingest_callback, parse_payload
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def gateway_callback(request, gateway):
+    if gateway not in CALLBACK_PARSERS:
+        return JsonResponse({'error': 'Unknown gateway'}, status=404)
+
+    raw_body = request.body
+    signature_valid = check_signature(gateway, raw_body, request.headers.get('X-Signature'))
+    if signature_valid is False:
+        logger.warning(f"Rejected {gateway} callback with a bad signature from {request.META.get('REMOTE_ADDR')}")
+        return JsonResponse({'error': 'Invalid signature'}, status=403)
+
+    try:
+        payload = parse_payload(raw_body, request.content_type, request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Malformed callback body'}, status=400)
+
+    result = ingest_callback(gateway, payload, signature_valid)
+    return JsonResponse({'received': True, 'result': result})
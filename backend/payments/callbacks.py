@@ -0,0 +1,218 @@
+"""
+Gateway callback ingestion
+
+bKash, Nagad and AamarPay report payment outcomes to
+``/api/payments/callbacks/<gateway>/``. Handling a callback is cheap:
+
+* the body is checked against the gateway's HMAC-SHA256 secret
+  (``PAYMENT_WEBHOOK_SECRETS``, hex digest in ``X-Signature``) when one is
+  configured; bad signatures are rejected;
+* the callback is stored under a hash of its content, so a retried or
+  duplicated delivery is recognised with one unique-index lookup and
+  acknowledged without further work;
+* the payment is found by ``(payment_method, transaction_id)`` through an
+  index, and a signed result whose amount matches is applied at once with
+  ``apply_gateway_result``, which changes a payment at most once.
+
+Nothing here calls the gateway, and subscription activation is deferred (see
+``payments.processing``). Unsigned callbacks, and signed ones that don't
+match, are kept as hints: ``process_pending_callbacks`` (run by
+``manage.py process_payment_callbacks``) confirms them with the gateway's
+status API before applying anything. It claims a callback in a short
+transaction and calls the gateway outside it, so no row lock or transaction
+is held for the length of an HTTP call.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils import timezone
+
+from .models import Payment, PaymentCallback
+from .payment_gateways import PaymentGatewayFactory
+from .processing import apply_gateway_result, apply_verification, normalize_status
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CallbackData:
+    transaction_id: str
+    reported_status: str
+    amount: Optional[Decimal] = None
+
+
+def _amount(value):
+    try:
+        return Decimal(str(value)) if value not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+def parse_bkash(payload):
+    return CallbackData(
+        transaction_id=payload.get('paymentID') or payload.get('paymentId') or '',
+        reported_status=payload.get('transactionStatus') or payload.get('status') or '',
+        amount=_amount(payload.get('amount')),
+    )
+
+
+def parse_nagad(payload):
+    # Our Nagad transaction id is the order id we sent at initialization
+    return CallbackData(
+        transaction_id=payload.get('order_id') or payload.get('orderId') or '',
+        reported_status=payload.get('status') or '',
+        amount=_amount(payload.get('amount')),
+    )
+
+
+def parse_aamarpay(payload):
+    return CallbackData(
+        transaction_id=payload.get('mer_txnid') or payload.get('tran_id') or '',
+        reported_status=payload.get('pay_status') or '',
+        amount=_amount(payload.get('amount')),
+    )
+
+
+CALLBACK_PARSERS = {
+    'bkash': parse_bkash,
+    'nagad': parse_nagad,
+    'aamarpay': parse_aamarpay,
+}
+
+
+def parse_payload(raw_body, content_type, query_params):
+    """Callback fields from a JSON or form body, plus any query string (redirect-style callbacks)"""
+    payload = dict(query_params.items())
+    if raw_body:
+        if 'json' in (content_type or ''):
+            body = json.loads(raw_body)
+            if not isinstance(body, dict):
+                raise ValueError('Callback body must be a JSON object')
+            payload.update(body)
+        else:
+            payload.update(QueryDict(raw_body).dict())
+    return payload
+
+
+def check_signature(gateway, raw_body, signature):
+    """True/False for a configured secret, None when the gateway has no secret"""
+    secret = getattr(settings, 'PAYMENT_WEBHOOK_SECRETS', {}).get(gateway)
+    if not secret:
+        return None
+    expected = hmac.new(secret.encode('utf-8'), raw_body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, (signature or '').strip().lower())
+
+
+def event_key(gateway, payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{gateway}\n{canonical}'.encode('utf-8')).hexdigest()
+
+
+def ingest_callback(gateway, payload, signature_valid):
+    """
+    Record a callback and apply it if it can be trusted. Returns one of
+    'duplicate', 'applied', 'already_applied', 'unknown_payment', 'queued'.
+    """
+    data = CALLBACK_PARSERS[gateway](payload)
+    status = normalize_status(data.reported_status)
+
+    with transaction.atomic():
+        callback, created = PaymentCallback.objects.get_or_create(
+            event_key=event_key(gateway, payload),
+            defaults={
+                'gateway': gateway,
+                'transaction_id': data.transaction_id[:255],
+                'reported_status': data.reported_status[:20],
+                'payload': payload,
+                'signature_valid': bool(signature_valid),
+            },
+        )
+        if not created:
+            return 'duplicate'
+
+        payment = (
+            Payment.objects.filter(payment_method=gateway, transaction_id=data.transaction_id)
+            .values('id', 'amount')
+            .first()
+        ) if data.transaction_id else None
+
+        if payment is None:
+            result = 'unknown_payment'
+        elif signature_valid and status and (data.amount is None or data.amount == payment['amount']):
+            applied = apply_gateway_result(
+                payment['id'], status, {'callback': payload},
+                failure_reason=f'{gateway} reported {data.reported_status}',
+            )
+            result = 'applied' if applied else 'already_applied'
+        else:
+            # Needs confirming with the gateway before we act on it
+            PaymentCallback.objects.filter(pk=callback.pk).update(payment_id=payment['id'])
+            return 'queued'
+
+        PaymentCallback.objects.filter(pk=callback.pk).update(
+            payment_id=payment['id'] if payment else None, processed_at=timezone.now(), result=result,
+        )
+    return result
+
+
+def _confirm_with_gateway(callback):
+    payment = Payment.objects.filter(pk=callback.payment_id).first() if callback.payment_id else None
+    if payment is None:
+        return 'unknown_payment'
+    if payment.payment_status != 'pending':
+        return 'already_applied'
+
+    verification = PaymentGatewayFactory.get_gateway(callback.gateway).verify_payment(payment.transaction_id)
+    return apply_verification(payment, callback.gateway, verification)
+
+
+def _claim_next_callback(exclude):
+    """Mark the oldest unclaimed queued callback as ours and commit, so no lock is held during the gateway call"""
+    claim_timeout = timedelta(seconds=getattr(settings, 'PAYMENT_CALLBACK_CLAIM_TIMEOUT', 300))
+    with transaction.atomic():
+        callback = (
+            PaymentCallback.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            # A claim older than the timeout belongs to a worker that died
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=timezone.now() - claim_timeout))
+            .exclude(pk__in=exclude)
+            .order_by('created_at')
+            .first()
+        )
+        if callback is not None:
+            callback.claimed_at = timezone.now()
+            callback.save(update_fields=['claimed_at'])
+    return callback
+
+
+def process_pending_callbacks(limit=None):
+    """Confirm queued callbacks with their gateway and apply the results"""
+    processed = 0
+    failed = []
+    while limit is None or processed < limit:
+        callback = _claim_next_callback(exclude=failed)
+        if callback is None:
+            break
+        try:
+            # apply_verification takes its own row lock on the payment
+            result = _confirm_with_gateway(callback)
+        except Exception as e:
+            logger.warning(f"Could not confirm {callback.gateway} callback {callback.pk}: {e}")
+            failed.append(callback.pk)
+            # Release the claim so the next run retries it
+            PaymentCallback.objects.filter(pk=callback.pk).update(claimed_at=None)
+            continue
+        PaymentCallback.objects.filter(pk=callback.pk).update(processed_at=timezone.now(), result=result)
+        processed += 1
+    return processed
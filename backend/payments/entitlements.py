@@ -0,0 +1,172 @@
+"""
+Subscription entitlements
+
+What a user may do (ads, mentorship, monthly post quota) is derived from
+their active ``UserSubscription`` and its ``SubscriptionPlan``, falling back
+to the free plan. ``get_entitlements`` computes it at most once per request
+and otherwise serves it from the cache, so gating checks cost nothing after
+the first.
+
+Entries live in the ``shared`` cache, so they are dropped for every worker
+by ``payments.signals`` when the user's subscription or posts change, and all entries are retired at once when any
+plan changes (the key carries a plan version). An entry never outlives the
+current month or the subscription's expiry.
+"""
+
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import SubscriptionPlan, UserSubscription
+
+UNLIMITED = -1
+PLAN_VERSION_KEY = 'entitlements:plan-version'
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    subscription_type: str
+    plan_name: Optional[str]
+    is_premium: bool
+    premium_expires_at: Optional[datetime]
+    has_ads: bool
+    can_use_mentorship: bool
+    post_limit: int  # UNLIMITED (-1) for no limit
+    current_month_posts: int
+
+    @property
+    def can_create_post(self):
+        return self.post_limit == UNLIMITED or self.current_month_posts < self.post_limit
+
+    @property
+    def posts_remaining(self):
+        if self.post_limit == UNLIMITED:
+            return None
+        return max(0, self.post_limit - self.current_month_posts)
+
+
+def month_start(now=None):
+    now = timezone.localtime(now or timezone.now())
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month_start(now=None):
+    start = month_start(now)
+    days = calendar.monthrange(start.year, start.month)[1]
+    return start + timedelta(days=days)
+
+
+def _cache():
+    return caches['shared']
+
+
+def _plan_version():
+    return _cache().get_or_set(PLAN_VERSION_KEY, 1, None)
+
+
+def entitlements_cache_key(user_id):
+    return f'entitlements:{_plan_version()}:{user_id}'
+
+
+def invalidate_entitlements(user_id):
+    _cache().delete(entitlements_cache_key(user_id))
+
+
+def invalidate_all_entitlements():
+    try:
+        _cache().incr(PLAN_VERSION_KEY)
+    except ValueError:
+        _cache().set(PLAN_VERSION_KEY, 2, None)
+
+
+def count_month_posts(user_id, now=None):
+    from study_sessions.quotas import month_post_count
+
+    return month_post_count(user_id, now)
+
+
+def _limit(value):
+    return UNLIMITED if value is None or value < 0 else value
+
+
+def compute_entitlements(user, now=None):
+    now = now or timezone.now()
+    subscription = (
+        UserSubscription.objects.filter(user_id=user.pk, status='active', expires_at__gt=now)
+        .select_related('plan')
+        .order_by('-expires_at')
+        .first()
+    )
+    posts = count_month_posts(user.pk, now)
+    premium_flag = bool(user.is_premium and (user.premium_expires_at is None or user.premium_expires_at > now))
+
+    if subscription is not None:
+        plan = subscription.plan
+        return Entitlements(
+            subscription_type='premium' if plan.price > 0 else 'free',
+            plan_name=plan.name,
+            is_premium=premium_flag or plan.price > 0,
+            premium_expires_at=subscription.expires_at,
+            has_ads=plan.has_ads,
+            can_use_mentorship=plan.can_use_mentorship,
+            post_limit=_limit(plan.max_posts_per_month),
+            current_month_posts=posts,
+        )
+
+    if premium_flag:
+        # Premium granted directly on the user (e.g. by an admin) without a plan
+        return Entitlements(
+            subscription_type='premium',
+            plan_name=None,
+            is_premium=True,
+            premium_expires_at=user.premium_expires_at,
+            has_ads=False,
+            can_use_mentorship=True,
+            post_limit=UNLIMITED,
+            current_month_posts=posts,
+        )
+
+    free_plan = SubscriptionPlan.objects.filter(is_active=True, price=0).order_by('created_at').first()
+    return Entitlements(
+        subscription_type='free',
+        plan_name=free_plan.name if free_plan else None,
+        is_premium=False,
+        premium_expires_at=None,
+        has_ads=free_plan.has_ads if free_plan else True,
+        can_use_mentorship=free_plan.can_use_mentorship if free_plan else False,
+        post_limit=_limit(
+            free_plan.max_posts_per_month if free_plan and free_plan.max_posts_per_month is not None
+            else getattr(settings, 'FREE_POST_LIMIT', 5)
+        ),
+        current_month_posts=posts,
+    )
+
+
+def _timeout(entitlements, now):
+    timeout = getattr(settings, 'ENTITLEMENTS_CACHE_TTL', 300)
+    deadlines = [next_month_start(now)]
+    if entitlements.premium_expires_at:
+        deadlines.append(entitlements.premium_expires_at)
+    seconds_left = min((deadline - now).total_seconds() for deadline in deadlines)
+    return max(1, min(timeout, int(seconds_left)))
+
+
+def get_entitlements(user):
+    """Entitlements for ``user``: memoized on the instance, then cached per user"""
+    entitlements = getattr(user, '_entitlements', None)
+    if entitlements is not None:
+        return entitlements
+
+    key = entitlements_cache_key(user.pk)
+    entitlements = _cache().get(key)
+    if entitlements is None:
+        now = timezone.now()
+        entitlements = compute_entitlements(user, now)
+        _cache().set(key, entitlements, _timeout(entitlements, now))
+    user._entitlements = entitlements
+    return entitlements
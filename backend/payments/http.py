@@ -0,0 +1,175 @@
+"""
+Pooled HTTP clients for payment gateways
+
+Each gateway gets one ``requests.Session`` per process (``get_http_client``)
+whose connection pool keeps TLS connections to the gateway alive between
+calls, so only the first payment after start-up (or after the gateway closes
+an idle connection) pays for the TCP and TLS handshakes.
+
+Every call has separate connect and read timeouts. Calls marked idempotent
+(status queries, token grants, GETs) are retried a bounded number of times on
+connection errors and 502/503/504, sleeping with exponential backoff and full
+jitter between attempts; calls that move money are never retried. Per-call
+latency is logged and summarised by ``latency_stats``.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+LATENCY_SAMPLES = 500
+
+
+class LatencyRecorder:
+    """Recent call latencies per ``(gateway, operation)``"""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self._samples = defaultdict(lambda: deque(maxlen=samples))
+        self._errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, gateway, operation, seconds, ok):
+        with self._lock:
+            self._samples[(gateway, operation)].append(seconds)
+            if not ok:
+                self._errors[(gateway, operation)] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = {key: sorted(values) for key, values in self._samples.items()}
+            errors = dict(self._errors)
+        result = {}
+        for (gateway, operation), values in snapshot.items():
+            if not values:
+                continue
+            result[f'{gateway}.{operation}'] = {
+                'calls': len(values),
+                'errors': errors.get((gateway, operation), 0),
+                'p50_ms': round(values[len(values) // 2] * 1000, 1),
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+                'max_ms': round(values[-1] * 1000, 1),
+            }
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._errors.clear()
+
+
+latency = LatencyRecorder()
+
+
+def latency_stats():
+    return latency.stats()
+
+
+class GatewayHTTPClient:
+    """A keep-alive session for one gateway with timeouts, retries and timing"""
+
+    def __init__(self, gateway, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff=None, pool_size=None):
+        self.gateway = gateway
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else getattr(settings, 'PAYMENT_HTTP_CONNECT_TIMEOUT', 3.05),
+            read_timeout if read_timeout is not None else getattr(settings, 'PAYMENT_HTTP_READ_TIMEOUT', 20),
+        )
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'PAYMENT_HTTP_MAX_RETRIES', 2)
+        self.backoff = backoff if backoff is not None else getattr(settings, 'PAYMENT_HTTP_RETRY_BACKOFF', 0.25)
+        pool_size = pool_size or getattr(settings, 'PAYMENT_HTTP_POOL_SIZE', 10)
+
+        self.session = requests.Session()
+        # Retries are done here, where we know whether the call is idempotent
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter: spreads retries from many workers across the window
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def request(self, method, url, operation='request', idempotent=None, **kwargs):
+        """
+        ``session.request`` with the client's timeouts. ``idempotent``
+        defaults to True for GET/HEAD/OPTIONS; pass it explicitly for POST
+        endpoints that only read (status queries) or grant tokens.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', self.timeout)
+        attempts = 1 + (self.max_retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed = time.perf_counter() - start
+                latency.record(self.gateway, operation, elapsed, ok=False)
+                logger.warning(
+                    f"{self.gateway} {operation} failed after {elapsed * 1000:.0f} ms "
+                    f"(attempt {attempt + 1}/{attempts}): {e}"
+                )
+                if last_attempt:
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+
+            elapsed = time.perf_counter() - start
+            ok = response.status_code < 500
+            latency.record(self.gateway, operation, elapsed, ok=ok)
+            log = logger.debug if ok else logger.warning
+            log(f"{self.gateway} {operation} {response.status_code} in {elapsed * 1000:.0f} ms")
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                response.close()
+                self._sleep_before_retry(attempt)
+                continue
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def get_http_client(gateway):
+    """The process-wide client for ``gateway``, created on first use"""
+    global _clients_pid
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            # Pooled sockets must not be shared with a forked parent
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(gateway)
+        if client is None:
+            client = _clients[gateway] = GatewayHTTPClient(gateway)
+        return client
+
+
+def close_http_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
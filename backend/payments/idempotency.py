@@ -0,0 +1,133 @@
+"""
+Idempotency keys for payment requests
+
+Mobile clients retry a POST when the response gets lost, and each retry of
+``initiate_payment`` used to create another pending payment and another
+gateway checkout. Views decorated with ``idempotent`` honour an
+``Idempotency-Key`` header (any unique string per logical request, e.g. a
+UUID):
+
+* the first request with a key claims it through the unique index on
+  ``(user, key)`` and runs normally; its response is stored with the key;
+* a replay within ``PAYMENT_IDEMPOTENCY_TTL`` gets the stored response back
+  (marked ``Idempotent-Replayed: true``) without running the view;
+* a replay while the first request is still running gets 409, and reusing a
+  key for a different request body gets 422.
+
+Server errors (5xx) release the key so the request can be retried. Requests
+without the header behave as before. Expired keys are reclaimed on reuse and
+removed by ``manage.py purge_idempotency_keys``.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'PAYMENT_IDEMPOTENCY_TTL', 86400))
+
+
+def _lock_timeout():
+    return timedelta(seconds=getattr(settings, 'PAYMENT_IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+
+def request_hash(endpoint, data):
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{endpoint}\n{canonical}'.encode('utf-8')).hexdigest()
+
+
+def _claim(user, key, endpoint, fingerprint):
+    """Returns (record, created); a key that expired or was abandoned mid-request is taken over"""
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user, key=key, endpoint=endpoint, request_hash=fingerprint,
+                ), True
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if existing is None:
+                continue  # released between our insert and read
+            now = timezone.now()
+            stale = existing.created_at <= now - _ttl() or (
+                existing.response_status is None and existing.created_at <= now - _lock_timeout()
+            )
+            if not stale:
+                return existing, False
+            IdempotencyKey.objects.filter(pk=existing.pk, created_at=existing.created_at).delete()
+    return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def _replay(record, fingerprint):
+    if record is None or record.response_status is None:
+        response = Response(
+            {'error': 'A request with this Idempotency-Key is still in progress'}, status=status.HTTP_409_CONFLICT,
+        )
+        response['Retry-After'] = '1'
+        return response
+    if record.request_hash != fingerprint:
+        return Response(
+            {'error': 'This Idempotency-Key was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(endpoint):
+    """Decorate a DRF function view (below ``@api_view``) to honour ``Idempotency-Key``"""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = (request.headers.get(HEADER) or '').strip()
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            fingerprint = request_hash(endpoint, {'args': kwargs, 'data': request.data})
+            record, created = _claim(request.user, key, endpoint, fingerprint)
+            if not created:
+                return _replay(record, fingerprint)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            if response.status_code >= 500:
+                record.delete()
+            else:
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=['response_status', 'response_body'])
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def purge_expired_keys(now=None):
+    cutoff = (now or timezone.now()) - _ttl()
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
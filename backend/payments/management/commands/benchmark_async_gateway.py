@@ -0,0 +1,125 @@
+"""
+Show one event loop handling many slow gateway calls at once.
+
+Starts a fake bKash gateway on localhost that takes ``--delay`` seconds to
+answer a payment query, then fires ``--calls`` concurrent queries from a
+single event loop twice: once with blocking ``requests`` calls inside
+``async def`` (how the services used to work) and once with ``BkashService``
+on the async client:
+
+    python manage.py benchmark_async_gateway --calls 100 --delay 0.5
+
+No database or real gateway is used.
+"""
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from payments.services.bkash_service import BkashService
+
+
+class FakeGatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def make_handler(delay):
+    class FakeBkashHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self._reply({'statusCode': '0000', 'id_token': 'benchmark-token', 'expires_in': 3600})
+
+        def do_GET(self):
+            time.sleep(delay)
+            payment_id = self.path.rstrip('/').rsplit('/', 1)[-1]
+            self._reply({
+                'statusCode': '0000', 'paymentID': payment_id, 'trxID': f'TRX{payment_id}',
+                'transactionStatus': 'Completed', 'amount': '500.00', 'currency': 'BDT',
+            })
+
+    return FakeBkashHandler
+
+
+class Command(BaseCommand):
+    help = 'Compare blocking and non-blocking gateway calls from one event loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=100, help='Concurrent payment queries')
+        parser.add_argument('--delay', type=float, default=0.5, help='Seconds the fake gateway takes to answer')
+
+    def handle(self, *args, **options):
+        server = FakeGatewayServer(('127.0.0.1', 0), make_handler(options['delay']))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        apis = {**settings.PAYMENT_APIS, 'BKASH': {**settings.PAYMENT_APIS['BKASH'], 'BASE_URL': base_url}}
+
+        try:
+            with override_settings(PAYMENT_APIS=apis):
+                self.report('blocking in async def', asyncio.run(self.blocking(base_url, options['calls'])))
+                self.report('async service', asyncio.run(self.non_blocking(options['calls'])))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    async def blocking(self, base_url, calls):
+        session = requests.Session()
+
+        async def query(i):
+            start = time.perf_counter()
+            response = session.get(f'{base_url}/checkout/payment/query/P{i}', timeout=30)
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        return await self.timed(query, calls)
+
+    async def non_blocking(self, calls):
+        service = BkashService()
+        await service.get_access_token()
+
+        async def query(i):
+            start = time.perf_counter()
+            result = await service.query_payment(f'P{i}')
+            if not result['success']:
+                raise RuntimeError(result['error'])
+            return time.perf_counter() - start
+
+        try:
+            return await self.timed(query, calls)
+        finally:
+            await service.http.aclose()
+
+    async def timed(self, query, calls):
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(query(i) for i in range(calls)))
+        return time.perf_counter() - start, sorted(latencies)
+
+    def report(self, label, result):
+        wall, latencies = result
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{label:>22}: {len(latencies)} calls in {wall:.2f}s '
+            f'({len(latencies) / wall:.0f}/s), per call p50 {statistics.median(latencies) * 1000:.0f} ms, '
+            f'p95 {p95 * 1000:.0f} ms'
+        )
@@ -0,0 +1,80 @@
+"""
+Measure the RSA work Nagad needs per payment.
+
+A checkout encrypts and signs sensitive data twice (initialize and
+complete). This generates a throwaway key pair and times that work with the
+keys parsed from PEM on every call (how NagadService used to work) and with
+the keys preloaded once (``payments.nagad_crypto``):
+
+    python manage.py benchmark_nagad_crypto --payments 500
+
+No configured keys, database or gateway are used.
+"""
+
+import json
+import statistics
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.management.base import BaseCommand
+
+from payments.nagad_crypto import PKCS1, SHA256, NagadKeys, load_private_key, load_public_key
+
+SENSITIVE_DATA = json.dumps({
+    'merchantId': '683002007104225', 'datetime': '20240101120000',
+    'orderId': 'NAG1700000000ABCDEF', 'challenge': 'x' * 40,
+})
+
+
+class Command(BaseCommand):
+    help = 'Compare per-payment Nagad crypto cost with and without preloaded keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=500, help='Payments to simulate')
+        parser.add_argument('--key-size', type=int, default=2048)
+
+    def handle(self, *args, **options):
+        private = rsa.generate_private_key(public_exponent=65537, key_size=options['key_size'])
+        private_pem = private.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ).decode('ascii')
+        public_pem = private.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode('ascii')
+
+        def parse_every_call():
+            for _ in range(2):
+                load_public_key(public_pem).encrypt(SENSITIVE_DATA.encode('utf-8'), PKCS1)
+                load_private_key(private_pem).sign(SENSITIVE_DATA.encode('utf-8'), PKCS1, SHA256)
+
+        keys = NagadKeys(public_pem, private_pem)
+        if not keys.verify(SENSITIVE_DATA, keys.sign(SENSITIVE_DATA)):
+            raise RuntimeError('Signature did not verify')
+
+        def preloaded():
+            for _ in range(2):
+                keys.encrypt(SENSITIVE_DATA)
+                keys.sign(SENSITIVE_DATA)
+
+        before = self.timed(parse_every_call, options['payments'])
+        after = self.timed(preloaded, options['payments'])
+        self.report('parse keys per call', before)
+        self.report('preloaded keys', after)
+        self.stdout.write(f'Speed-up: {statistics.median(before) / statistics.median(after):.1f}x per payment')
+
+    def timed(self, work, payments):
+        work()  # warm up
+        durations = []
+        for _ in range(payments):
+            start = time.perf_counter()
+            work()
+            durations.append(time.perf_counter() - start)
+        return sorted(durations)
+
+    def report(self, label, durations):
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(
+            f'{label:>20}: {len(durations)} payments, per payment p50 {statistics.median(durations) * 1000:.2f} ms, '
+            f'p95 {p95 * 1000:.2f} ms, {len(durations) / sum(durations):.0f} payments/s per core'
+        )
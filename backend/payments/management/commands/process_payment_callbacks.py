@@ -0,0 +1,38 @@
+"""
+Confirm queued gateway callbacks and activate subscriptions for completed
+payments.
+
+Callbacks that could not be trusted on arrival are checked against the
+gateway's status API; subscriptions are normally activated in-process right
+after a callback commits, and this picks up any that were missed. Run from
+cron or as a long-lived worker:
+
+    python manage.py process_payment_callbacks
+    python manage.py process_payment_callbacks --loop --sleep 10
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.callbacks import process_pending_callbacks
+from payments.processing import activate_pending_subscriptions
+
+
+class Command(BaseCommand):
+    help = 'Confirm queued payment callbacks and run pending subscription activations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many of each')
+        parser.add_argument('--loop', action='store_true', help='Keep polling')
+        parser.add_argument('--sleep', type=int, default=10, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            callbacks = process_pending_callbacks(limit=options['limit'])
+            activations = activate_pending_subscriptions(limit=options['limit'])
+            if callbacks or activations:
+                self.stdout.write(f'Processed {callbacks} callback(s), activated {activations} subscription(s).')
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,20 @@
+"""
+Delete expired payment idempotency keys.
+
+Keys stop being replayed after PAYMENT_IDEMPOTENCY_TTL; run this from cron
+to keep the table small:
+
+    python manage.py purge_idempotency_keys
+"""
+
+from django.core.management.base import BaseCommand
+
+from payments.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete payment idempotency keys older than PAYMENT_IDEMPOTENCY_TTL'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(f'Deleted {deleted} expired idempotency key(s).')
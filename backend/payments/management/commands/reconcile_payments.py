@@ -0,0 +1,97 @@
+"""
+Recheck pending payments with their gateways.
+
+Completes or fails payments whose callback never arrived and gives up on
+abandoned checkouts (see ``payments.reconciliation``). Run from cron or as a
+long-lived worker:
+
+    python manage.py reconcile_payments
+    python manage.py reconcile_payments --loop --sleep 60
+
+``--simulate`` points the gateways at a local ``GatewaySimulator`` instead.
+It needs ``--seed N``, which first creates N aged pending payments for a
+throwaway user (deleted afterwards); only those payments are checked, so real
+pending payments are never settled against the simulator. Use it to measure
+throughput against a given gateway latency:
+
+    python manage.py reconcile_payments --simulate --seed 500 --latency 0.3
+"""
+
+import json
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from payments.models import Payment
+from payments.reconciliation import RECONCILED_GATEWAYS, reconcile_pending_payments
+from payments.simulator import GatewaySimulator
+
+
+class Command(BaseCommand):
+    help = 'Recheck pending payments with their gateways'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Check at most this many payments per run')
+        parser.add_argument('--loop', action='store_true', help='Keep polling')
+        parser.add_argument('--sleep', type=int, default=60, help='Seconds between runs with --loop')
+        parser.add_argument('--simulate', action='store_true', help='Use a local gateway simulator')
+        parser.add_argument('--seed', type=int, default=0, help='With --simulate, pending payments to create and check')
+        parser.add_argument('--latency', type=float, default=0.2, help='Simulated gateway latency (seconds)')
+        parser.add_argument('--error-rate', type=float, default=0.02, help='Share of simulated calls that fail')
+        parser.add_argument('--success-rate', type=float, default=0.6, help='Share of payments reported paid')
+
+    def handle(self, *args, **options):
+        if not options['simulate']:
+            return self.run(options)
+        if options['seed'] <= 0:
+            raise CommandError('--simulate only checks the payments it seeds; pass --seed N')
+
+        simulator = GatewaySimulator(
+            latency=options['latency'], success_rate=options['success_rate'], error_rate=options['error_rate'],
+        ).start()
+        user = self.seed(options['seed'], simulator)
+        try:
+            # Seeded payments belong to a throwaway user; don't activate anything for it
+            with override_settings(PAYMENT_ACTIVATION_IN_PROCESS=False, **simulator.settings_overrides()):
+                self.run(options, payments=Payment.objects.filter(user=user))
+            self.stdout.write(f'Simulator answered {simulator.requests} status call(s).')
+        finally:
+            simulator.stop()
+            user.delete()
+
+    def run(self, options, payments=None):
+        while True:
+            metrics = reconcile_pending_payments(limit=options['limit'], payments=payments)
+            if metrics['checked'] or metrics['outcomes']:
+                self.stdout.write(json.dumps(metrics, indent=2))
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+    def seed(self, count, simulator):
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            email=f'reconcile-sim-{tag}@example.invalid', username=f'reconcile-sim-{tag}',
+            password=None, first_name='Reconcile', last_name='Simulation',
+        )
+        payments = [
+            Payment(
+                user=user, amount=Decimal('299.00'), payment_method=RECONCILED_GATEWAYS[i % len(RECONCILED_GATEWAYS)],
+                transaction_id=f'SIM-{tag}-{i:06d}',
+            )
+            for i in range(count)
+        ]
+        Payment.objects.bulk_create(payments, batch_size=500)
+        simulator.amounts.update({payment.transaction_id: payment.amount for payment in payments})
+        # Old enough to be due for a check
+        min_age = getattr(settings, 'PAYMENT_RECONCILE_MIN_AGE', 120)
+        Payment.objects.filter(user=user).update(created_at=timezone.now() - timedelta(seconds=min_age + 60))
+        self.stdout.write(f'Seeded {count} pending payment(s) for {user.email}.')
+        return user
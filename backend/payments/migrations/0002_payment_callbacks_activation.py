@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentCallback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gateway', models.CharField(max_length=20)),
+                ('event_key', models.CharField(max_length=64, unique=True)),
+                ('transaction_id', models.CharField(blank=True, max_length=255)),
+                ('reported_status', models.CharField(blank=True, max_length=20)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('signature_valid', models.BooleanField(default=False)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.CharField(blank=True, max_length=30)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'payment_callbacks',
+            },
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='activation_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='subscription_activated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_method', 'transaction_id'], name='payments_method_txn_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('activation_pending', True)), fields=['paid_at'], name='payments_activation_queue_idx'),
+        ),
+        migrations.AddField(
+            model_name='paymentcallback',
+            name='payment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='callbacks', to='payments.payment'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentcallback',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['created_at'], name='payment_callbacks_queue_idx'),
+        ),
+    ]
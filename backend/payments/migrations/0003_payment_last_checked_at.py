@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_payment_callbacks_activation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('payment_status', 'pending')), fields=['created_at', 'id'], name='payments_pending_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentcallback',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
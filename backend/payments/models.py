@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 
@@ -85,16 +86,83 @@ class Payment(models.Model):
     payment_intent_id = models.CharField(max_length=255, blank=True, null=True)
     failure_reason = models.TextField(blank=True, null=True)
     paid_at = models.DateTimeField(null=True, blank=True)
+    activation_pending = models.BooleanField(default=False)  # completed by a callback, subscription not yet activated
+    subscription_activated_at = models.DateTimeField(null=True, blank=True)
+    last_checked_at = models.DateTimeField(null=True, blank=True)  # last gateway status check by reconciliation
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'payments'
+        indexes = [
+            # Gateway callbacks find their payment by the gateway's transaction id
+            models.Index(fields=['payment_method', 'transaction_id'], name='payments_method_txn_idx'),
+            # Pending payments in age order, for reconciliation
+            models.Index(
+                fields=['created_at', 'id'], name='payments_pending_created_idx',
+                condition=models.Q(payment_status='pending'),
+            ),
+            # Completed payments whose subscription hasn't been activated yet
+            models.Index(
+                fields=['paid_at'], name='payments_activation_queue_idx',
+                condition=models.Q(activation_pending=True),
+            ),
+        ]
 
     def __str__(self):
         return f"Payment {self.id} - {self.amount} {self.currency} - {self.payment_status}"
 
 
+class PaymentCallback(models.Model):
+    """A callback received from a payment gateway (see ``payments.callbacks``)"""
+    gateway = models.CharField(max_length=20)
+    event_key = models.CharField(max_length=64, unique=True)  # sha256 of gateway + raw body
+    transaction_id = models.CharField(max_length=255, blank=True)
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='callbacks')
+    reported_status = models.CharField(max_length=20, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    signature_valid = models.BooleanField(default=False)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # a worker is confirming it with the gateway
+    processed_at = models.DateTimeField(null=True, blank=True)
+    result = models.CharField(max_length=30, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'payment_callbacks'
+        indexes = [
+            models.Index(
+                fields=['created_at'], name='payment_callbacks_queue_idx',
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.gateway} callback for {self.transaction_id or '?'} ({self.reported_status or 'unknown'})"
+
+
+class IdempotencyKey(models.Model):
+    """A client's Idempotency-Key for a payment request and the response it got (see ``payments.idempotency``)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=50)
+    request_hash = models.CharField(max_length=64)  # sha256 of endpoint + request body
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)  # null while the request is running
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'payment_idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='payment_idempotency_user_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='payment_idempotency_age_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.response_status or 'in progress'})"
+
+
 class UserPaymentMethod(models.Model):
     """Store user's saved payment methods"""
     METHOD_TYPE_CHOICES = [
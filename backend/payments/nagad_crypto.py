@@ -0,0 +1,85 @@
+"""
+Nagad request encryption and signing
+
+Nagad expects each request's sensitive data encrypted with its public key
+(RSA PKCS#1 v1.5) and signed with the merchant's private key (RSA-SHA256,
+PKCS#1 v1.5), both base64 encoded. Parsing a PEM key costs far more than
+using it, so keys are parsed once per process into ``NagadKeys`` and shared;
+the key objects are safe to use from several threads at once.
+
+Keys are accepted as PEM or as the bare base64 body Nagad's merchant portal
+hands out.
+"""
+
+import base64
+import hashlib
+import threading
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+PKCS1 = padding.PKCS1v15()
+SHA256 = hashes.SHA256()
+
+
+def _pem(key, kind):
+    key = (key or '').strip()
+    if not key:
+        raise ValueError(f'Nagad {kind.lower()} is not configured')
+    if key.startswith('-----BEGIN'):
+        return key.encode('utf-8')
+    body = ''.join(key.split())
+    lines = '\n'.join(body[i:i + 64] for i in range(0, len(body), 64))
+    return f'-----BEGIN {kind}-----\n{lines}\n-----END {kind}-----\n'.encode('utf-8')
+
+
+def load_public_key(key):
+    return serialization.load_pem_public_key(_pem(key, 'PUBLIC KEY'))
+
+
+def load_private_key(key):
+    pem = _pem(key, 'PRIVATE KEY')
+    try:
+        return serialization.load_pem_private_key(pem, password=None)
+    except ValueError:
+        if key.strip().startswith('-----BEGIN'):
+            raise
+        # Bare PKCS#1 body ("RSA PRIVATE KEY") rather than PKCS#8
+        return serialization.load_pem_private_key(_pem(key, 'RSA PRIVATE KEY'), password=None)
+
+
+class NagadKeys:
+    """Nagad's public key and the merchant private key, parsed once"""
+
+    def __init__(self, public_key, private_key):
+        self.public_key = load_public_key(public_key)
+        self.private_key = load_private_key(private_key)
+
+    def encrypt(self, data):
+        return base64.b64encode(self.public_key.encrypt(data.encode('utf-8'), PKCS1)).decode('ascii')
+
+    def sign(self, data):
+        return base64.b64encode(self.private_key.sign(data.encode('utf-8'), PKCS1, SHA256)).decode('ascii')
+
+    def verify(self, data, signature):
+        """Check a signature Nagad made over ``data`` with its private key"""
+        try:
+            self.public_key.verify(base64.b64decode(signature), data.encode('utf-8'), PKCS1, SHA256)
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+
+_keys = {}
+_keys_lock = threading.Lock()
+
+
+def get_nagad_keys(public_key, private_key):
+    """The parsed keys for one pair of configured key strings"""
+    fingerprint = hashlib.sha256(f'{public_key}|{private_key}'.encode('utf-8')).hexdigest()
+    with _keys_lock:
+        keys = _keys.get(fingerprint)
+        if keys is None:
+            keys = _keys[fingerprint] = NagadKeys(public_key, private_key)
+        return keys
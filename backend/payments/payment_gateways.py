@@ -3,7 +3,6 @@ StudySync Payment Gateway Integration
 Supports: bKash, Nagad, Rocket, and Manual Payment Verification
 """
 
-import requests
 import json
 import hashlib
 import uuid
@@ -12,6 +11,9 @@ from django.utils import timezone
 from decimal import Decimal
 from typing import Dict, Any, Optional
 
+from .bkash_token import get_token_cache
+from .http import get_http_client
+
 
 class PaymentGatewayError(Exception):
     """Custom exception for payment gateway errors"""
@@ -21,7 +23,10 @@ class PaymentGatewayError(Exception):
 class BasePaymentGateway:
     """Base class for all payment gateways"""
     
+    name = None
+    
     def __init__(self):
+        self.http = get_http_client(self.name)
         self.base_url = ""
         self.headers = {
             'Content-Type': 'application/json',
@@ -44,6 +49,8 @@ class BasePaymentGateway:
 class BKashGateway(BasePaymentGateway):
     """bKash payment gateway integration"""
     
+    name = 'bkash'
+    
     def __init__(self):
         super().__init__()
         self.base_url = getattr(settings, 'BKASH_BASE_URL', 'https://tokenized.sandbox.bka.sh/v1.2.0-beta')
@@ -54,30 +61,42 @@ class BKashGateway(BasePaymentGateway):
         self.headers.update({
             'X-APP-Key': self.app_key
         })
+        self.token_url = f"{self.base_url}/tokenized/checkout/token/grant"
+        self.token_cache = get_token_cache(self.token_url, self.app_key)
     
-    def get_access_token(self) -> str:
-        """Get access token for bKash API"""
-        url = f"{self.base_url}/tokenized/checkout/token/grant"
-        
+    def _grant_token(self):
         payload = {
             'app_key': self.app_key,
             'app_secret': self.app_secret
         }
         
-        response = requests.post(url, json=payload, headers=self.headers)
+        response = self.http.post(self.token_url, json=payload, headers=self.headers, operation='token', idempotent=True)
         
         if response.status_code == 200:
             data = response.json()
-            return data.get('id_token', '')
+            if not data.get('id_token'):
+                raise PaymentGatewayError(f"Failed to get bKash token: {response.text}")
+            return data['id_token'], int(data.get('expires_in') or 3600)
         else:
             raise PaymentGatewayError(f"Failed to get bKash token: {response.text}")
     
+    def get_access_token(self) -> str:
+        """Get access token for bKash API (shared and cached until shortly before expiry)"""
+        return self.token_cache.get(self._grant_token)
+    
+    def _authorized_post(self, url, payload, operation, idempotent=False):
+        """POST with the cached token, refreshing it once if bKash rejects it"""
+        for attempt in range(2):
+            token = self.get_access_token()
+            headers = {**self.headers, 'Authorization': token}
+            response = self.http.post(url, json=payload, headers=headers, operation=operation, idempotent=idempotent)
+            if response.status_code != 401 or attempt:
+                return response
+            self.token_cache.invalidate(token)
+    
     def initiate_payment(self, amount: Decimal, currency: str, user_data: Dict) -> Dict[str, Any]:
         """Initiate bKash payment"""
         try:
-            token = self.get_access_token()
-            self.headers['Authorization'] = token
-            
             url = f"{self.base_url}/tokenized/checkout/create"
             
             payload = {
@@ -90,7 +109,7 @@ class BKashGateway(BasePaymentGateway):
                 'merchantInvoiceNumber': self.generate_transaction_id()
             }
             
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self._authorized_post(url, payload, operation='create')
             
             if response.status_code == 200:
                 data = response.json()
@@ -115,16 +134,13 @@ class BKashGateway(BasePaymentGateway):
     def verify_payment(self, transaction_id: str) -> Dict[str, Any]:
         """Verify bKash payment"""
         try:
-            token = self.get_access_token()
-            self.headers['Authorization'] = token
-            
             url = f"{self.base_url}/tokenized/checkout/payment/status"
             
             payload = {
                 'paymentID': transaction_id
             }
             
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self._authorized_post(url, payload, operation='status', idempotent=True)
             
             if response.status_code == 200:
                 data = response.json()
@@ -152,6 +168,8 @@ class BKashGateway(BasePaymentGateway):
 class NagadGateway(BasePaymentGateway):
     """Nagad payment gateway integration"""
     
+    name = 'nagad'
+    
     def __init__(self):
         super().__init__()
         self.base_url = getattr(settings, 'NAGAD_BASE_URL', 'https://api.mynagad.com:10043/remote-payment-gateway-1.0/api/dfs')
@@ -175,7 +193,7 @@ class NagadGateway(BasePaymentGateway):
             # Nagad requires signature generation - simplified version
             url = f"{self.base_url}/check-out/initialize/{self.merchant_id}/{order_id}"
             
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self.http.post(url, json=payload, headers=self.headers, operation='initialize')
             
             if response.status_code == 200:
                 data = response.json()
@@ -202,7 +220,7 @@ class NagadGateway(BasePaymentGateway):
         try:
             url = f"{self.base_url}/verify/payment/{self.merchant_id}/{transaction_id}"
             
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url, headers=self.headers, operation='verify')
             
             if response.status_code == 200:
                 data = response.json()
@@ -230,6 +248,8 @@ class NagadGateway(BasePaymentGateway):
 class AamarPayGateway(BasePaymentGateway):
     """AamarPay payment gateway integration"""
     
+    name = 'aamarpay'
+    
     def __init__(self):
         super().__init__()
         self.base_url = getattr(settings, 'AAMARPAY_BASE_URL', 'https://sandbox.aamarpay.com')
@@ -285,9 +305,9 @@ class AamarPayGateway(BasePaymentGateway):
             # Make API request
             url = f"{self.base_url}/jsonpost.php"
             
-            response = requests.post(url, data=payment_data, headers={
+            response = self.http.post(url, data=payment_data, headers={
                 'Content-Type': 'application/x-www-form-urlencoded'
-            })
+            }, operation='initiate')
             
             if response.status_code == 200:
                 data = response.json()
@@ -331,9 +351,9 @@ class AamarPayGateway(BasePaymentGateway):
                 })
             }
             
-            response = requests.post(url, data=verification_data, headers={
+            response = self.http.post(url, data=verification_data, headers={
                 'Content-Type': 'application/x-www-form-urlencoded'
-            })
+            }, operation='trxcheck', idempotent=True)
             
             if response.status_code == 200:
                 data = response.json()
@@ -0,0 +1,220 @@
+"""
+Payment state transitions and subscription activation
+
+Gateway results (from callbacks, the verify endpoint or reconciliation) are
+applied with ``apply_gateway_result``. It moves a payment out of ``pending``
+under a row lock, so however many times a result arrives, only the first one
+changes anything. A completed payment is flagged ``activation_pending`` and
+its subscription is activated after commit, in a background thread, with
+``manage.py process_payment_callbacks`` as the backstop.
+
+``activate_subscription`` locks the payment and the user and records
+``subscription_activated_at``, so a payment extends premium exactly once
+whichever path gets there first.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+
+from .models import Payment, SubscriptionPlan, UserSubscription
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ('completed', 'failed')
+
+# Gateway status words -> our final payment states
+STATUS_MAP = {
+    'success': 'completed',
+    'successful': 'completed',
+    'completed': 'completed',
+    'paid': 'completed',
+    'failure': 'failed',
+    'failed': 'failed',
+    'cancel': 'failed',
+    'cancelled': 'failed',
+    'aborted': 'failed',
+}
+
+
+def normalize_status(reported):
+    """'completed', 'failed', or None for anything not final (pending, unknown)"""
+    return STATUS_MAP.get((reported or '').strip().lower())
+
+
+def apply_gateway_result(payment_id, status, gateway_response=None, failure_reason=None):
+    """
+    Move a pending payment to ``status`` ('completed' or 'failed'). Returns
+    True if this call made the change, False if the payment was not pending
+    (already applied, or unknown).
+    """
+    if status not in FINAL_STATUSES:
+        return False
+
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().filter(pk=payment_id, payment_status='pending').first()
+        if payment is None:
+            return False
+        payment.payment_status = status
+        fields = ['payment_status', 'payment_gateway_response', 'updated_at']
+        if status == 'completed':
+            payment.paid_at = timezone.now()
+            payment.activation_pending = True
+            fields += ['paid_at', 'activation_pending']
+        else:
+            payment.failure_reason = failure_reason or 'Payment failed at the gateway'
+            fields.append('failure_reason')
+        payment.payment_gateway_response = {**(payment.payment_gateway_response or {}), **(gateway_response or {})}
+        payment.save(update_fields=fields)
+        if status == 'completed':
+            schedule_activation(payment.pk)
+    return True
+
+
+def apply_verification(payment, gateway, verification):
+    """
+    Apply the result of ``gateway.verify_payment`` to a pending payment.
+    Returns 'applied', 'already_applied', 'gateway_pending' or
+    'amount_mismatch'; raises ``RuntimeError`` if the check itself failed.
+    """
+    if not verification.get('success'):
+        raise RuntimeError(verification.get('error') or 'verification failed')
+    status = normalize_status(verification.get('status'))
+    if status is None:
+        return 'gateway_pending'
+    if status == 'completed' and verification.get('amount') not in (None, payment.amount):
+        logger.warning(
+            f"{gateway} reports {verification.get('amount')} paid for payment {payment.pk}, "
+            f"expected {payment.amount}; not applying"
+        )
+        return 'amount_mismatch'
+    applied = apply_gateway_result(
+        payment.pk, status, verification.get('gateway_response'),
+        failure_reason=f"{gateway} reported {verification.get('status')}",
+    )
+    return 'applied' if applied else 'already_applied'
+
+
+def _default_premium_plan():
+    plan = SubscriptionPlan.objects.filter(name__icontains='premium', is_active=True).first()
+    if not plan:
+        # Create default premium plan if none exists
+        plan = SubscriptionPlan.objects.create(
+            name='Premium Monthly',
+            description='Premium subscription with all features',
+            price=Decimal('299.00'),
+            currency='BDT',
+            duration_days=30,
+            max_posts_per_month=-1,
+            can_use_mentorship=True,
+            has_ads=False
+        )
+    return plan
+
+
+def activate_subscription(payment, verification_result):
+    """Activate user subscription after successful payment (at most once per payment)"""
+    try:
+        with transaction.atomic():
+            payment = Payment.objects.select_for_update().select_related('subscription__plan').get(pk=payment.pk)
+            if payment.subscription_activated_at:
+                return payment
+            user = User.objects.select_for_update().get(pk=payment.user_id)
+            current_time = timezone.now()
+
+            # Update payment status
+            payment.payment_status = 'completed'
+            payment.paid_at = payment.paid_at or current_time
+            payment.payment_gateway_response.update(verification_result.get('gateway_response', {}))
+
+            plan = payment.subscription.plan if payment.subscription else _default_premium_plan()
+
+            # Calculate expiry date
+            if user.is_premium and user.premium_expires_at and user.premium_expires_at > current_time:
+                new_expiry = user.premium_expires_at + timedelta(days=plan.duration_days)
+            else:
+                new_expiry = current_time + timedelta(days=plan.duration_days)
+
+            # Update user subscription
+            user.is_premium = True
+            user.premium_expires_at = new_expiry
+            user.save(update_fields=['is_premium', 'premium_expires_at', 'updated_at'])
+
+            # Create or update UserSubscription record
+            subscription, created = UserSubscription.objects.get_or_create(
+                user=user,
+                defaults={
+                    'plan': plan,
+                    'expires_at': new_expiry,
+                    'status': 'active'
+                }
+            )
+
+            if not created:
+                subscription.plan = plan
+                subscription.expires_at = new_expiry
+                subscription.status = 'active'
+                subscription.save()
+
+            # Link payment to subscription
+            if not payment.subscription:
+                payment.subscription = subscription
+            payment.activation_pending = False
+            payment.subscription_activated_at = current_time
+            payment.save()
+
+        logger.info(f"Subscription activated for user {user.email} until {new_expiry}")
+        return payment
+
+    except Exception as e:
+        logger.error(f"Subscription activation error: {str(e)}")
+        raise
+
+
+def activate_pending_subscriptions(limit=None):
+    """Activate subscriptions for payments flagged by ``apply_gateway_result``"""
+    activated = 0
+    failed = []
+    while limit is None or activated < limit:
+        with transaction.atomic():
+            payment = (
+                Payment.objects.select_for_update(skip_locked=True)
+                .filter(activation_pending=True)
+                .exclude(pk__in=failed)
+                .order_by('paid_at')
+                .first()
+            )
+            if payment is None:
+                break
+            try:
+                activate_subscription(payment, {})
+            except Exception:
+                failed.append(payment.pk)  # logged by activate_subscription; retried next run
+                continue
+        activated += 1
+    return activated
+
+
+def _activate_in_thread(payment_id):
+    try:
+        activate_subscription(Payment(pk=payment_id), {})
+    except Exception as e:
+        logger.warning(f"In-process activation for payment {payment_id} failed, worker will retry: {e}")
+    finally:
+        connection.close()
+
+
+def schedule_activation(payment_id):
+    """Activate the payment's subscription in a background thread once the transaction commits"""
+    if not getattr(settings, 'PAYMENT_ACTIVATION_IN_PROCESS', True):
+        return
+    transaction.on_commit(
+        lambda: threading.Thread(target=_activate_in_thread, args=(payment_id,), daemon=True).start()
+    )
@@ -0,0 +1,211 @@
+"""
+Reconciliation of pending payments
+
+Payments left in ``pending`` (abandoned checkouts, callbacks that never
+arrived) are rechecked with their gateway. ``reconcile_pending_payments``
+walks them oldest first with a keyset scan over the partial index on pending
+rows, skipping payments younger than ``PAYMENT_RECONCILE_MIN_AGE`` (still in
+checkout) or checked within ``PAYMENT_RECONCILE_RECHECK_AFTER``.
+
+Status calls run in a thread pool. Each gateway has its own cap on calls in
+flight and a token-bucket rate limit, so one slow or strict gateway neither
+starves the others nor gets flooded. Results go through
+``payments.processing.apply_verification``, the same exactly-once path as
+callbacks and the verify endpoint. Payments still pending after
+``PAYMENT_RECONCILE_EXPIRE_AFTER`` are marked failed.
+
+A run can be scoped to a ``Payment`` queryset (``manage.py reconcile_payments
+--simulate`` passes the payments it seeded), in which case its metrics are
+returned but not stored.
+
+The metrics of each run (throughput, lag behind the oldest pending payment,
+outcomes, gateway latency) are kept in the cache for
+``reconciliation_metrics``.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.throttles import LocalBucketStore
+
+from .http import latency_stats
+from .models import Payment
+from .payment_gateways import PaymentGatewayFactory
+from .processing import apply_gateway_result, apply_verification
+
+logger = logging.getLogger(__name__)
+
+METRICS_CACHE_KEY = 'payments:reconciliation:metrics'
+RECONCILED_GATEWAYS = ('bkash', 'nagad', 'aamarpay')
+
+
+class GatewayLimiter:
+    """At most ``concurrency`` calls in flight and ``rate`` calls per second"""
+
+    def __init__(self, concurrency, rate):
+        self.capacity = max(1, concurrency)
+        self.rate = rate
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._bucket = LocalBucketStore(max_keys=1)
+
+    def __enter__(self):
+        while True:
+            allowed, wait_seconds = self._bucket.take('calls', self.capacity, self.rate)
+            if allowed:
+                break
+            time.sleep(wait_seconds)
+        self._slots.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def pending_payments(batch_size, now, payments=None):
+    """Batches of pending payments due for a check, oldest first"""
+    payments = Payment.objects.all() if payments is None else payments
+    queryset = (
+        payments.filter(
+            payment_status='pending',
+            created_at__lte=now - timedelta(seconds=_setting('PAYMENT_RECONCILE_MIN_AGE', 120)),
+        )
+        .filter(
+            Q(last_checked_at__isnull=True)
+            | Q(last_checked_at__lte=now - timedelta(seconds=_setting('PAYMENT_RECONCILE_RECHECK_AFTER', 300)))
+        )
+        .only('id', 'payment_method', 'transaction_id', 'amount', 'created_at')
+        .order_by('created_at', 'id')
+    )
+    after = None
+    while True:
+        page = queryset
+        if after is not None:
+            page = page.filter(Q(created_at__gt=after[0]) | Q(created_at=after[0], id__gt=after[1]))
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        after = (batch[-1].created_at, batch[-1].id)
+
+
+def _check(limiter, payment):
+    with limiter:
+        return PaymentGatewayFactory.get_gateway(payment.payment_method).verify_payment(payment.transaction_id)
+
+
+def _apply(payment, verification, now):
+    """Returns the outcome name for metrics"""
+    Payment.objects.filter(pk=payment.pk).update(last_checked_at=now)
+    try:
+        outcome = apply_verification(payment, payment.payment_method, verification)
+    except RuntimeError as e:
+        logger.warning(f"Reconciliation check failed for payment {payment.pk}: {e}")
+        return 'error'
+    if outcome == 'gateway_pending' and _expired(payment, now):
+        return _expire(payment)
+    return outcome
+
+
+def _expired(payment, now):
+    return payment.created_at <= now - timedelta(seconds=_setting('PAYMENT_RECONCILE_EXPIRE_AFTER', 86400))
+
+
+def _expire(payment):
+    applied = apply_gateway_result(payment.pk, 'failed', failure_reason='Checkout abandoned')
+    return 'expired' if applied else 'already_applied'
+
+
+def oldest_pending_age(now=None, payments=None):
+    now = now or timezone.now()
+    payments = Payment.objects.all() if payments is None else payments
+    oldest = (
+        payments.filter(payment_status='pending')
+        .order_by('created_at')
+        .values_list('created_at', flat=True)
+        .first()
+    )
+    return (now - oldest).total_seconds() if oldest else 0.0
+
+
+def reconcile_pending_payments(limit=None, payments=None):
+    """Check due pending payments (of ``payments`` if given) with their gateways; returns this run's metrics"""
+    started = time.monotonic()
+    now = timezone.now()
+    concurrency = _setting('PAYMENT_RECONCILE_CONCURRENCY', 4)
+    limiters = {
+        gateway: GatewayLimiter(concurrency, _setting('PAYMENT_RECONCILE_RATE', 5.0))
+        for gateway in RECONCILED_GATEWAYS
+    }
+    outcomes = Counter()
+    per_gateway = Counter()
+    max_lag = 0.0
+    checked = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency * len(limiters), thread_name_prefix='reconcile') as pool:
+        # The pool only makes HTTP calls; results are applied on this thread
+        in_flight = {}
+
+        def drain(block_until):
+            nonlocal checked
+            while len(in_flight) > block_until:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    payment = in_flight.pop(future)
+                    try:
+                        verification = future.result()
+                    except Exception as e:
+                        verification = {'success': False, 'error': str(e)}
+                    outcome = _apply(payment, verification, timezone.now())
+                    outcomes[outcome] += 1
+                    per_gateway[payment.payment_method] += 1
+                    checked += 1
+
+        for batch in pending_payments(_setting('PAYMENT_RECONCILE_BATCH_SIZE', 200), now, payments):
+            for payment in batch:
+                if limit is not None and checked + len(in_flight) >= limit:
+                    break
+                max_lag = max(max_lag, (now - payment.created_at).total_seconds())
+                if payment.payment_method not in limiters or not payment.transaction_id:
+                    # Never reached a gateway; nothing to ask about
+                    outcome = _expire(payment) if _expired(payment, now) else 'skipped'
+                    outcomes[outcome] += 1
+                    continue
+                in_flight[pool.submit(_check, limiters[payment.payment_method], payment)] = payment
+                # Keep a bounded backlog so batches are read as the pool frees up
+                drain(block_until=concurrency * len(limiters) * 2)
+            if limit is not None and checked + len(in_flight) >= limit:
+                break
+        drain(block_until=0)
+
+    duration = time.monotonic() - started
+    metrics = {
+        'finished_at': timezone.now().isoformat(),
+        'duration_seconds': round(duration, 3),
+        'checked': checked,
+        'throughput_per_second': round(checked / duration, 2) if duration else 0.0,
+        'max_lag_seconds': round(max_lag, 1),
+        'oldest_pending_age_seconds': round(oldest_pending_age(payments=payments), 1),
+        'outcomes': dict(outcomes),
+        'per_gateway': dict(per_gateway),
+        'gateway_latency': latency_stats(),
+    }
+    if payments is None:
+        cache.set(METRICS_CACHE_KEY, metrics, None)
+    return metrics
+
+
+def reconciliation_metrics():
+    return cache.get(METRICS_CACHE_KEY)
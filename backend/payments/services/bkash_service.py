@@ -1,9 +1,11 @@
-import requests
+import httpx
 import json
 import base64
 from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
+from ..bkash_token import get_token_cache
+from ..async_http import get_async_http_client
 from ..models import Payment, PaymentLog
 import logging
 
@@ -18,8 +20,13 @@ class BkashService:
         self.password = self.config['PASSWORD']
         self.app_key = self.config['APP_KEY']
         self.app_secret = self.config['APP_SECRET']
+        self.token_url = f"{self.base_url}/checkout/token/grant"
+        self.token_cache = get_token_cache(self.token_url, self.app_key)
         self.token = None
-        self.token_expires = None
+
+    @property
+    def http(self):
+        return get_async_http_client('bkash')
 
     def get_headers(self, with_token=False):
         headers = {
@@ -33,13 +40,8 @@ class BkashService:
             
         return headers
 
-    async def get_access_token(self):
-        """Get access token from bKash API"""
-        if self.token and self.token_expires and timezone.now() < self.token_expires:
-            return self.token
-
-        url = f"{self.base_url}/checkout/token/grant"
-        
+    async def _grant_token(self):
+        """Request a new grant; returns ``(token, expires_in)``"""
         auth_string = f"{self.username}:{self.password}"
         auth_bytes = auth_string.encode('ascii')
         auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
@@ -53,29 +55,39 @@ class BkashService:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = await self.http.post(self.token_url, headers=headers, json=data, operation='token', idempotent=True)
             response.raise_for_status()
             
             result = response.json()
             
             if result.get('statusCode') == '0000':
-                self.token = result.get('id_token')
-                # Token expires in 1 hour, we'll refresh 5 minutes early
-                self.token_expires = timezone.now() + timezone.timedelta(minutes=55)
-                return self.token
+                return result.get('id_token'), int(result.get('expires_in') or 3600)
             else:
                 raise Exception(f"Token request failed: {result.get('statusMessage')}")
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"bKash token request failed: {str(e)}")
             raise Exception(f"Failed to get bKash token: {str(e)}")
 
+    async def get_access_token(self):
+        """Get access token from bKash API (shared and cached until shortly before expiry)"""
+        self.token = await self.token_cache.aget(self._grant_token)
+        return self.token
+
+    async def _send(self, method, url, operation, **kwargs):
+        """Authorized request, refreshing the token once if bKash rejects it"""
+        for attempt in range(2):
+            token = await self.get_access_token()
+            headers = self.get_headers()
+            headers['Authorization'] = f'Bearer {token}'
+            response = await self.http.request(method, url, headers=headers, operation=operation, **kwargs)
+            if response.status_code != 401 or attempt:
+                return response
+            await self.token_cache.ainvalidate(token)
+
     async def create_payment(self, payment_data):
         """Create a payment in bKash"""
-        token = await self.get_access_token()
-        
         url = f"{self.base_url}/checkout/payment/create"
-        headers = self.get_headers(with_token=True)
         
         # Convert USD to BDT (approximate rate)
         amount_bdt = float(payment_data['amount']) * 85
@@ -89,7 +101,7 @@ class BkashService:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self._send('POST', url, 'create_payment', json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -106,19 +118,16 @@ class BkashService:
             else:
                 raise Exception(f"Payment creation failed: {result.get('statusMessage')}")
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"bKash payment creation failed: {str(e)}")
             raise Exception(f"Failed to create bKash payment: {str(e)}")
 
     async def execute_payment(self, payment_id):
         """Execute a bKash payment"""
-        token = await self.get_access_token()
-        
         url = f"{self.base_url}/checkout/payment/execute/{payment_id}"
-        headers = self.get_headers(with_token=True)
         
         try:
-            response = requests.post(url, headers=headers, timeout=30)
+            response = await self._send('POST', url, 'execute_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -140,7 +149,7 @@ class BkashService:
                     'error': result.get('statusMessage', 'Payment execution failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"bKash payment execution failed: {str(e)}")
             return {
                 'success': False,
@@ -149,13 +158,10 @@ class BkashService:
 
     async def query_payment(self, payment_id):
         """Query payment status from bKash"""
-        token = await self.get_access_token()
-        
         url = f"{self.base_url}/checkout/payment/query/{payment_id}"
-        headers = self.get_headers(with_token=True)
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = await self._send('GET', url, 'query_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -175,7 +181,7 @@ class BkashService:
                     'error': result.get('statusMessage', 'Payment query failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"bKash payment query failed: {str(e)}")
             return {
                 'success': False,
@@ -184,10 +190,7 @@ class BkashService:
 
     async def refund_payment(self, payment_id, amount, reason="Customer Request"):
         """Refund a bKash payment"""
-        token = await self.get_access_token()
-        
         url = f"{self.base_url}/checkout/payment/refund"
-        headers = self.get_headers(with_token=True)
         
         payload = {
             "paymentID": payment_id,
@@ -198,7 +201,7 @@ class BkashService:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self._send('POST', url, 'refund_payment', json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -217,7 +220,7 @@ class BkashService:
                     'error': result.get('statusMessage', 'Refund failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"bKash refund failed: {str(e)}")
             return {
                 'success': False,
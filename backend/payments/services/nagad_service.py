@@ -1,13 +1,10 @@
-import requests
+import httpx
 import json
-import hashlib
-import hmac
-import base64
 from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
-from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_v1_5
+from ..async_http import get_async_http_client
+from ..nagad_crypto import get_nagad_keys
 from ..models import Payment, PaymentLog
 import logging
 
@@ -22,6 +19,10 @@ class NagadService:
         self.public_key = self.config['PUBLIC_KEY']
         self.private_key = self.config['PRIVATE_KEY']
 
+    @property
+    def http(self):
+        return get_async_http_client('nagad')
+
     def generate_random_string(self, length=40):
         """Generate random string for challenge"""
         import random
@@ -37,29 +38,22 @@ class NagadService:
             'X-KM-Client-Type': 'PC_WEB'
         }
 
+    @property
+    def keys(self):
+        return get_nagad_keys(self.public_key, self.private_key)
+
     def encrypt_data(self, data):
         """Encrypt data using RSA public key"""
         try:
-            public_key = RSA.importKey(self.public_key)
-            cipher = PKCS1_v1_5.new(public_key)
-            encrypted = cipher.encrypt(data.encode('utf-8'))
-            return base64.b64encode(encrypted).decode('utf-8')
+            return self.keys.encrypt(data)
         except Exception as e:
             logger.error(f"Nagad encryption failed: {str(e)}")
             raise Exception(f"Failed to encrypt data: {str(e)}")
 
     def generate_signature(self, data):
-        """Generate signature using HMAC-SHA256"""
+        """Sign data with the merchant private key (RSA-SHA256)"""
         try:
-            private_key_obj = RSA.importKey(self.private_key)
-            # This is a simplified signature generation
-            # In production, you should use proper RSA signing
-            signature = hmac.new(
-                self.private_key.encode('utf-8'),
-                data.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            return signature
+            return self.keys.sign(data)
         except Exception as e:
             logger.error(f"Nagad signature generation failed: {str(e)}")
             raise Exception(f"Failed to generate signature: {str(e)}")
@@ -81,18 +75,19 @@ class NagadService:
             "challenge": self.generate_random_string(40)
         }
         
-        # Encrypt sensitive data
-        encrypted_data = self.encrypt_data(json.dumps(sensitive_data))
+        # Encrypt and sign sensitive data
+        plaintext = json.dumps(sensitive_data)
+        encrypted_data = self.encrypt_data(plaintext)
         
         payload = {
             "accountNumber": payment_data.get('account_number', ''),
             "dateTime": sensitive_data['datetime'],
             "sensitiveData": encrypted_data,
-            "signature": self.generate_signature(json.dumps(sensitive_data))
+            "signature": self.generate_signature(plaintext)
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self.http.post(url, headers=headers, json=payload, operation='init_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -106,7 +101,7 @@ class NagadService:
             else:
                 raise Exception(f"Payment initialization failed: {result.get('message')}")
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Nagad payment initialization failed: {str(e)}")
             raise Exception(f"Failed to initialize Nagad payment: {str(e)}")
 
@@ -128,18 +123,19 @@ class NagadService:
             "challenge": challenge
         }
         
-        # Encrypt sensitive data
-        encrypted_data = self.encrypt_data(json.dumps(sensitive_data))
+        # Encrypt and sign sensitive data
+        plaintext = json.dumps(sensitive_data)
+        encrypted_data = self.encrypt_data(plaintext)
         
         payload = {
             "paymentReferenceId": payment_ref_id,
             "sensitiveData": encrypted_data,
-            "signature": self.generate_signature(json.dumps(sensitive_data)),
+            "signature": self.generate_signature(plaintext),
             "merchantCallbackURL": payment_data.get('callback_url', '')
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self.http.post(url, headers=headers, json=payload, operation='complete_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -158,7 +154,7 @@ class NagadService:
                     'error': result.get('message', 'Payment completion failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Nagad payment completion failed: {str(e)}")
             return {
                 'success': False,
@@ -172,7 +168,7 @@ class NagadService:
         headers = self.get_headers()
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = await self.http.get(url, headers=headers, operation='verify_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -192,7 +188,7 @@ class NagadService:
                     'error': result.get('message', 'Payment verification failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Nagad payment verification failed: {str(e)}")
             return {
                 'success': False,
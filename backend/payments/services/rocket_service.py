@@ -1,4 +1,4 @@
-import requests
+import httpx
 import json
 import hashlib
 import hmac
@@ -6,6 +6,7 @@ import base64
 from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
+from ..async_http import get_async_http_client
 from ..models import Payment, PaymentLog
 import logging
 
@@ -20,6 +21,10 @@ class RocketService:
         self.api_key = self.config['API_KEY']
         self.secret_key = self.config['SECRET_KEY']
 
+    @property
+    def http(self):
+        return get_async_http_client('rocket')
+
     def get_headers(self):
         return {
             'Content-Type': 'application/json',
@@ -69,7 +74,7 @@ class RocketService:
         payload['signature'] = self.generate_signature(payload)
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self.http.post(url, headers=headers, json=payload, operation='initiate_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -85,7 +90,7 @@ class RocketService:
             else:
                 raise Exception(f"Payment initiation failed: {result.get('message')}")
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Rocket payment initiation failed: {str(e)}")
             raise Exception(f"Failed to initiate Rocket payment: {str(e)}")
 
@@ -106,7 +111,7 @@ class RocketService:
         payload['signature'] = self.generate_signature(payload)
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self.http.post(url, headers=headers, json=payload, operation='confirm_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -126,7 +131,7 @@ class RocketService:
                     'error': result.get('message', 'Payment confirmation failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Rocket payment confirmation failed: {str(e)}")
             return {
                 'success': False,
@@ -148,7 +153,7 @@ class RocketService:
         query_params['signature'] = self.generate_signature(query_params)
         
         try:
-            response = requests.get(url, headers=headers, params=query_params, timeout=30)
+            response = await self.http.get(url, headers=headers, params=query_params, operation='check_status')
             response.raise_for_status()
             
             result = response.json()
@@ -169,7 +174,7 @@ class RocketService:
                     'error': result.get('message', 'Status check failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Rocket status check failed: {str(e)}")
             return {
                 'success': False,
@@ -194,7 +199,7 @@ class RocketService:
         payload['signature'] = self.generate_signature(payload)
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await self.http.post(url, headers=headers, json=payload, operation='refund_payment')
             response.raise_for_status()
             
             result = response.json()
@@ -213,7 +218,7 @@ class RocketService:
                     'error': result.get('message', 'Refund failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Rocket refund failed: {str(e)}")
             return {
                 'success': False,
@@ -235,7 +240,7 @@ class RocketService:
         query_params['signature'] = self.generate_signature(query_params)
         
         try:
-            response = requests.get(url, headers=headers, params=query_params, timeout=30)
+            response = await self.http.get(url, headers=headers, params=query_params, operation='get_balance')
             response.raise_for_status()
             
             result = response.json()
@@ -252,7 +257,7 @@ class RocketService:
                     'error': result.get('message', 'Balance check failed')
                 }
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Rocket balance check failed: {str(e)}")
             return {
                 'success': False,
@@ -0,0 +1,28 @@
+"""
+Blocking facade over the async payment services, for WSGI views and scripts:
+
+    SyncService(BkashService()).query_payment(payment_id)
+
+Each coroutine method runs on the shared background event loop (see
+``payments.async_http.run_sync``); other attributes pass straight through.
+"""
+
+import functools
+import inspect
+
+from ..async_http import run_sync
+
+
+class SyncService:
+    def __init__(self, service):
+        self._service = service
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return run_sync(attr(*args, **kwargs))
+        return call
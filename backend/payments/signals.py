@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .ad_selection import reset_ad_snapshot
+from .entitlements import invalidate_all_entitlements, invalidate_entitlements
+from .models import Advertisement, SubscriptionPlan, UserSubscription
+
+
+def _drop_entitlements(user_id):
+    invalidate_entitlements(user_id)
+    transaction.on_commit(lambda: invalidate_entitlements(user_id))
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def subscription_changed(sender, instance, **kwargs):
+    _drop_entitlements(instance.user_id)
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(post_delete, sender=SubscriptionPlan)
+def plan_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_all_entitlements)
+
+
+@receiver(post_save, sender='study_sessions.Post')
+@receiver(post_delete, sender='study_sessions.Post')
+def post_count_changed(sender, instance, created=True, **kwargs):
+    # Edits don't change the monthly count; creates and deletes do
+    if created:
+        _drop_entitlements(instance.user_id)
+
+
+@receiver(post_save, sender='accounts.User')
+def premium_flag_changed(sender, instance, **kwargs):
+    _drop_entitlements(instance.pk)
+
+
+@receiver(post_save, sender=Advertisement)
+@receiver(post_delete, sender=Advertisement)
+def advertisement_changed(sender, instance, update_fields=None, **kwargs):
+    # Counter updates don't change what is shown
+    if update_fields and set(update_fields) <= {'impressions_count', 'clicks_count'}:
+        return
+    transaction.on_commit(reset_ad_snapshot)
@@ -0,0 +1,138 @@
+"""
+Local payment gateway simulator
+
+Answers the status endpoints used by ``BKashGateway``, ``NagadGateway`` and
+``AamarPayGateway`` with a configurable latency, outcome mix and error rate,
+so reconciliation and load tests can run without sandbox credentials:
+
+    simulator = GatewaySimulator(latency=0.2, success_rate=0.6).start()
+    with override_settings(**simulator.settings_overrides()):
+        ...
+    simulator.stop()
+
+Each transaction's outcome is derived from a hash of its id, so repeated
+checks of the same payment agree.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class GatewaySimulator:
+    def __init__(self, latency=0.1, jitter=0.05, success_rate=0.6, failure_rate=0.2,
+                 error_rate=0.0, amounts=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.success_rate = success_rate
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.amounts = amounts or {}  # transaction id -> amount to report
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def outcome(self, transaction_id):
+        """'completed', 'failed' or 'pending'"""
+        point = int(hashlib.sha256(transaction_id.encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if point < self.success_rate:
+            return 'completed'
+        if point < self.success_rate + self.failure_rate:
+            return 'failed'
+        return 'pending'
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def settings_overrides(self):
+        return {
+            'BKASH_BASE_URL': f'{self.base_url}/bkash',
+            'NAGAD_BASE_URL': f'{self.base_url}/nagad',
+            'AAMARPAY_BASE_URL': f'{self.base_url}/aamarpay',
+        }
+
+    def _handler(self):
+        simulator = self
+
+        words = {
+            'bkash': {'completed': 'Completed', 'failed': 'Failed', 'pending': 'Initiated'},
+            'nagad': {'completed': 'Success', 'failed': 'Aborted', 'pending': 'Ready'},
+            'aamarpay': {'completed': 'Successful', 'failed': 'Failed', 'pending': 'Processing'},
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload, status=200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _status(self, gateway, transaction_id):
+                with simulator._lock:
+                    simulator.requests += 1
+                time.sleep(max(0.0, simulator.latency + random.uniform(-simulator.jitter, simulator.jitter)))
+                if random.random() < simulator.error_rate:
+                    return None
+                outcome = simulator.outcome(transaction_id)
+                return words[gateway][outcome], str(simulator.amounts.get(transaction_id, '0'))
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def do_POST(self):
+                body = self._body()
+                if self.path == '/bkash/tokenized/checkout/token/grant':
+                    return self._reply({'id_token': 'simulated-token', 'expires_in': 3600})
+                if self.path == '/bkash/tokenized/checkout/payment/status':
+                    payment_id = json.loads(body or b'{}').get('paymentID', '')
+                    result = self._status('bkash', payment_id)
+                    if result is None:
+                        return self._reply({'error': 'unavailable'}, 503)
+                    return self._reply({'paymentID': payment_id, 'transactionStatus': result[0],
+                                        'amount': result[1], 'trxID': f'SIM{payment_id[-8:]}'})
+                if self.path == '/aamarpay/api/v1/trxcheck/request.php':
+                    tran_id = parse_qs(body.decode('utf-8')).get('tran_id', [''])[0]
+                    result = self._status('aamarpay', tran_id)
+                    if result is None:
+                        return self._reply({'error': 'unavailable'}, 503)
+                    return self._reply({'mer_txnid': tran_id, 'pay_status': result[0], 'amount': result[1]})
+                self._reply({'error': 'not found'}, 404)
+
+            def do_GET(self):
+                if self.path.startswith('/nagad/verify/payment/'):
+                    order_id = self.path.rstrip('/').rsplit('/', 1)[-1]
+                    result = self._status('nagad', order_id)
+                    if result is None:
+                        return self._reply({'error': 'unavailable'}, 503)
+                    return self._reply({'orderId': order_id, 'status': result[0], 'amount': result[1],
+                                        'issuerPaymentRefNo': f'SIM{order_id[-8:]}'})
+                self._reply({'error': 'not found'}, 404)
+
+        return Handler
@@ -0,0 +1,317 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+
+from .callbacks import ingest_callback
+from .idempotency import idempotent, request_hash
+from .models import IdempotencyKey, Payment, PaymentCallback
+from .processing import apply_gateway_result
+from .reconciliation import METRICS_CACHE_KEY, RECONCILED_GATEWAYS, reconcile_pending_payments
+from .simulator import GatewaySimulator
+
+WEBHOOK_SECRET = 'test-bkash-secret'
+
+
+def _user(name):
+    return User.objects.create_user(
+        username=name, email=f'{name}@example.com', password='pass', first_name=name, last_name='Test',
+    )
+
+
+def _payment(user, transaction_id, method='bkash', **fields):
+    return Payment.objects.create(
+        user=user, amount=Decimal('299.00'), payment_method=method, transaction_id=transaction_id, **fields,
+    )
+
+
+@override_settings(PAYMENT_ACTIVATION_IN_PROCESS=False, SECURE_SSL_REDIRECT=False)
+class GatewayResultTests(TestCase):
+    def setUp(self):
+        self.payment = _payment(_user('payer'), 'TXN-1')
+
+    def test_result_is_applied_exactly_once(self):
+        self.assertTrue(apply_gateway_result(self.payment.pk, 'completed', {'first': True}))
+        paid_at = Payment.objects.get(pk=self.payment.pk).paid_at
+
+        self.assertFalse(apply_gateway_result(self.payment.pk, 'completed', {'second': True}))
+        self.assertFalse(apply_gateway_result(self.payment.pk, 'failed'))
+
+        payment = Payment.objects.get(pk=self.payment.pk)
+        self.assertEqual(payment.payment_status, 'completed')
+        self.assertEqual(payment.paid_at, paid_at)
+        self.assertTrue(payment.activation_pending)
+        self.assertEqual(payment.payment_gateway_response, {'first': True})
+
+    def test_non_final_status_changes_nothing(self):
+        self.assertFalse(apply_gateway_result(self.payment.pk, 'pending'))
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'pending')
+
+    def test_failure_records_the_reason(self):
+        self.assertTrue(apply_gateway_result(self.payment.pk, 'failed', failure_reason='bkash reported Failed'))
+        payment = Payment.objects.get(pk=self.payment.pk)
+        self.assertEqual(payment.payment_status, 'failed')
+        self.assertEqual(payment.failure_reason, 'bkash reported Failed')
+        self.assertFalse(payment.activation_pending)
+
+
+@override_settings(PAYMENT_ACTIVATION_IN_PROCESS=False, SECURE_SSL_REDIRECT=False)
+class CallbackIngestTests(TestCase):
+    def setUp(self):
+        self.payment = _payment(_user('payer'), 'TXN-1')
+
+    def payload(self, status='Completed', amount='299.00', **extra):
+        return {'paymentID': 'TXN-1', 'transactionStatus': status, 'amount': amount, **extra}
+
+    def test_duplicate_delivery_is_acknowledged_without_work(self):
+        self.assertEqual(ingest_callback('bkash', self.payload(), signature_valid=True), 'applied')
+        self.assertEqual(ingest_callback('bkash', self.payload(), signature_valid=True), 'duplicate')
+
+        self.assertEqual(PaymentCallback.objects.count(), 1)
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'completed')
+
+    def test_key_order_does_not_defeat_dedupe(self):
+        ingest_callback('bkash', self.payload(), signature_valid=True)
+        reordered = dict(reversed(list(self.payload().items())))
+        self.assertEqual(ingest_callback('bkash', reordered, signature_valid=True), 'duplicate')
+
+    def test_later_callbacks_do_not_change_a_settled_payment(self):
+        ingest_callback('bkash', self.payload(), signature_valid=True)
+        result = ingest_callback('bkash', self.payload(status='Failed', trxID='RETRY'), signature_valid=True)
+
+        self.assertEqual(result, 'already_applied')
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'completed')
+        self.assertEqual(PaymentCallback.objects.count(), 2)
+
+    def test_unsigned_callback_is_queued_for_confirmation(self):
+        self.assertEqual(ingest_callback('bkash', self.payload(), signature_valid=None), 'queued')
+
+        callback = PaymentCallback.objects.get()
+        self.assertEqual(callback.payment_id, self.payment.pk)
+        self.assertIsNone(callback.processed_at)
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'pending')
+
+    def test_amount_mismatch_is_queued_not_applied(self):
+        self.assertEqual(ingest_callback('bkash', self.payload(amount='1.00'), signature_valid=True), 'queued')
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'pending')
+
+    def test_unknown_payment_is_recorded(self):
+        payload = self.payload(paymentID='NO-SUCH-TXN')
+        self.assertEqual(ingest_callback('bkash', payload, signature_valid=True), 'unknown_payment')
+        self.assertIsNotNone(PaymentCallback.objects.get().processed_at)
+
+
+@override_settings(
+    PAYMENT_ACTIVATION_IN_PROCESS=False, SECURE_SSL_REDIRECT=False,
+    PAYMENT_WEBHOOK_SECRETS={'bkash': WEBHOOK_SECRET},
+)
+class CallbackViewTests(TestCase):
+    def setUp(self):
+        self.payment = _payment(_user('payer'), 'TXN-1')
+        self.url = reverse('gateway-callback', args=['bkash'])
+        self.body = json.dumps({'paymentID': 'TXN-1', 'transactionStatus': 'Completed', 'amount': '299.00'})
+
+    def post(self, body, signature):
+        return self.client.post(self.url, body, content_type='application/json', HTTP_X_SIGNATURE=signature)
+
+    def sign(self, body):
+        return hmac.new(WEBHOOK_SECRET.encode('utf-8'), body.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def test_signed_callback_is_applied_once(self):
+        first = self.post(self.body, self.sign(self.body))
+        second = self.post(self.body, self.sign(self.body))
+
+        self.assertEqual(first.json(), {'received': True, 'result': 'applied'})
+        self.assertEqual(second.json(), {'received': True, 'result': 'duplicate'})
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'completed')
+
+    def test_bad_signature_is_rejected(self):
+        response = self.post(self.body, 'not-the-signature')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PaymentCallback.objects.exists())
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, 'pending')
+
+    def test_unknown_gateway_is_404(self):
+        response = self.client.post(reverse('gateway-callback', args=['paypal']), self.body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    PAYMENT_ACTIVATION_IN_PROCESS=False, PAYMENT_HTTP_MAX_RETRIES=0, BKASH_TOKEN_CACHE_ALIAS='default',
+    PAYMENT_RECONCILE_MIN_AGE=120, PAYMENT_RECONCILE_RECHECK_AFTER=300, PAYMENT_RECONCILE_EXPIRE_AFTER=86400,
+)
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.simulator = GatewaySimulator(latency=0.0, jitter=0.0, success_rate=0.5, failure_rate=0.25).start()
+        self.addCleanup(self.simulator.stop)
+        gateway_urls = override_settings(**self.simulator.settings_overrides())
+        gateway_urls.enable()
+        self.addCleanup(gateway_urls.disable)
+        self.user = _user('payer')
+
+    def seed(self, count, age=timedelta(minutes=10), user=None):
+        user = user or self.user
+        payments = [
+            _payment(user, f'SIM-{user.username}-{age.total_seconds():.0f}-{i:03d}', method=RECONCILED_GATEWAYS[i % 3])
+            for i in range(count)
+        ]
+        self.simulator.amounts.update({payment.transaction_id: payment.amount for payment in payments})
+        Payment.objects.filter(pk__in=[p.pk for p in payments]).update(created_at=timezone.now() - age)
+        return payments
+
+    def reconcile(self):
+        return reconcile_pending_payments(payments=Payment.objects.filter(user=self.user))
+
+    def test_pending_payments_take_the_gateway_outcome(self):
+        payments = self.seed(12)
+        metrics = self.reconcile()
+
+        self.assertEqual(metrics['checked'], 12)
+        self.assertEqual(self.simulator.requests, 12)
+        for payment in payments:
+            payment.refresh_from_db()
+            self.assertEqual(payment.payment_status, self.simulator.outcome(payment.transaction_id))
+            self.assertIsNotNone(payment.last_checked_at)
+        self.assertEqual(metrics['per_gateway'], {'bkash': 4, 'nagad': 4, 'aamarpay': 4})
+
+    def test_checked_payments_wait_for_the_recheck_interval(self):
+        self.seed(6)
+        self.reconcile()
+        requests = self.simulator.requests
+
+        self.assertEqual(self.reconcile()['checked'], 0)
+        self.assertEqual(self.simulator.requests, requests)
+
+    def test_payments_still_in_checkout_are_left_alone(self):
+        self.seed(3, age=timedelta(seconds=30))
+        self.assertEqual(self.reconcile()['checked'], 0)
+        self.assertEqual(self.simulator.requests, 0)
+
+    def test_abandoned_checkouts_expire(self):
+        payments = self.seed(12, age=timedelta(days=2))
+        metrics = self.reconcile()
+
+        still_pending = [p for p in payments if self.simulator.outcome(p.transaction_id) == 'pending']
+        self.assertEqual(metrics['outcomes'].get('expired', 0), len(still_pending))
+        for payment in still_pending:
+            payment.refresh_from_db()
+            self.assertEqual(payment.payment_status, 'failed')
+            self.assertEqual(payment.failure_reason, 'Checkout abandoned')
+
+    def test_gateway_errors_leave_payments_pending(self):
+        self.simulator.error_rate = 1.0
+        payments = self.seed(3)
+        metrics = self.reconcile()
+
+        self.assertEqual(metrics['outcomes'], {'error': 3})
+        self.assertFalse(Payment.objects.filter(pk__in=[p.pk for p in payments]).exclude(payment_status='pending').exists())
+
+    def test_scoped_run_leaves_other_payments_and_metrics_alone(self):
+        cache.delete(METRICS_CACHE_KEY)
+        other = self.seed(3, user=_user('bystander'))
+        self.seed(3)
+        self.assertEqual(self.reconcile()['checked'], 3)
+
+        self.assertFalse(Payment.objects.filter(pk__in=[p.pk for p in other]).exclude(payment_status='pending').exists())
+        self.assertIsNone(cache.get(METRICS_CACHE_KEY))
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.user = _user('payer')
+        self.calls = 0
+        self.fail_next = False
+
+        @api_view(['POST'])
+        @idempotent('test_charge')
+        def charge(request):
+            self.calls += 1
+            if self.fail_next:
+                self.fail_next = False
+                return Response({'error': 'gateway down'}, status=503)
+            return Response({'charge': self.calls, 'amount': request.data.get('amount')}, status=201)
+
+        self.view = charge
+
+    def post(self, data, key='key-1', user=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key is not None else {}
+        request = APIRequestFactory().post('/charge/', data, format='json', **headers)
+        force_authenticate(request, user=user or self.user)
+        return self.view(request)
+
+    def test_replay_returns_the_stored_response(self):
+        first = self.post({'amount': '299.00'})
+        replay = self.post({'amount': '299.00'})
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+
+    def test_replay_while_in_progress_is_409(self):
+        IdempotencyKey.objects.create(
+            user=self.user, key='key-1', endpoint='test_charge',
+            request_hash=request_hash('test_charge', {'args': {}, 'data': {'amount': '299.00'}}),
+        )
+        response = self.post({'amount': '299.00'})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.calls, 0)
+
+    @override_settings(PAYMENT_IDEMPOTENCY_LOCK_TIMEOUT=60)
+    def test_abandoned_in_progress_key_is_taken_over(self):
+        record = IdempotencyKey.objects.create(
+            user=self.user, key='key-1', endpoint='test_charge', request_hash='x' * 64,
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(self.post({'amount': '299.00'}).status_code, 201)
+        self.assertEqual(self.calls, 1)
+
+    def test_different_body_with_the_same_key_is_422(self):
+        self.post({'amount': '299.00'})
+        response = self.post({'amount': '1.00'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_server_error_releases_the_key(self):
+        self.fail_next = True
+        self.assertEqual(self.post({'amount': '299.00'}).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        retry = self.post({'amount': '299.00'})
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(self.calls, 2)
+
+    def test_keys_are_per_user(self):
+        self.post({'amount': '299.00'})
+        other = self.post({'amount': '299.00'}, user=_user('other'))
+
+        self.assertEqual(other.status_code, 201)
+        self.assertFalse(other.has_header('Idempotent-Replayed'))
+        self.assertEqual(self.calls, 2)
+
+    def test_requests_without_a_key_always_run(self):
+        self.post({'amount': '299.00'}, key=None)
+        self.post({'amount': '299.00'}, key=None)
+        self.assertEqual(self.calls, 2)
+
+    def test_overlong_key_is_rejected(self):
+        self.assertEqual(self.post({'amount': '299.00'}, key='k' * 256).status_code, 400)
+        self.assertEqual(self.calls, 0)
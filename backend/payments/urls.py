@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, callback_views, views
 
 app_name = 'payments'
 
@@ -15,6 +15,9 @@ urlpatterns = [
     # Payment processing
     path('initiate/', views.initiate_payment, name='initiate-payment'),
     path('verify/', views.verify_payment, name='verify-payment'),
+    path('<uuid:payment_id>/gateway-status/', async_views.gateway_payment_status, name='gateway-payment-status'),
+    path('callbacks/<str:gateway>/', callback_views.gateway_callback, name='gateway-callback'),
+    path('reconciliation/', views.reconciliation_status, name='reconciliation-status'),
     path('manual-submit/', views.submit_manual_payment, name='submit-manual-payment'),
     path('methods/', views.payment_methods, name='payment-methods'),
     path('user-methods/', views.UserPaymentMethodListCreateView.as_view(), name='user-payment-methods'),
@@ -1,10 +1,10 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import timedelta
-from decimal import Decimal
 import logging
 
 from .models import SubscriptionPlan, UserSubscription, Payment, UserPaymentMethod, Advertisement
@@ -14,6 +14,12 @@ from .serializers import (
     SubscriptionUpgradeSerializer, UserSubscriptionStatusSerializer
 )
 from .payment_gateways import PaymentGatewayFactory, ManualPaymentVerifier, PaymentGatewayError
+from .ad_events import CLICK, IMPRESSION, AdEvent, record_ad_event
+from .ad_selection import get_ad_snapshot, select_ads
+from .entitlements import get_entitlements
+from .idempotency import idempotent
+from .processing import activate_subscription, apply_gateway_result
+from .reconciliation import oldest_pending_age, reconciliation_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -32,24 +38,22 @@ class UserSubscriptionStatusView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        user = request.user
+        entitlements = get_entitlements(request.user)
         
         # Calculate days remaining for premium users
         days_remaining = None
-        if user.is_premium and user.premium_expires_at:
-            days_remaining = (user.premium_expires_at - timezone.now()).days
-            if days_remaining < 0:
-                days_remaining = 0
+        if entitlements.is_premium and entitlements.premium_expires_at:
+            days_remaining = max(0, (entitlements.premium_expires_at - timezone.now()).days)
         
         data = {
-            'subscription_type': user.subscription_type,
-            'is_premium': user.is_premium,
-            'has_ads': user.has_ads,
-            'can_use_mentorship': user.can_use_mentorship(),
-            'post_limit': user.get_post_limit(),
-            'current_month_posts': user.get_current_month_posts(),
-            'can_create_post': user.can_create_post(),
-            'premium_expires_at': user.premium_expires_at,
+            'subscription_type': entitlements.subscription_type,
+            'is_premium': entitlements.is_premium,
+            'has_ads': entitlements.has_ads,
+            'can_use_mentorship': entitlements.can_use_mentorship,
+            'post_limit': entitlements.post_limit,
+            'current_month_posts': entitlements.current_month_posts,
+            'can_create_post': entitlements.can_create_post,
+            'premium_expires_at': entitlements.premium_expires_at,
             'days_remaining': days_remaining,
         }
         
@@ -59,6 +63,7 @@ class UserSubscriptionStatusView(generics.RetrieveAPIView):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent('upgrade_to_premium')
 def upgrade_to_premium(request):
     """Upgrade user to premium subscription"""
     serializer = SubscriptionUpgradeSerializer(data=request.data)
@@ -117,9 +122,9 @@ def upgrade_to_premium(request):
     payment.save()
     
     # Update user's subscription status
-    user.subscription_type = 'premium'
+    user.is_premium = True
     user.premium_expires_at = new_expiry
-    user.save()
+    user.save(update_fields=['is_premium', 'premium_expires_at', 'updated_at'])
     
     return Response({
         'message': 'Successfully upgraded to premium!',
@@ -142,87 +147,60 @@ class AdvertisementListView(generics.ListAPIView):
     serializer_class = AdvertisementSerializer
     permission_classes = [permissions.IsAuthenticated]
     
-    def get_queryset(self):
-        # Only show ads to free users
-        if self.request.user.has_ads:
-            return Advertisement.objects.filter(
-                is_active=True,
-                start_date__lte=timezone.now(),
-                end_date__gte=timezone.now()
-            ).order_by('-priority', '?')[:3]  # Show max 3 random ads
-        return Advertisement.objects.none()
+    def list(self, request, *args, **kwargs):
+        # Only show ads to free users; ads come pre-serialized from the in-process snapshot
+        ads = select_ads(request.user.pk) if get_entitlements(request.user).has_ads else []
+        return self.get_paginated_response(self.paginate_queryset(ads))
+
+
+def _record_ad_event(request, ad_id, kind):
+    """Validate the ad against the ad snapshot and buffer the event; returns (ad, error response)"""
+    ad = get_ad_snapshot().get_live(ad_id, timezone.now())
+    if ad is None:
+        return None, Response({'error': 'Ad not found'}, 
+                              status=status.HTTP_404_NOT_FOUND)
+    
+    # Only track for free users
+    if not get_entitlements(request.user).has_ads:
+        return None, Response({'error': 'Premium users do not see ads'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+    
+    recorded = record_ad_event(AdEvent(
+        kind=kind,
+        ad_id=str(ad_id),
+        user_id=request.user.pk,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        user_agent=request.META.get('HTTP_USER_AGENT', '')
+    ))
+    if not recorded:
+        response = Response({'error': 'Ad tracking is busy, please retry later'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = str(getattr(settings, 'ADS_EVENT_FLUSH_INTERVAL', 5))
+        return None, response
+    return ad, None
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def track_ad_impression(request, ad_id):
     """Track when user views an ad"""
-    try:
-        ad = Advertisement.objects.get(id=ad_id, is_active=True)
-        
-        # Only track for free users
-        if request.user.has_ads:
-            from .models import AdImpression
-            
-            # Create impression record
-            AdImpression.objects.create(
-                ad=ad,
-                user=request.user,
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
-            )
-            
-            # Update ad impression count
-            ad.impressions_count += 1
-            ad.save(update_fields=['impressions_count'])
-            
-            return Response({'status': 'success'})
-        
-        return Response({'error': 'Premium users do not see ads'}, 
-                       status=status.HTTP_400_BAD_REQUEST)
-    
-    except Advertisement.DoesNotExist:
-        return Response({'error': 'Ad not found'}, 
-                       status=status.HTTP_404_NOT_FOUND)
+    ad, error = _record_ad_event(request, ad_id, IMPRESSION)
+    if error is not None:
+        return error
+    return Response({'status': 'success'})
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def track_ad_click(request, ad_id):
     """Track when user clicks an ad"""
-    try:
-        ad = Advertisement.objects.get(id=ad_id, is_active=True)
-        
-        # Only track for free users
-        if request.user.has_ads:
-            from .models import AdImpression
-            
-            # Find the most recent impression for this user and ad
-            impression = AdImpression.objects.filter(
-                ad=ad,
-                user=request.user,
-                clicked=False
-            ).first()
-            
-            if impression:
-                impression.clicked = True
-                impression.save()
-            
-            # Update ad click count
-            ad.clicks_count += 1
-            ad.save(update_fields=['clicks_count'])
-            
-            return Response({
-                'status': 'success',
-                'redirect_url': ad.click_url
-            })
-        
-        return Response({'error': 'Premium users do not see ads'}, 
-                       status=status.HTTP_400_BAD_REQUEST)
-    
-    except Advertisement.DoesNotExist:
-        return Response({'error': 'Ad not found'}, 
-                       status=status.HTTP_404_NOT_FOUND)
+    ad, error = _record_ad_event(request, ad_id, CLICK)
+    if error is not None:
+        return error
+    return Response({
+        'status': 'success',
+        'redirect_url': ad['click_url']
+    })
 
 
 class UserPaymentMethodListCreateView(generics.ListCreateAPIView):
@@ -286,7 +264,7 @@ def subscription_features(request):
     return Response({
         'plans': features_comparison,
         'current_plan': current_plan,
-        'user_current_plan': request.user.subscription_type
+        'user_current_plan': get_entitlements(request.user).subscription_type
     })
 
 
@@ -296,6 +274,7 @@ def subscription_features(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent('initiate_payment')
 def initiate_payment(request):
     """Initiate payment with selected gateway"""
     try:
@@ -416,6 +395,7 @@ def get_payment_instructions(payment_method, amount, currency):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent('verify_payment')
 def verify_payment(request):
     """Verify payment status"""
     try:
@@ -445,7 +425,8 @@ def verify_payment(request):
                 
                 if result['success']:
                     if result['status'] in ['completed', 'success', 'paid']:
-                        # Payment successful - activate subscription
+                        # Payment successful - activate subscription (a no-op if a callback got there first)
+                        apply_gateway_result(payment.pk, 'completed', result.get('gateway_response'))
                         activate_subscription(payment, result)
                         
                         return Response({
@@ -454,8 +435,9 @@ def verify_payment(request):
                             'message': 'Payment verified and subscription activated successfully!'
                         })
                     else:
-                        payment.payment_status = result['status']
-                        payment.save()
+                        if result['status'] in ['failed', 'cancelled']:
+                            apply_gateway_result(payment.pk, 'failed', result.get('gateway_response'),
+                                                 failure_reason=f"Gateway reported {result['status']}")
                         
                         return Response({
                             'success': False,
@@ -488,6 +470,7 @@ def verify_payment(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent('submit_manual_payment')
 def submit_manual_payment(request):
     """Submit manual payment for verification"""
     try:
@@ -582,76 +565,6 @@ def payment_methods(request):
     })
 
 
-def activate_subscription(payment, verification_result):
-    """Activate user subscription after successful payment"""
-    try:
-        user = payment.user
-        
-        # Update payment status
-        payment.payment_status = 'completed'
-        payment.paid_at = timezone.now()
-        payment.payment_gateway_response.update(verification_result.get('gateway_response', {}))
-        payment.save()
-        
-        # Get or create subscription plan (default premium if no subscription)
-        if payment.subscription:
-            plan = payment.subscription.plan
-        else:
-            # Get default premium plan
-            plan = SubscriptionPlan.objects.filter(name__icontains='premium', is_active=True).first()
-            if not plan:
-                # Create default premium plan if none exists
-                plan = SubscriptionPlan.objects.create(
-                    name='Premium Monthly',
-                    description='Premium subscription with all features',
-                    price=Decimal('299.00'),
-                    currency='BDT',
-                    duration_days=30,
-                    max_posts_per_month=-1,
-                    can_use_mentorship=True,
-                    has_ads=False
-                )
-        
-        # Calculate expiry date
-        current_time = timezone.now()
-        if user.is_premium and user.premium_expires_at and user.premium_expires_at > current_time:
-            new_expiry = user.premium_expires_at + timedelta(days=plan.duration_days)
-        else:
-            new_expiry = current_time + timedelta(days=plan.duration_days)
-        
-        # Update user subscription
-        user.subscription_type = 'premium'
-        user.premium_expires_at = new_expiry
-        user.save()
-        
-        # Create or update UserSubscription record
-        subscription, created = UserSubscription.objects.get_or_create(
-            user=user,
-            defaults={
-                'plan': plan,
-                'expires_at': new_expiry,
-                'status': 'active'
-            }
-        )
-        
-        if not created:
-            subscription.plan = plan
-            subscription.expires_at = new_expiry
-            subscription.status = 'active'
-            subscription.save()
-        
-        # Link payment to subscription
-        if not payment.subscription:
-            payment.subscription = subscription
-            payment.save()
-        
-        logger.info(f"Subscription activated for user {user.email} until {new_expiry}")
-        
-    except Exception as e:
-        logger.error(f"Subscription activation error: {str(e)}")
-        raise
-
-
 def get_payment_instructions(payment_method, amount, currency):
     """Get payment instructions for manual payment methods"""
     instructions = {
@@ -678,6 +591,7 @@ def get_payment_instructions(payment_method, amount, currency):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent('verify_payment')
 def verify_payment(request):
     """Verify payment status"""
     try:
@@ -707,7 +621,8 @@ def verify_payment(request):
                 
                 if result['success']:
                     if result['status'] in ['completed', 'success', 'paid']:
-                        # Payment successful - activate subscription
+                        # Payment successful - activate subscription (a no-op if a callback got there first)
+                        apply_gateway_result(payment.pk, 'completed', result.get('gateway_response'))
                         activate_subscription(payment, result)
                         
                         return Response({
@@ -716,8 +631,9 @@ def verify_payment(request):
                             'message': 'Payment verified and subscription activated successfully!'
                         })
                     else:
-                        payment.payment_status = result['status']
-                        payment.save()
+                        if result['status'] in ['failed', 'cancelled']:
+                            apply_gateway_result(payment.pk, 'failed', result.get('gateway_response'),
+                                                 failure_reason=f"Gateway reported {result['status']}")
                         
                         return Response({
                             'success': False,
@@ -750,6 +666,7 @@ def verify_payment(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent('submit_manual_payment')
 def submit_manual_payment(request):
     """Submit manual payment for verification"""
     try:
@@ -799,4 +716,15 @@ def submit_manual_payment(request):
         logger.error(f"Manual payment submission error: {str(e)}")
         return Response({
             'error': 'Manual payment submission failed. Please try again.'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def reconciliation_status(request):
+    """Metrics of the last reconcile_payments run and the current pending backlog"""
+    return Response({
+        'last_run': reconciliation_metrics(),
+        'pending_payments': Payment.objects.filter(payment_status='pending').count(),
+        'oldest_pending_age_seconds': round(oldest_pending_age(), 1),
+    })
@@ -0,0 +1,96 @@
+"""
+Compare the OR-filter and UNION ALL plans for a user's message inbox.
+
+Seeds a throwaway user with many messages inside a transaction that is rolled
+back at the end, so it is safe to run against a development database:
+
+    python manage.py benchmark_message_queries --messages 50000
+"""
+
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import User
+from core.querysets import union_all
+from study_sessions.models import Message
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark OR vs UNION ALL message queries for a user with many messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=50000)
+        parser.add_argument('--other-users', type=int, default=200)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--explain', action='store_true', help='Print query plans')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('Benchmark data rolled back.')
+
+    def run(self, options):
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(username=f'bench_{tag}_{i}', email=f'bench_{tag}_{i}@bench.local', password='!')
+            for i in range(options['other_users'] + 1)
+        ])
+        target, others = users[0], users[1:]
+
+        batch = []
+        for i in range(options['messages']):
+            other = others[i % len(others)]
+            sender, receiver = (target, other) if i % 2 else (other, target)
+            batch.append(Message(sender=sender, receiver=receiver, content='benchmark'))
+            if len(batch) == 5000:
+                Message.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Message.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE messages')
+
+        base = Message.objects.select_related('sender', 'receiver')
+        page_size = options['page_size']
+
+        def or_query(offset):
+            qs = base.filter(Q(sender=target) | Q(receiver=target)).order_by('-created_at')
+            return list(qs[offset:offset + page_size])
+
+        def union_query(offset):
+            qs = union_all(base, Q(sender=target), Q(receiver=target), ordering=['-created_at'])
+            return list(qs[offset:offset + page_size])
+
+        if options['explain']:
+            self.stdout.write(base.filter(Q(sender=target) | Q(receiver=target)).order_by('-created_at')[:page_size].explain(analyze=True))
+
+        for label, offset in (('first page', 0), ('page 50', 50 * page_size)):
+            or_ms = self.measure(or_query, offset, options['repeat'])
+            union_ms = self.measure(union_query, offset, options['repeat'])
+            self.stdout.write(
+                f"{label:>10}: OR median {or_ms:.2f} ms, UNION ALL median {union_ms:.2f} ms "
+                f"({or_ms / union_ms if union_ms else 0:.1f}x)"
+            )
+
+    def measure(self, func, offset, repeat):
+        func(offset)  # warm up
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(offset)
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
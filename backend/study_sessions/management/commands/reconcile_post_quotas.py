@@ -0,0 +1,42 @@
+"""
+Recompute monthly post quota counters from the posts table.
+
+Counters only track posts created through the API; run this after creating
+or hard-deleting posts by other means, or periodically as a safety net:
+
+    python manage.py reconcile_post_quotas
+    python manage.py reconcile_post_quotas --month 2026-09 --dry-run
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.entitlements import invalidate_entitlements
+from study_sessions.quotas import reconcile_month
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-user monthly post quota counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='YYYY-MM (default: current month)')
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without fixing them')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['month']:
+            try:
+                now = timezone.make_aware(datetime.strptime(options['month'], '%Y-%m').replace(day=15))
+            except ValueError:
+                raise CommandError('--month must look like 2026-09')
+
+        changes = reconcile_month(now, dry_run=options['dry_run'])
+        for user_id, old, new in changes:
+            self.stdout.write(f'{user_id}: {old} -> {new}')
+            if not options['dry_run']:
+                invalidate_entitlements(user_id)
+
+        verb = 'would be corrected' if options['dry_run'] else 'corrected'
+        self.stdout.write(self.style.SUCCESS(f'{len(changes)} counters {verb} for {timezone.localtime(now):%Y-%m}'))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='joinrequest',
+            index=models.Index(fields=['requester_user', '-created_at'], name='join_reques_request_4fbfed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', '-created_at'], name='messages_sender__7375e3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver', '-created_at'], name='messages_receive_c09c1d_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('study_sessions', '0002_message_joinrequest_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostQuotaCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_quota_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'post_quota_counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postquotacounter',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='post_quota_user_month_unique'),
+        ),
+    ]
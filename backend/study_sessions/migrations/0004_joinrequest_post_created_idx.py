@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_sessions', '0003_post_quota_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='joinrequest',
+            index=models.Index(fields=['post', '-created_at'], name='join_reques_post_id_de9d36_idx'),
+        ),
+    ]
@@ -60,6 +60,11 @@ class JoinRequest(models.Model):
     class Meta:
         db_table = 'join_requests'
         unique_together = [['post', 'requester_user']]
+        indexes = [
+            models.Index(fields=['requester_user', '-created_at']),
+            # Requests on a user's posts: one ordered scan per post
+            models.Index(fields=['post', '-created_at']),
+        ]
 
     def __str__(self):
         return f"Join request for {self.post.title} by {self.requester_user.email}"
@@ -77,6 +82,27 @@ class Message(models.Model):
     class Meta:
         db_table = 'messages'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sender', '-created_at']),
+            models.Index(fields=['receiver', '-created_at']),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.email} to {self.receiver.email}"
+
+
+class PostQuotaCounter(models.Model):
+    """Posts a user has created in a calendar month, kept in step by ``study_sessions.quotas``"""
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='post_quota_counters')
+    month = models.DateField()  # first day of the month
+    post_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'post_quota_counters'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='post_quota_user_month_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m}: {self.post_count}"
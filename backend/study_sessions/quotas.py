@@ -0,0 +1,116 @@
+"""
+Monthly post quota counters
+
+Every post created through the API bumps the author's ``PostQuotaCounter``
+row for the current month in the same transaction as the insert. The bump is
+a single upsert on the ``(user, month)`` unique index that only succeeds
+while the count is below the limit:
+
+    INSERT ... ON CONFLICT (user_id, month)
+    DO UPDATE SET post_count = post_count + 1 WHERE post_count < <limit>
+
+so enforcing the quota never counts posts, and two concurrent creates cannot
+both take the last slot (the second waits on the row lock, then sees the new
+count). Posts created elsewhere (admin, shell, imports) are not counted until
+``manage.py reconcile_post_quotas`` recomputes the counters from ``posts``.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from payments.entitlements import UNLIMITED, month_start, next_month_start
+
+from .models import Post, PostQuotaCounter
+
+
+class PostQuotaExceeded(Exception):
+    def __init__(self, limit):
+        self.limit = limit
+        super().__init__(f'Monthly post limit of {limit} reached')
+
+
+def quota_month(now=None):
+    return month_start(now).date()
+
+
+def _reserve_sql(limited):
+    table = connection.ops.quote_name(PostQuotaCounter._meta.db_table)
+    condition = ' WHERE counter.post_count < %s' if limited else ''
+    return (
+        f'INSERT INTO {table} AS counter (user_id, month, post_count, updated_at) '
+        f'VALUES (%s, %s, 1, %s) '
+        f'ON CONFLICT (user_id, month) DO UPDATE '
+        f'SET post_count = counter.post_count + 1, updated_at = EXCLUDED.updated_at'
+        f'{condition} RETURNING counter.post_count'
+    )
+
+
+def reserve_post_slot(user_id, limit, now=None):
+    """
+    Count one more post for ``user_id`` this month and return the new count.
+
+    Raises ``PostQuotaExceeded`` (leaving the counter unchanged) when the user
+    already has ``limit`` posts; ``limit`` may be ``UNLIMITED``. Call inside
+    the transaction that inserts the post so a failed insert rolls the count
+    back too.
+    """
+    now = now or timezone.now()
+    limited = limit != UNLIMITED
+    if limited and limit <= 0:
+        raise PostQuotaExceeded(limit)
+
+    params = [user_id, quota_month(now), now]
+    if limited:
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(_reserve_sql(limited), params)
+        row = cursor.fetchone()
+    if row is None:
+        raise PostQuotaExceeded(limit)
+    return row[0]
+
+
+def month_post_count(user_id, now=None):
+    count = (
+        PostQuotaCounter.objects.filter(user_id=user_id, month=quota_month(now))
+        .values_list('post_count', flat=True)
+        .first()
+    )
+    return count or 0
+
+
+def reconcile_month(now=None, dry_run=False):
+    """
+    Bring the counters for the month containing ``now`` in line with the
+    posts actually created in it. Returns ``[(user_id, old, new), ...]`` for
+    the counters that were (or, with ``dry_run``, would be) corrected.
+
+    Each correction locks the counter row and recounts under the lock, so it
+    cannot lose a post created while the reconciliation runs.
+    """
+    start, end = month_start(now), next_month_start(now)
+    month = start.date()
+    month_posts = Post.objects.filter(created_at__gte=start, created_at__lt=end)
+
+    actual = dict(month_posts.values('user_id').annotate(n=Count('id')).values_list('user_id', 'n'))
+    stored = dict(PostQuotaCounter.objects.filter(month=month).values_list('user_id', 'post_count'))
+
+    changes = []
+    for user_id in sorted(set(actual) | set(stored), key=str):
+        old, new = stored.get(user_id, 0), actual.get(user_id, 0)
+        if old == new:
+            continue
+        if not dry_run:
+            with transaction.atomic():
+                counter, _ = PostQuotaCounter.objects.select_for_update().get_or_create(
+                    user_id=user_id, month=month,
+                )
+                new = month_posts.filter(user_id=user_id).count()
+                if counter.post_count == new:
+                    continue
+                old = counter.post_count
+                counter.post_count = new
+                counter.save(update_fields=['post_count', 'updated_at'])
+        changes.append((user_id, old, new))
+    return changes
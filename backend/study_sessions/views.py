@@ -1,11 +1,16 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Count, Case, When, IntegerField
 from django.utils import timezone
+from core.querysets import union_all
+from payments.entitlements import get_entitlements
 from .models import Post, JoinRequest, Message
+from .quotas import PostQuotaExceeded, reserve_post_slot
 from .serializers import (
     PostSerializer, PostCreateSerializer, 
     JoinRequestSerializer, JoinRequestCreateSerializer,
@@ -27,8 +32,18 @@ class PostListCreateView(generics.ListCreateAPIView):
         return PostSerializer
     
     def perform_create(self, serializer):
-        # Save the post with the current user
-        serializer.save(user=self.request.user)
+        user = self.request.user
+        limit = get_entitlements(user).post_limit
+        # The quota slot and the post commit or roll back together
+        with transaction.atomic():
+            try:
+                reserve_post_slot(user.pk, limit)
+            except PostQuotaExceeded:
+                raise PermissionDenied(
+                    f'You have reached your limit of {limit} posts this month. '
+                    'Upgrade to premium for unlimited posts.'
+                )
+            serializer.save(user=user)
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -107,6 +122,7 @@ class JoinRequestListCreateView(generics.ListCreateAPIView):
     """List join requests or create a new join request"""
     serializer_class = JoinRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = []  # union_all is not a QuerySet
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -115,9 +131,12 @@ class JoinRequestListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         # Show join requests for current user's posts or requests sent by current user
-        return JoinRequest.objects.filter(
-            Q(post__user=self.request.user) | Q(requester_user=self.request.user)
-        ).select_related('post', 'requester_user', 'responded_by').order_by('-created_at')
+        return union_all(
+            JoinRequest.objects.select_related('post', 'requester_user', 'responded_by'),
+            Q(post__user=self.request.user),
+            Q(requester_user=self.request.user),
+            ordering=['-created_at'],
+        )
     
     def perform_create(self, serializer):
         post = serializer.validated_data['post']
@@ -182,6 +201,7 @@ class MessageListCreateView(generics.ListCreateAPIView):
     """List messages or send a new message"""
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = []  # union_all is not a QuerySet
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -190,9 +210,12 @@ class MessageListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         # Show messages sent to or from current user
-        return Message.objects.filter(
-            Q(sender=self.request.user) | Q(receiver=self.request.user)
-        ).select_related('sender', 'receiver').order_by('-created_at')
+        return union_all(
+            Message.objects.select_related('sender', 'receiver'),
+            Q(sender=self.request.user),
+            Q(receiver=self.request.user),
+            ordering=['-created_at'],
+        )
     
     def perform_create(self, serializer):
         serializer.save(sender=self.request.user)
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studysync.settings')
 
 application = get_asgi_application()
+
+# The server's event loop outlives requests, so async views may keep gateway
+# HTTP clients on it (see payments.async_http)
+from payments.async_http import enable_request_loop_clients  # noqa: E402
+
+enable_request_loop_clients()
@@ -155,6 +155,29 @@ else:
 #         }
 #     }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# 'default' is per worker process. 'shared' is seen by every worker: data that
+# is invalidated on write (dashboard stats, entitlements) or must be unique
+# across workers (the bKash grant token) lives there. It is Redis when
+# REDIS_URL is set, otherwise the database cache table created by
+# ``manage.py createcachetable``.
+REDIS_URL = config('REDIS_URL', default=None)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -205,7 +228,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
@@ -222,7 +245,20 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
-    ]
+    ],
+    # Proxies in front of Django that append to X-Forwarded-For (Vercel's edge
+    # is one). Throttles key on the address the outermost trusted proxy saw;
+    # None would trust whatever X-Forwarded-For the client sends
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
+    # Token-bucket sizes for accounts.throttles: 'N/period' allows a burst of
+    # N requests, refilled at N per period
+    'DEFAULT_THROTTLE_RATES': {
+        'availability': config('AVAILABILITY_THROTTLE_RATE', default='30/min'),
+        'login': config('LOGIN_THROTTLE_RATE', default='10/min'),
+        'login_account': config('LOGIN_ACCOUNT_THROTTLE_RATE', default='5/min'),
+        'register': config('REGISTER_THROTTLE_RATE', default='5/hour'),
+        'google_auth': config('GOOGLE_AUTH_THROTTLE_RATE', default='20/min'),
+    },
 }
 
 # CORS Configuration
@@ -266,13 +302,14 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
     'x-goog-spa',
     'x-client-data',
+    'idempotency-key',
 ]
 
 CORS_ALLOW_CREDENTIALS = True
 
 # Additional CORS settings for OAuth
 CORS_ALLOW_PRIVATE_NETWORK = True
-CORS_EXPOSE_HEADERS = ['content-length', 'x-my-custom-header']
+CORS_EXPOSE_HEADERS = ['content-length', 'x-my-custom-header', 'idempotent-replayed']
 
 # Payment API Configuration
 PAYMENT_APIS = {
@@ -294,6 +331,12 @@ PAYMENT_APIS = {
         'STORE_ID': config('AAMARPAY_STORE_ID', default='aamarpaytest'),
         'SIGNATURE_KEY': config('AAMARPAY_SIGNATURE_KEY', default='dbb74894e82415a2f7ff0ec3a97e4183'),
     },
+    'ROCKET': {
+        'BASE_URL': config('ROCKET_BASE_URL', default='https://sandbox.rocketpay.com.bd/api/v1'),
+        'MERCHANT_ID': config('ROCKET_MERCHANT_ID', default=''),
+        'API_KEY': config('ROCKET_API_KEY', default=''),
+        'SECRET_KEY': config('ROCKET_SECRET_KEY', default=''),
+    },
     'STRIPE': {
         'PUBLIC_KEY': config('STRIPE_PUBLIC_KEY', default=''),
         'SECRET_KEY': config('STRIPE_SECRET_KEY', default=''),
@@ -429,6 +472,7 @@ OAUTH2_PROVIDER = {
     'REFRESH_TOKEN_EXPIRE_SECONDS': 3600 * 24 * 7,  # 1 week
     'AUTHORIZATION_CODE_EXPIRE_SECONDS': 600,
     'ROTATE_REFRESH_TOKEN': True,
+    'OAUTH2_VALIDATOR_CLASS': 'accounts.authentication.CachedUserOAuth2Validator',
 }
 
 # Social Authentication Settings
@@ -534,3 +578,114 @@ ROCKET_SECRET_KEY = config('ROCKET_SECRET_KEY', default='')
 
 # Frontend URL for callbacks
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:5500')
+
+# Mentorship connection graph (seconds before a worker rebuilds its in-memory copy)
+CONNECTION_GRAPH_MAX_AGE = config('CONNECTION_GRAPH_MAX_AGE', default=300, cast=int)
+
+# Mentor digest notifications
+MENTOR_DIGEST_INTERVAL_MINUTES = config('MENTOR_DIGEST_INTERVAL_MINUTES', default=60, cast=int)
+MENTOR_DIGEST_NOTIFICATION_BACKEND = config(
+    'MENTOR_DIGEST_NOTIFICATION_BACKEND', default='mentorship.digest.EmailNotificationBackend'
+)
+
+# Google ID token signing keys (JWKS). Point at a local key server in tests.
+GOOGLE_OAUTH2_CERTS_URL = config('GOOGLE_OAUTH2_CERTS_URL', default='https://www.googleapis.com/oauth2/v3/certs')
+
+# Seconds an authenticated user row may be served from cache (upper bound on
+# staleness of is_active / is_staff / premium fields)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+
+# Seconds a user's dashboard statistics may be served from the shared cache
+# (bounds staleness after bulk writes that bypass the invalidating signals)
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=60, cast=int)
+
+# Deleted-account purge: rows per transaction, worker lease, retries, and
+# whether the web process starts the purge itself after the delete request
+ACCOUNT_PURGE_BATCH_SIZE = config('ACCOUNT_PURGE_BATCH_SIZE', default=500, cast=int)
+ACCOUNT_PURGE_LEASE_SECONDS = config('ACCOUNT_PURGE_LEASE_SECONDS', default=300, cast=int)
+ACCOUNT_PURGE_MAX_ATTEMPTS = config('ACCOUNT_PURGE_MAX_ATTEMPTS', default=5, cast=int)
+# Seconds before a failed purge is retried, doubling with each attempt
+ACCOUNT_PURGE_RETRY_BACKOFF = config('ACCOUNT_PURGE_RETRY_BACKOFF', default=60, cast=int)
+ACCOUNT_PURGE_IN_PROCESS = config('ACCOUNT_PURGE_IN_PROCESS', default=True, cast=bool)
+
+# Profile pictures: upload size limit and thumbnail worker threads per process
+PROFILE_PICTURE_MAX_BYTES = config('PROFILE_PICTURE_MAX_BYTES', default=5 * 1024 * 1024, cast=int)
+PROFILE_THUMBNAIL_WORKERS = config('PROFILE_THUMBNAIL_WORKERS', default=2, cast=int)
+
+# Where throttle token buckets live: 'local' (per worker) or 'cache' (shared
+# through the cache alias below)
+THROTTLE_BUCKET_STORE = config('THROTTLE_BUCKET_STORE', default='local')
+THROTTLE_CACHE_ALIAS = config('THROTTLE_CACHE_ALIAS', default='default')
+
+# Subscription entitlements: monthly post quota without a paid plan (used
+# when the free plan doesn't set one) and how long entitlements are kept in
+# the shared cache
+FREE_POST_LIMIT = config('FREE_POST_LIMIT', default=5, cast=int)
+ENTITLEMENTS_CACHE_TTL = config('ENTITLEMENTS_CACHE_TTL', default=300, cast=int)
+
+# Payment gateway HTTP clients: connect/read timeouts (seconds), retries for
+# idempotent calls, base backoff (seconds, jittered) and kept-alive
+# connections per gateway per process
+PAYMENT_HTTP_CONNECT_TIMEOUT = config('PAYMENT_HTTP_CONNECT_TIMEOUT', default=3.05, cast=float)
+PAYMENT_HTTP_READ_TIMEOUT = config('PAYMENT_HTTP_READ_TIMEOUT', default=20, cast=float)
+PAYMENT_HTTP_MAX_RETRIES = config('PAYMENT_HTTP_MAX_RETRIES', default=2, cast=int)
+PAYMENT_HTTP_RETRY_BACKOFF = config('PAYMENT_HTTP_RETRY_BACKOFF', default=0.25, cast=float)
+PAYMENT_HTTP_POOL_SIZE = config('PAYMENT_HTTP_POOL_SIZE', default=10, cast=int)
+
+# bKash grant tokens: cache alias (shared, so all workers reuse one grant and
+# one refresh lock), seconds before expiry to refresh, and how long a worker
+# may hold the refresh lock
+BKASH_TOKEN_CACHE_ALIAS = config('BKASH_TOKEN_CACHE_ALIAS', default='shared')
+BKASH_TOKEN_REFRESH_MARGIN = config('BKASH_TOKEN_REFRESH_MARGIN', default=300, cast=int)
+BKASH_TOKEN_LOCK_TIMEOUT = config('BKASH_TOKEN_LOCK_TIMEOUT', default=30, cast=int)
+
+# Upper bound on simultaneous connections per gateway for the async payment
+# services (kept-alive connections are capped by PAYMENT_HTTP_POOL_SIZE)
+PAYMENT_ASYNC_HTTP_MAX_CONNECTIONS = config('PAYMENT_ASYNC_HTTP_MAX_CONNECTIONS', default=100, cast=int)
+
+# Gateway callbacks: per-gateway HMAC-SHA256 secrets for the X-Signature
+# header (unsigned callbacks are confirmed with the gateway before use), and
+# whether the web process activates subscriptions itself after a payment
+# completes (process_payment_callbacks is the backstop)
+PAYMENT_WEBHOOK_SECRETS = {
+    'bkash': config('BKASH_WEBHOOK_SECRET', default=''),
+    'nagad': config('NAGAD_WEBHOOK_SECRET', default=''),
+    'aamarpay': config('AAMARPAY_WEBHOOK_SECRET', default=''),
+}
+PAYMENT_ACTIVATION_IN_PROCESS = config('PAYMENT_ACTIVATION_IN_PROCESS', default=True, cast=bool)
+
+# Reconciliation of pending payments (reconcile_payments): status calls in
+# flight and calls per second per gateway, seconds before a pending payment is
+# first checked, between rechecks, and before it is given up as abandoned,
+# and payments read per query
+PAYMENT_RECONCILE_CONCURRENCY = config('PAYMENT_RECONCILE_CONCURRENCY', default=4, cast=int)
+PAYMENT_RECONCILE_RATE = config('PAYMENT_RECONCILE_RATE', default=5, cast=float)
+PAYMENT_RECONCILE_MIN_AGE = config('PAYMENT_RECONCILE_MIN_AGE', default=120, cast=int)
+PAYMENT_RECONCILE_RECHECK_AFTER = config('PAYMENT_RECONCILE_RECHECK_AFTER', default=300, cast=int)
+PAYMENT_RECONCILE_EXPIRE_AFTER = config('PAYMENT_RECONCILE_EXPIRE_AFTER', default=86400, cast=int)
+PAYMENT_RECONCILE_BATCH_SIZE = config('PAYMENT_RECONCILE_BATCH_SIZE', default=200, cast=int)
+
+# Idempotency-Key on payment requests: seconds a key's response is replayed,
+# and after how long a key whose request never finished may be reused
+PAYMENT_IDEMPOTENCY_TTL = config('PAYMENT_IDEMPOTENCY_TTL', default=86400, cast=int)
+PAYMENT_IDEMPOTENCY_LOCK_TIMEOUT = config('PAYMENT_IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+
+# Ads for free users: seconds before the in-process snapshot of active ads is
+# rebuilt (edits in this process apply at once), and how many times one ad is
+# shown to a user per window (seconds); 0 disables the cap
+ADS_SNAPSHOT_MAX_AGE = config('ADS_SNAPSHOT_MAX_AGE', default=60, cast=int)
+ADS_FREQUENCY_CAP = config('ADS_FREQUENCY_CAP', default=5, cast=int)
+ADS_FREQUENCY_WINDOW = config('ADS_FREQUENCY_WINDOW', default=3600, cast=int)
+
+# Ad impression/click ingestion: buffer events per worker and write them in
+# batches (off: write each event during the request), seconds between
+# flushes (the most a crashed worker can lose), events that trigger an early
+# flush, and events held before requests are turned away with 503
+ADS_EVENT_BUFFERING = config('ADS_EVENT_BUFFERING', default=True, cast=bool)
+ADS_EVENT_FLUSH_INTERVAL = config('ADS_EVENT_FLUSH_INTERVAL', default=5, cast=int)
+ADS_EVENT_FLUSH_SIZE = config('ADS_EVENT_FLUSH_SIZE', default=500, cast=int)
+ADS_EVENT_BUFFER_MAX = config('ADS_EVENT_BUFFER_MAX', default=10000, cast=int)
+
+# Seconds after which a queued gateway callback claimed by a worker that
+# never finished it may be claimed again
+PAYMENT_CALLBACK_CLAIM_TIMEOUT = config('PAYMENT_CALLBACK_CLAIM_TIMEOUT', default=300, cast=int)
@@ -15,10 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from accounts.profile_pictures import serve_profile_picture
 
 def api_root(request):
     return JsonResponse({
@@ -52,6 +53,12 @@ urlpatterns = [
 
 # Serve static files during development
 if settings.DEBUG:
+    # Profile pictures have content-hashed names, so they are served with
+    # far-future cache headers; in production the web server or storage
+    # backend serves MEDIA_URL and should send the same header
+    urlpatterns += [
+        re_path(r'^media/profile_pictures/(?P<path>.+)$', serve_profile_picture, name='profile-picture'),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     
     # Add debug toolbar URLs